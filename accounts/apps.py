@@ -5,3 +5,5 @@ class AccountsConfig(AppConfig):
     name = 'accounts'
     verbose_name = 'Accounts'
 
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,150 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+# Flags that decide what a user may do, re-read from the database at most
+# once per TOKEN_USER_CACHE_ALIAS timeout
+STATUS_FIELDS = ('is_active', 'is_staff', 'is_superuser')
+
+
+def _status_key(user_id):
+    return 'user-status:%s' % user_id
+
+
+def get_user_status(user_id):
+    """ Cached access flags of a user, or None if the user doesn't exist """
+    cache = caches[settings.TOKEN_USER_CACHE_ALIAS]
+    status = cache.get(_status_key(user_id))
+    if status is None:
+        status = User.objects.filter(pk=user_id).values(*STATUS_FIELDS).first()
+        # Remember missing users too, as an empty dict
+        cache.set(_status_key(user_id), status or {})
+    return status or None
+
+
+async def aget_user_status(user_id):
+    """
+    Async `get_user_status`. The cache is in-process memory, so it is read
+    directly and only a miss leaves the event loop.
+    """
+    cache = caches[settings.TOKEN_USER_CACHE_ALIAS]
+    status = cache.get(_status_key(user_id))
+    if status is None:
+        status = await User.objects.filter(pk=user_id).values(*STATUS_FIELDS).afirst()
+        cache.set(_status_key(user_id), status or {})
+    return status or None
+
+
+def forget_user_status(user_id):
+    caches[settings.TOKEN_USER_CACHE_ALIAS].delete(_status_key(user_id))
+
+
+class ClaimsUser(TokenUser):
+    """
+    User built from token claims and the cached access flags.
+
+    Anything the claims don't carry is read from the full `User` row, which
+    is loaded on first use only.
+    """
+
+    def __init__(self, token, status):
+        super().__init__(token)
+        self.is_active = status['is_active']
+        self.is_staff = status['is_staff']
+        self.is_superuser = status['is_superuser']
+
+    def __str__(self):
+        return self.email
+
+    @cached_property
+    def id(self):
+        # The claim is a string in recent simplejwt versions
+        return User._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+    @cached_property
+    def user(self):
+        return User.objects.get(pk=self.id)
+
+    @cached_property
+    def email(self):
+        return self.token.get('email') or self.user.email
+
+    def get_username(self):
+        return self.email
+
+    @property
+    def groups(self):
+        return self.user.groups
+
+    @property
+    def user_permissions(self):
+        return self.user.user_permissions
+
+    def get_group_permissions(self, obj=None):
+        return self.user.get_group_permissions(obj)
+
+    def get_all_permissions(self, obj=None):
+        return self.user.get_all_permissions(obj)
+
+    def has_perm(self, perm, obj=None):
+        return self.user.has_perm(perm, obj)
+
+    def has_perms(self, perm_list, obj=None):
+        return self.user.has_perms(perm_list, obj)
+
+    def has_module_perms(self, module):
+        return self.user.has_module_perms(module)
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.user, attr)
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Authenticate from the signed token without loading the user row.
+
+    Access flags come from a short-lived in-process cache, so deactivating
+    or demoting a user takes effect within the cache timeout.
+    """
+
+    def get_user(self, validated_token):
+        status = get_user_status(self.get_user_id(validated_token))
+        return self.build_user(validated_token, status)
+
+    async def aauthenticate(self, request):
+        """ Async `authenticate`, for AsyncAPIView """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        status = await aget_user_status(self.get_user_id(validated_token))
+        return self.build_user(validated_token, status), validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+    def build_user(self, validated_token, status):
+        if status is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not status['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return ClaimsUser(validated_token, status)
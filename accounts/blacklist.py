@@ -0,0 +1,97 @@
+import datetime
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from cbt_core.bloom import BloomFilter
+
+
+class BlacklistFilter:
+    """
+    In-process Bloom filter of blacklisted token ids.
+
+    A miss means the token is not blacklisted, so only the rare hit (a real
+    entry or a false positive) is confirmed against the database. Rows
+    blacklisted since the last sync are pulled in every
+    TOKEN_BLACKLIST_SYNC_INTERVAL seconds, which bounds how long a token
+    revoked by another worker stays usable here; tokens revoked in this
+    process are added straight away.
+
+    Syncs go by `blacklisted_at` rather than id: ids are handed out before
+    commit, so a row can become visible after one with a higher id. Each
+    sync looks TOKEN_BLACKLIST_SYNC_OVERLAP seconds further back to catch
+    such late commits (and clock skew between workers), skipping the rows
+    it already has, and the filter is rebuilt from scratch every
+    TOKEN_BLACKLIST_REBUILD_INTERVAL seconds in case a commit took longer.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.filter = None
+        # Start of the last sync, and the rows read since `since` minus the
+        # overlap, by id
+        self.since = None
+        self.seen = {}
+        self.synced_at = 0
+        self.rebuilt_at = 0
+
+    def rebuild(self):
+        started = timezone.now()
+        horizon = started - datetime.timedelta(seconds=settings.TOKEN_BLACKLIST_SYNC_OVERLAP)
+        blacklisted = BlacklistedToken.objects.filter(
+            token__expires_at__gt=started
+        )
+        capacity = max(settings.TOKEN_BLACKLIST_FILTER_CAPACITY, 2 * blacklisted.count())
+        self.filter = BloomFilter(capacity, settings.TOKEN_BLACKLIST_FILTER_ERROR_RATE)
+        self.seen = {}
+        entries = blacklisted.values_list('id', 'token__jti', 'blacklisted_at')
+        for entry_id, jti, blacklisted_at in entries.iterator():
+            self.filter.add(jti)
+            if blacklisted_at >= horizon:
+                self.seen[entry_id] = blacklisted_at
+        self.since = started
+        self.synced_at = self.rebuilt_at = time.monotonic()
+
+    def sync(self):
+        started = timezone.now()
+        horizon = self.since - datetime.timedelta(seconds=settings.TOKEN_BLACKLIST_SYNC_OVERLAP)
+        entries = BlacklistedToken.objects.filter(
+            blacklisted_at__gte=horizon
+        ).values_list('id', 'token__jti', 'blacklisted_at')
+        for entry_id, jti, blacklisted_at in entries.iterator():
+            if entry_id not in self.seen:
+                self.filter.add(jti)
+                self.seen[entry_id] = blacklisted_at
+        # Forget rows the next sync won't read again
+        horizon = started - datetime.timedelta(seconds=settings.TOKEN_BLACKLIST_SYNC_OVERLAP)
+        self.seen = {
+            entry_id: blacklisted_at for entry_id, blacklisted_at in self.seen.items()
+            if blacklisted_at >= horizon
+        }
+        self.since = started
+        self.synced_at = time.monotonic()
+        if self.filter.is_full or self.synced_at - self.rebuilt_at >= settings.TOKEN_BLACKLIST_REBUILD_INTERVAL:
+            self.rebuild()
+
+    def might_contain(self, jti):
+        with self.lock:
+            if self.filter is None:
+                self.rebuild()
+            elif time.monotonic() - self.synced_at >= settings.TOKEN_BLACKLIST_SYNC_INTERVAL:
+                self.sync()
+            return jti in self.filter
+
+    def add(self, jti):
+        with self.lock:
+            if self.filter is not None:
+                self.filter.add(jti)
+
+    def reset(self):
+        with self.lock:
+            self.filter = None
+
+
+blacklist_filter = BlacklistFilter()
@@ -0,0 +1,52 @@
+import contextvars
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+from cbt_core.metrics import PASSWORD_HASHING
+
+# Set while verifying, when PBKDF2 re-encodes the password to compare
+_verifying = contextvars.ContextVar('verifying', default=False)
+
+
+class TimedHasherMixin:
+    """
+    Record the time of every hash and check in PASSWORD_HASHING, whichever
+    path made it: DRF login, the async views, a roster import or a shell.
+    """
+
+    def encode(self, *args, **kwargs):
+        if _verifying.get():
+            return super().encode(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return super().encode(*args, **kwargs)
+        finally:
+            PASSWORD_HASHING.labels('make_password').observe(time.perf_counter() - started)
+
+    def verify(self, *args, **kwargs):
+        started = time.perf_counter()
+        token = _verifying.set(True)
+        try:
+            return super().verify(*args, **kwargs)
+        finally:
+            _verifying.reset(token)
+            PASSWORD_HASHING.labels('check_password').observe(time.perf_counter() - started)
+
+
+class TunedArgon2PasswordHasher(TimedHasherMixin, Argon2PasswordHasher):
+    """
+    Argon2id with cost parameters taken from settings.
+
+    Django's defaults (100 MiB, 8 lanes) are sized for interactive logins on
+    a quiet box; login storms need a cheaper verify. Hashes made with other
+    parameters are upgraded on the next successful login.
+    """
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
+
+
+class TimedPBKDF2PasswordHasher(TimedHasherMixin, PBKDF2PasswordHasher):
+    """ Django's PBKDF2 hasher, timed; same algorithm name, so old hashes still verify """
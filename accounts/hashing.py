@@ -0,0 +1,104 @@
+import asyncio
+import collections
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, identify_hasher
+from rest_framework import exceptions
+
+
+class HashingOverloaded(exceptions.APIException):
+    status_code = 503
+    default_detail = 'Too many logins in progress, try again shortly.'
+    default_code = 'hashing_overloaded'
+    wait = 1
+
+
+class HashingExecutor:
+    """
+    Run password hashing off the event loop with a bounded backlog.
+
+    At most PASSWORD_HASHING_WORKERS hashes run at once and at most
+    PASSWORD_HASHING_MAX_QUEUE more wait; past that `run` raises
+    `HashingOverloaded` (503) straight away instead of letting requests pile
+    up. Threads are enough for PBKDF2 and Argon2, both release the GIL.
+    The hashers time themselves; with the process executor their samples
+    only reach /metrics/ in PROMETHEUS_MULTIPROC_DIR mode.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.in_flight = 0
+
+    @property
+    def workers(self):
+        return settings.PASSWORD_HASHING_WORKERS or os.cpu_count() or 1
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                if settings.PASSWORD_HASHING_EXECUTOR == 'process':
+                    self.executor = ProcessPoolExecutor(
+                        self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=django.setup,
+                    )
+                else:
+                    self.executor = ThreadPoolExecutor(
+                        self.workers, thread_name_prefix='password-hashing')
+            return self.executor
+
+    async def run(self, func, *args):
+        executor = self.get_executor()
+        with self.lock:
+            if self.in_flight >= self.workers + settings.PASSWORD_HASHING_MAX_QUEUE:
+                raise HashingOverloaded()
+            self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def map(self, func, items):
+        """
+        `[func(item) for item in items]` on the executor, for sync callers
+        such as roster imports. At most one item per worker is outstanding
+        at a time, so logins arriving meanwhile queue behind a few hashes
+        rather than the whole roster, and count towards the backlog.
+        """
+        executor = self.get_executor()
+        results = []
+        pending = collections.deque()
+        for item in items:
+            if len(pending) >= self.workers:
+                results.append(pending.popleft().result())
+            with self.lock:
+                self.in_flight += 1
+            future = executor.submit(func, item)
+            future.add_done_callback(self.done)
+            pending.append(future)
+        results.extend(future.result() for future in pending)
+        return results
+
+    def done(self, future):
+        with self.lock:
+            self.in_flight -= 1
+
+
+hashing_executor = HashingExecutor()
+
+
+def must_update(encoded):
+    """ Whether a stored hash should be redone with the preferred hasher """
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    preferred = get_hasher('default')
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
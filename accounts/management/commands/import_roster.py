@@ -0,0 +1,50 @@
+import csv
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.roster import import_roster
+
+
+class Command(BaseCommand):
+    help = 'Create users in bulk from a CSV or JSON roster file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row, or a JSON array')
+        parser.add_argument(
+            '--format', choices=('csv', 'json'),
+            help='File format (default: taken from the file extension)')
+        parser.add_argument(
+            '--workers', type=int,
+            help='Password hashing processes (default: ROSTER_IMPORT_WORKERS, or one per core)')
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Users per INSERT (default: ROSTER_IMPORT_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('json' if path.endswith('.json') else 'csv')
+        try:
+            with open(path, newline='', encoding='utf-8') as roster:
+                if file_format == 'json':
+                    rows = json.load(roster)
+                else:
+                    rows = list(csv.DictReader(roster))
+        except (OSError, ValueError, csv.Error) as exc:
+            raise CommandError('Could not read roster: %s' % exc)
+        if not isinstance(rows, list):
+            raise CommandError('Expected a list of users.')
+
+        workers = options['workers'] or settings.ROSTER_IMPORT_WORKERS or os.cpu_count() or 1
+        result = import_roster(rows, workers=workers, batch_size=options['batch_size'])
+        for error in result['errors']:
+            messages = '; '.join(
+                '%s: %s' % (field, ' '.join(str(message) for message in field_errors))
+                for field, field_errors in error['errors'].items()
+            )
+            self.stderr.write('Row %d: %s' % (error['row'], messages))
+        self.stdout.write(self.style.SUCCESS(
+            'Created %d users, skipped %d rows' % (result['created'], len(result['errors']))
+        ))
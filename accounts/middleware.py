@@ -0,0 +1,41 @@
+from urllib.parse import parse_qs
+
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .authentication import StatelessJWTAuthentication, aget_user_status
+
+
+class TokenAuthMiddleware(BaseMiddleware):
+    """
+    Set `scope['user']` on websocket connections from an access token.
+
+    Browsers can't set headers on a websocket handshake, so the token is read
+    from the `token` query parameter, falling back to the Authorization header.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope, user=await self.get_user(scope))
+        return await super().__call__(scope, receive, send)
+
+    async def get_user(self, scope):
+        authentication = StatelessJWTAuthentication()
+        raw_token = self.get_raw_token(scope, authentication)
+        if raw_token is None:
+            return AnonymousUser()
+        try:
+            validated_token = authentication.get_validated_token(raw_token)
+            status = await aget_user_status(authentication.get_user_id(validated_token))
+            return authentication.build_user(validated_token, status)
+        except (InvalidToken, AuthenticationFailed):
+            return AnonymousUser()
+
+    def get_raw_token(self, scope, authentication):
+        params = parse_qs(scope.get('query_string', b'').decode())
+        if params.get('token'):
+            return params['token'][0].encode()
+        header = dict(scope.get('headers', ())).get(b'authorization')
+        if header is None:
+            return None
+        return authentication.get_raw_token(header)
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+# accounts.blacklist.BlacklistFilter syncs by blacklisted_at, on a table that
+# belongs to simplejwt's token_blacklist app. The index is created here with
+# raw SQL and kept out of the migration state, so token_blacklist's models
+# and migrations never know about it:
+# - a later token_blacklist migration that rebuilds the table or the column
+#   drops the index silently; running the CREATE INDEX below again (it is
+#   idempotent) puts it back
+# - if simplejwt ever indexes blacklisted_at itself, drop this one
+CREATE_INDEX = (
+    'CREATE INDEX IF NOT EXISTS token_blacklist_blacklisted_at_idx '
+    'ON token_blacklist_blacklistedtoken (blacklisted_at)'
+)
+DROP_INDEX = 'DROP INDEX IF EXISTS token_blacklist_blacklisted_at_idx'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_updated_at'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(CREATE_INDEX, DROP_INDEX)],
+            state_operations=[],
+        ),
+    ]
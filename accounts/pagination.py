@@ -0,0 +1,6 @@
+from cbt_core.pagination import KeysetPagination
+
+
+class UserPagination(KeysetPagination):
+    """ Seek through users alphabetically by email, on its unique index """
+    ordering = ('email',)
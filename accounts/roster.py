@@ -0,0 +1,119 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from cbt_core.cache import invalidate
+from .hashing import hashing_executor
+from .models import User
+from .serializers import RosterRowSerializer
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Hash passwords, small rosters inline.
+
+    Larger ones go to the process's long-lived `hashing_executor`, shared
+    with logins, so a web request never starts processes of its own.
+    `workers` hashes on a dedicated pool of that many processes instead,
+    for the import_roster command.
+    """
+    if workers == 1 or len(passwords) < settings.ROSTER_IMPORT_POOL_THRESHOLD:
+        return [make_password(password) for password in passwords]
+    if workers is None:
+        return hashing_executor.map(make_password, passwords)
+    # Spawn rather than fork so workers never share the parent's DB sockets
+    context = multiprocessing.get_context('spawn')
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=django.setup) as pool:
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+def import_roster(rows, workers=None, batch_size=None):
+    """
+    Create users from roster rows, reporting bad rows instead of aborting.
+
+    Returns a dict with the number of users created and a list of
+    `{'row': index, 'errors': {...}}` entries for invalid or duplicate rows.
+    """
+    batch_size = batch_size or settings.ROSTER_IMPORT_BATCH_SIZE
+    errors = {}
+    valid = {}
+    seen = set()
+    for index, row in enumerate(rows):
+        serializer = RosterRowSerializer(data=row)
+        if not serializer.is_valid():
+            errors[index] = serializer.errors
+            continue
+        data = serializer.validated_data
+        data['email'] = User.objects.normalize_email(data['email'])
+        if data['email'] in seen:
+            errors[index] = {'email': ['Duplicate email in roster.']}
+            continue
+        seen.add(data['email'])
+        valid[index] = data
+
+    existing = set()
+    emails = list(seen)
+    for start in range(0, len(emails), batch_size):
+        existing.update(User.objects.filter(
+            email__in=emails[start:start + batch_size]
+        ).values_list('email', flat=True))
+    for index, data in list(valid.items()):
+        if data['email'] in existing:
+            errors[index] = {'email': ['User with this email already exists.']}
+            del valid[index]
+
+    indexes = list(valid)
+    hashes = hash_passwords(
+        # Rows without a password get an unusable one
+        [valid[index].get('password') or None for index in indexes], workers)
+    users = [
+        User(
+            email=valid[index]['email'],
+            first_name=valid[index]['first_name'],
+            last_name=valid[index]['last_name'],
+            password=password,
+        )
+        for index, password in zip(indexes, hashes)
+    ]
+
+    created = 0
+    for start in range(0, len(users), batch_size):
+        batch = list(zip(indexes[start:start + batch_size], users[start:start + batch_size]))
+        while batch:
+            try:
+                with transaction.atomic():
+                    User.objects.bulk_create([user for _, user in batch])
+                created += len(batch)
+                break
+            except IntegrityError:
+                # Someone registered some of these emails since the check
+                # above, e.g. a concurrent import; drop them and try again
+                taken = set(User.objects.filter(
+                    email__in=[user.email for _, user in batch]
+                ).values_list('email', flat=True))
+                if not taken:
+                    # Not a duplicate email after all, report rather than fail
+                    for index, _ in batch:
+                        errors[index] = {'non_field_errors': ['User could not be created.']}
+                    break
+                for index, user in batch:
+                    if user.email in taken:
+                        errors[index] = {'email': ['User with this email already exists.']}
+                batch = [(index, user) for index, user in batch if user.email not in taken]
+
+    # bulk_create doesn't send post_save
+    if created:
+        invalidate(User)
+
+    return {
+        'created': created,
+        'errors': [
+            {'row': index, 'errors': detail}
+            for index, detail in sorted(errors.items())
+        ],
+    }
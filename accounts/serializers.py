@@ -1,5 +1,11 @@
 from .models import User
 from rest_framework import serializers
+from cbt_core.serializers import SparseFieldsetSerializer
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer as BaseTokenObtainPairSerializer,
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
+from .tokens import RefreshToken
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -17,3 +23,79 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = '__all__'
+
+
+class UserReadSerializer(SparseFieldsetSerializer):
+    """ User as read back by the API: no password hash, ?fields= aware """
+
+    class Meta:
+        model = User
+        fields = (
+            'id', 'email', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser',
+            'last_login', 'updated_at', 'groups', 'user_permissions',
+        )
+
+    @classmethod
+    def queryset(cls, request, *extra):
+        """ Users with just the columns and relations the request renders """
+        queryset = cls.only(User.objects.all(), request, *extra)
+        related = [name for name in ('groups', 'user_permissions') if cls.selects(request, name)]
+        return queryset.prefetch_related(*related)
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    """ Compact author data embedded in other resources """
+
+    class Meta:
+        model = User
+        fields = ('id', 'email', 'first_name', 'last_name')
+
+
+class RosterRowSerializer(serializers.Serializer):
+    """ One user of a roster import """
+    email = serializers.EmailField(max_length=254)
+    password = serializers.CharField(required=False, allow_blank=True)
+    first_name = serializers.CharField(max_length=30)
+    last_name = serializers.CharField(max_length=30)
+
+
+class StrictCharField(serializers.CharField):
+    """ CharField that rejects numbers rather than converting them """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        return super().to_internal_value(data)
+
+
+class LoginSerializer(serializers.Serializer):
+    """ Credentials for AsyncTokenObtainPairView, which checks them itself """
+    email = StrictCharField()
+    password = StrictCharField(trim_whitespace=False)
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    """ Users whose sessions should all be ended """
+    users = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+    )
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    """
+    Put the claims StatelessJWTAuthentication reads into the tokens.
+
+    Access flags are left out on purpose: they must follow deactivation and
+    demotion within the status cache timeout, not the token lifetime.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['email'] = user.email
+        return token
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    token_class = RefreshToken
@@ -0,0 +1,30 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from cbt_core.cache import invalidate
+from .authentication import forget_user_status
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_users(sender, **kwargs):
+    invalidate(User)
+
+
+@receiver([post_save, post_delete], sender=User)
+def forget_status(sender, instance, **kwargs):
+    forget_user_status(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def touch_users(sender, instance, action, reverse, pk_set, **kwargs):
+    """ Group and permission changes don't save the user, so bump updated_at """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    user_ids = pk_set if reverse else [instance.pk]
+    if user_ids:
+        User.objects.filter(pk__in=user_ids).update(updated_at=timezone.now())
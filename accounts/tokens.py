@@ -0,0 +1,23 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+from .blacklist import blacklist_filter
+
+
+class RefreshToken(BaseRefreshToken):
+    """ Refresh token that asks the blacklist filter before the database """
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not blacklist_filter.might_contain(jti):
+            return
+        if BlacklistedToken.objects.filter(token__jti=jti).exists():
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return result
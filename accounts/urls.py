@@ -1,16 +1,20 @@
 from django.urls import path
 from .views import (
-    RegisterView,
+    AsyncRegisterView,
+    AsyncTokenObtainPairView,
+    AsyncUserDetailView,
+    AsyncUserListView,
     LogoutView,
+    LogoutAllView,
+    RegisterView,
     UserCreateView,
     UserDetailView,
+    UserImportView,
     UserListView,
+    UserLogoutView,
 )
 
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 
 urlpatterns = [
@@ -18,7 +22,16 @@ urlpatterns = [
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('register/', RegisterView.as_view(), name='register'),
     path('logout/', LogoutView.as_view(), name='logout'),
+    path('logout/all/', LogoutAllView.as_view(), name='logout-all'),
     path('users/create/', UserCreateView.as_view(), name='user-create'),
+    path('users/import/', UserImportView.as_view(), name='user-import'),
+    path('users/logout/', UserLogoutView.as_view(), name='user-logout'),
     path('users/', UserListView.as_view(), name='user-list'),
     path('users/<int:pk>/', UserDetailView.as_view(), name='user-detail'),
+    # Async versions for the ASGI deployment, hashing passwords off the
+    # event loop; they skip DRF's throttling and content negotiation
+    path('async/token/', AsyncTokenObtainPairView.as_view(), name='token_obtain_pair_async'),
+    path('async/register/', AsyncRegisterView.as_view(), name='register_async'),
+    path('async/users/', AsyncUserListView.as_view(), name='user-list-async'),
+    path('async/users/<int:pk>/', AsyncUserDetailView.as_view(), name='user-detail-async'),
 ]
@@ -1,11 +1,44 @@
+import logging
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.models import update_last_login
+from django.db import IntegrityError
+from rest_framework import exceptions
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.views import APIView
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
-from .serializers import UserRegistrationSerializer, UserSerializer
+from rest_framework_simplejwt.settings import api_settings
+from cbt_core.cache import cache_response
+from cbt_core.conditional import conditional_response
+from cbt_core.parsers import CSVParser
+from cbt_core.views import AsyncAPIView
+from .hashing import hashing_executor, must_update
+from .serializers import (
+    LoginSerializer,
+    TokenObtainPairSerializer,
+    TokenRevokeSerializer,
+    UserReadSerializer,
+    UserRegistrationSerializer,
+    UserSerializer,
+)
 from .models import User
+from .pagination import UserPagination
+from .revocation import revoke_user_tokens
+from .roster import import_roster
+from .tokens import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+
+def user_detail_version(view, request, pk):
+    updated_at = User.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    return updated_at.isoformat(), updated_at
 
 
 class RegisterView(APIView):
@@ -19,6 +52,73 @@ class RegisterView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class AsyncRegisterView(AsyncAPIView):
+    """ Register user, hashing the password off the event loop """
+    authentication_classes = ()
+
+    async def post(self, request):
+        serializer = UserRegistrationSerializer(data=self.parse_data(request))
+        # Validation checks the email is free, which is a query
+        if not await sync_to_async(serializer.is_valid)():
+            return self.respond(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        user = User(
+            email=User.objects.normalize_email(data['email']),
+            first_name=data['first_name'],
+            last_name=data['last_name'],
+            password=await hashing_executor.run(make_password, data['password']),
+        )
+        try:
+            await user.asave()
+        except IntegrityError:
+            # Registered by a concurrent request since validation
+            return self.respond(
+                {'email': ['user with this email already exists.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return self.respond(
+            UserRegistrationSerializer(user).data, status=status.HTTP_201_CREATED)
+
+
+class AsyncTokenObtainPairView(AsyncAPIView):
+    """ Obtain a token pair, verifying the password off the event loop """
+    authentication_classes = ()
+
+    def get_authenticate_header(self, request):
+        return '%s realm="api"' % api_settings.AUTH_HEADER_TYPES[0]
+
+    async def post(self, request):
+        serializer = LoginSerializer(data=self.parse_data(request))
+        if not serializer.is_valid():
+            return self.respond(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        user = await User.objects.filter(
+            email=User.objects.normalize_email(data['email'])
+        ).afirst()
+        if user is None:
+            # Hash anyway so response time doesn't reveal unknown emails
+            await hashing_executor.run(make_password, data['password'])
+            raise exceptions.AuthenticationFailed(
+                TokenObtainPairSerializer.default_error_messages['no_active_account'])
+
+        valid = await hashing_executor.run(check_password, data['password'], user.password)
+        if not valid or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise exceptions.AuthenticationFailed(
+                TokenObtainPairSerializer.default_error_messages['no_active_account'])
+
+        # Move the stored hash to the preferred hasher and parameters
+        if must_update(user.password):
+            user.password = await hashing_executor.run(make_password, data['password'])
+            await User.objects.filter(pk=user.pk).aupdate(password=user.password)
+
+        refresh = await sync_to_async(TokenObtainPairSerializer.get_token)(user)
+        if api_settings.UPDATE_LAST_LOGIN:
+            await sync_to_async(update_last_login)(None, user)
+        return self.respond({'refresh': str(refresh), 'access': str(refresh.access_token)})
+
+
 class LogoutView(APIView):
     """ Logout user """
     permission_classes = (IsAuthenticated,)
@@ -32,10 +132,30 @@ class LogoutView(APIView):
             token.blacklist()
             return Response(status=status.HTTP_205_RESET_CONTENT)
         except Exception as e:
-            print(e)
+            logger.warning('Logout failed: %s', e)
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
+class LogoutAllView(APIView):
+    """ Logout user from every session """
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        revoked = revoke_user_tokens([request.user.id])
+        return Response({'revoked': revoked})
+
+
+class UserLogoutView(APIView):
+    """ Logout a list of users from every session """
+    permission_classes = (IsAdminUser,)
+
+    def post(self, request):
+        serializer = TokenRevokeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        revoked = revoke_user_tokens(serializer.validated_data['users'])
+        return Response({'revoked': revoked})
+
+
 class UserCreateView(generics.CreateAPIView):
     """ Create a new user """
     queryset = User.objects.all()
@@ -49,9 +169,70 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticated,)
 
+    def get_queryset(self):
+        if self.request.method == 'GET':
+            return UserReadSerializer.queryset(self.request)
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return UserReadSerializer
+        return super().get_serializer_class()
+
+    @conditional_response(user_detail_version)
+    @cache_response(User)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 
 class UserListView(generics.ListAPIView):
     """ List all users """
-    queryset = User.objects.all()
-    serializer_class = UserSerializer
+    serializer_class = UserReadSerializer
+    permission_classes = (IsAdminUser,)
+    pagination_class = UserPagination
+
+    def get_queryset(self):
+        return UserReadSerializer.queryset(self.request, *UserPagination.ordering)
+
+
+class UserImportView(APIView):
+    """ Create users in bulk from a CSV or JSON roster """
     permission_classes = (IsAdminUser,)
+    parser_classes = (JSONParser, CSVParser)
+
+    def post(self, request):
+        if not isinstance(request.data, list):
+            return Response(
+                {'non_field_errors': ['Expected a list of users.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        result = import_roster(request.data)
+        return Response(
+            result,
+            status=status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST
+        )
+
+
+class AsyncUserDetailView(AsyncAPIView):
+    """ Retrieve a user with the async ORM """
+    permission_classes = (IsAuthenticated,)
+
+    async def get(self, request, pk):
+        try:
+            user = await UserReadSerializer.queryset(request).aget(pk=pk)
+        except User.DoesNotExist:
+            raise exceptions.NotFound()
+        return self.respond(UserReadSerializer(user, context={'request': request}).data)
+
+
+class AsyncUserListView(AsyncAPIView):
+    """ List users with the async ORM """
+    permission_classes = (IsAdminUser,)
+    pagination_class = UserPagination
+
+    async def get(self, request):
+        paginator = self.pagination_class()
+        users = await paginator.apaginate_queryset(
+            UserReadSerializer.queryset(request, *UserPagination.ordering), request, view=self)
+        serializer = UserReadSerializer(users, many=True, context={'request': request})
+        return self.respond(paginator.get_paginated_data(serializer.data))
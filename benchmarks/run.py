@@ -0,0 +1,306 @@
+#!/usr/bin/env python
+"""
+End-to-end HTTP benchmarks.
+
+Starts the API under daphne against a local Postgres database, seeds users
+and questions, then drives each workload with concurrent keep-alive clients
+and reports latency percentiles and throughput:
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --workloads login,question_read --concurrency 64
+    python benchmarks/run.py --baseline baseline.json --tolerance 0.2
+
+The database (--database, created and migrated if missing) is written to,
+so use a throwaway one; the other connection settings come from the usual
+POSTGRES_* variables. With --baseline the run exits with status 1 if any
+workload's p95 latency or throughput is worse than the baseline's by more
+than the tolerance, or its error rate grew.
+"""
+import argparse
+import datetime
+import http.client
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from workloads import WORKLOADS
+
+ROOT = Path(__file__).resolve().parent.parent
+PASSWORD = 'bench-password-1'
+
+
+def create_database(name):
+    import psycopg2
+    from psycopg2 import sql
+
+    connection = psycopg2.connect(
+        dbname='postgres',
+        user=os.environ.get('POSTGRES_USER'),
+        password=os.environ.get('POSTGRES_PASSWORD'),
+        host='localhost',
+        port=5432,
+    )
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_database WHERE datname = %s', [name])
+        if cursor.fetchone() is None:
+            cursor.execute(sql.SQL('CREATE DATABASE {}').format(sql.Identifier(name)))
+    connection.close()
+
+
+def setup_django(database):
+    sys.path.insert(0, str(ROOT))
+    os.environ['POSTGRES_DB'] = database
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cbt_project.settings')
+    import django
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def seed(candidates, questions):
+    """ Replace the previous run's users and questions; returns the fixtures """
+    from django.contrib.auth.hashers import make_password
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from accounts.models import User
+    from cbtforms.models import Question
+
+    def token(user):
+        access = AccessToken.for_user(user)
+        # Outlive the whole run
+        access.set_exp(lifetime=datetime.timedelta(hours=6))
+        return str(access)
+
+    User.objects.filter(email__startswith='bench-').delete()
+    # Hashing is what the login workload measures, not seeding
+    hashed = make_password(PASSWORD)
+    users = User.objects.bulk_create([
+        User(email='bench-%d@example.com' % index, password=hashed, first_name='Bench', last_name='User')
+        for index in range(candidates)
+    ])
+    admin = User.objects.create(
+        email='bench-admin@example.com', password=hashed, first_name='Bench', last_name='Admin',
+        is_staff=True, is_superuser=True)
+    bank = Question.objects.bulk_create([
+        Question(
+            question_text='Benchmark question %d: %s?' % (index, 'lorem ipsum ' * (index % 40)),
+            user=users[index % len(users)],
+            answer_key={'A': 1},
+            options=['A', 'B', 'C', 'D'],
+        )
+        for index in range(questions)
+    ])
+    return {
+        'password': PASSWORD,
+        'admin_token': token(admin),
+        'candidates': [{'id': user.id, 'email': user.email, 'token': token(user)} for user in users],
+        'questions': [question.id for question in bank],
+    }
+
+
+class Server:
+    """ daphne serving the project on a free local port """
+
+    def __init__(self, database, log):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            self.port = probe.getsockname()[1]
+        self.database = database
+        self.log = log
+        self.spool = tempfile.TemporaryDirectory(prefix='bench-spool-')
+
+    def __enter__(self):
+        env = dict(
+            os.environ,
+            POSTGRES_DB=self.database,
+            ALLOWED_HOSTS='127.0.0.1,localhost',
+            ANSWER_SPOOL_DIR=self.spool.name,
+            DJANGO_SETTINGS_MODULE='cbt_project.settings',
+        )
+        env.pop('DEBUG', None)
+        env.pop('PROFILING_SAMPLE_RATE', None)
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'daphne', '-b', '127.0.0.1', '-p', str(self.port), 'cbt_project.asgi:application'],
+            cwd=ROOT, env=env, stdout=self.log, stderr=subprocess.STDOUT,
+        )
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=1).close()
+                return self
+            except OSError:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError('daphne did not start, see %s' % self.log.name)
+                time.sleep(0.2)
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.spool.cleanup()
+
+
+def drive(workload, port, concurrency, duration, warmup):
+    """ Run a workload from `concurrency` clients; only requests started after the warmup count """
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    def client(worker):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        latencies, statuses = [], Counter()
+        iteration = 0
+        while True:
+            sent = time.perf_counter()
+            if sent >= stop_at:
+                break
+            method, path, body, headers = workload.request(worker, iteration)
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                status = 0
+            if sent >= measure_from:
+                latencies.append(time.perf_counter() - sent)
+                statuses[status] += 1
+            iteration += 1
+        connection.close()
+        return latencies, statuses
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(client, range(concurrency)))
+
+    latencies = np.array([latency for result in results for latency in result[0]]) * 1000
+    statuses = sum((result[1] for result in results), Counter())
+    requests = int(latencies.size)
+    errors = sum(count for status, count in statuses.items() if not 200 <= status < 400)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if requests else (None, None, None)
+    return {
+        'description': workload.description,
+        'requests': requests,
+        'rps': requests / duration,
+        'error_rate': errors / requests if requests else None,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'mean_ms': float(latencies.mean()) if requests else None,
+        'p50_ms': float(p50) if requests else None,
+        'p95_ms': float(p95) if requests else None,
+        'p99_ms': float(p99) if requests else None,
+        'max_ms': float(latencies.max()) if requests else None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """ Regressions of `results` against `baseline`, as messages """
+    regressions = []
+    for name, result in results['workloads'].items():
+        previous = baseline.get('workloads', {}).get(name)
+        if not previous or not result['requests'] or not previous['requests']:
+            continue
+        if result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append('%s: p95 %.1f ms, baseline %.1f ms' % (name, result['p95_ms'], previous['p95_ms']))
+        if result['rps'] < previous['rps'] * (1 - tolerance):
+            regressions.append('%s: %.1f requests/s, baseline %.1f' % (name, result['rps'], previous['rps']))
+        if result['error_rate'] > previous['error_rate'] + 0.01:
+            regressions.append('%s: %.1f%% errors, baseline %.1f%%' % (
+                name, result['error_rate'] * 100, previous['error_rate'] * 100))
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workloads', default=','.join(WORKLOADS),
+                        help='Comma separated, from: %s (default: all)' % ', '.join(WORKLOADS))
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients (default: 16)')
+    parser.add_argument('--duration', type=float, default=20, help='Measured seconds per workload (default: 20)')
+    parser.add_argument('--warmup', type=float, default=3, help='Unmeasured seconds first (default: 3)')
+    parser.add_argument('--database', default='cbt_bench', help='Throwaway database (default: cbt_bench)')
+    parser.add_argument('--candidates', type=int, default=1000, help='Users to seed (default: 1000)')
+    parser.add_argument('--questions', type=int, default=5000, help='Questions to seed (default: 5000)')
+    parser.add_argument('--output', help='Write the results here as JSON')
+    parser.add_argument('--baseline', help='Results JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed relative slowdown against the baseline (default: 0.2)')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.workloads.split(',') if name.strip()]
+    unknown = set(names) - set(WORKLOADS)
+    if unknown:
+        parser.error('unknown workloads: %s' % ', '.join(sorted(unknown)))
+
+    create_database(args.database)
+    setup_django(args.database)
+    print('Seeding %d users and %d questions...' % (args.candidates, args.questions))
+    fixtures = seed(args.candidates, args.questions)
+    run_id = uuid.uuid4().hex[:8]
+
+    results = {
+        'meta': {
+            'started_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'candidates': args.candidates,
+            'questions': args.questions,
+        },
+        'workloads': {},
+    }
+    with tempfile.NamedTemporaryFile('w', prefix='bench-daphne-', suffix='.log', delete=False) as log:
+        with Server(args.database, log) as server:
+            for name in names:
+                print('Running %s for %gs with %d clients...' % (name, args.duration, args.concurrency))
+                workload = WORKLOADS[name](fixtures, run_id)
+                results['workloads'][name] = drive(
+                    workload, server.port, args.concurrency, args.duration, args.warmup)
+
+    print('\n%-16s %9s %9s %9s %9s %9s %7s' % ('workload', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms', 'errors'))
+    for name, result in results['workloads'].items():
+        if not result['requests']:
+            print('%-16s no requests completed' % name)
+            continue
+        print('%-16s %9.1f %9.1f %9.1f %9.1f %9.1f %6.1f%%' % (
+            name, result['rps'], result['p50_ms'], result['p95_ms'], result['p99_ms'], result['max_ms'],
+            result['error_rate'] * 100))
+    print('daphne log: %s' % log.name)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION %s' % regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark workloads. Each turns (worker, iteration) into one request;
+`fixtures` holds the users, tokens and questions seeded for the run.
+"""
+import json
+
+
+class Workload:
+    name = None
+    description = None
+
+    def __init__(self, fixtures, run_id):
+        self.fixtures = fixtures
+        self.run_id = run_id
+
+    def request(self, worker, iteration):
+        """ (method, path, body or None, headers) """
+        raise NotImplementedError
+
+    def candidate(self, worker, iteration):
+        candidates = self.fixtures['candidates']
+        return candidates[(worker * 7919 + iteration) % len(candidates)]
+
+    def json(self, method, path, data, token=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = 'Bearer ' + token
+        return method, path, json.dumps(data).encode(), headers
+
+
+class LoginStorm(Workload):
+    name = 'login'
+    description = 'Candidates obtaining tokens at the start of an exam'
+
+    def request(self, worker, iteration):
+        candidate = self.candidate(worker, iteration)
+        return self.json('POST', '/api/accounts/token/', {
+            'email': candidate['email'],
+            'password': self.fixtures['password'],
+        })
+
+
+class Registration(Workload):
+    name = 'register'
+    description = 'New accounts'
+
+    def request(self, worker, iteration):
+        return self.json('POST', '/api/accounts/register/', {
+            'email': 'bench-register-%s-%d-%d@example.com' % (self.run_id, worker, iteration),
+            'password': self.fixtures['password'],
+            'first_name': 'Bench',
+            'last_name': 'Register',
+        })
+
+
+class QuestionCreate(Workload):
+    name = 'question_create'
+    description = 'Authors adding questions one at a time'
+
+    def request(self, worker, iteration):
+        candidate = self.candidate(worker, iteration)
+        return self.json('POST', '/api/forms/question/create/', {
+            'question_text': 'Benchmark question %d from worker %d?' % (iteration, worker),
+            'user': candidate['id'],
+        }, candidate['token'])
+
+
+class QuestionRead(Workload):
+    name = 'question_read'
+    description = 'Staff paging through the question bank'
+    page_sizes = (20, 50, 100)
+
+    def request(self, worker, iteration):
+        page_size = self.page_sizes[(worker + iteration) % len(self.page_sizes)]
+        return (
+            'GET',
+            '/api/forms/question/list/?page_size=%d' % page_size,
+            None,
+            {'Authorization': 'Bearer ' + self.fixtures['admin_token']},
+        )
+
+
+class AnswerBurst(Workload):
+    name = 'answer_burst'
+    description = 'Candidates submitting answers in batches of ten'
+
+    def request(self, worker, iteration):
+        candidate = self.candidate(worker, iteration)
+        questions = self.fixtures['questions']
+        start = (iteration * 10) % len(questions)
+        return self.json('POST', '/api/forms/answer/submit/', {
+            'exam': 'bench-%s' % self.run_id,
+            'answers': [
+                {'question': question, 'response': 'ABCD'[(worker + index) % 4]}
+                for index, question in enumerate((questions * 2)[start:start + 10])
+            ],
+        }, candidate['token'])
+
+
+WORKLOADS = {
+    workload.name: workload
+    for workload in (LoginStorm, Registration, QuestionCreate, QuestionRead, AnswerBurst)
+}
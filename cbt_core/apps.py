@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CbtCoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cbt_core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .metrics import install_query_tracking
+        from .profiling import install_sql_capture
+        connection_created.connect(install_query_tracking)
+        connection_created.connect(install_sql_capture)
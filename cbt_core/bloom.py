@@ -0,0 +1,41 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    Fixed size set membership filter with no false negatives.
+
+    `capacity` items can be added before the false positive rate rises above
+    `error_rate`; callers rebuild a bigger filter once `count` passes it.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64 bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.size for index in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    @property
+    def is_full(self):
+        return self.count > self.capacity
@@ -0,0 +1,102 @@
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework.response import Response
+
+from .metrics import RESPONSE_CACHE
+
+_stats_lock = threading.Lock()
+# Hit and miss counters per cached view, for this process
+stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def _generation_key(model):
+    return 'generation:%s' % model._meta.label_lower
+
+
+def get_generations(models):
+    """ Current generation of each model, creating missing counters """
+    cache = get_cache()
+    # Start new counters from the clock so a counter that was evicted can
+    # never come back at a value older responses were cached under
+    return [
+        cache.get_or_set(_generation_key(model), time.time_ns, timeout=None)
+        for model in models
+    ]
+
+
+def generations_shared():
+    """
+    Whether every worker sees the same generation counters. They live in
+    the response cache, so not with a per-process backend such as local
+    memory: there a write on one worker never moves another's counters.
+    """
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def bump_generation(model):
+    cache = get_cache()
+    try:
+        cache.incr(_generation_key(model))
+    except ValueError:
+        cache.add(_generation_key(model), time.time_ns(), timeout=None)
+
+
+def invalidate(model):
+    """ Make every cached response built from `model` unreachable """
+    bump_generation(model)
+    # Bump again once the write is visible to other connections, so a read
+    # that raced the transaction can't keep stale data under the new value
+    transaction.on_commit(lambda: bump_generation(model))
+
+
+def _record(view_name, outcome):
+    with _stats_lock:
+        stats[view_name][outcome] += 1
+    RESPONSE_CACHE.labels(view_name, outcome).inc()
+
+
+def cache_response(*models, depends_on=None):
+    """
+    Cache the data of successful responses of a view handler.
+
+    Entries are keyed on the generation of every model the response is
+    built from plus the full request URI, so hits skip the ORM and the
+    serializer and writes invalidate by bumping a generation counter.
+    `depends_on(request)` can name more models for a given request, e.g.
+    the ones pulled in by ?expand=.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapped(view, request, *args, **kwargs):
+            view_name = view.__class__.__name__
+            sources = models + tuple(depends_on(request)) if depends_on else models
+            generations = '.'.join(str(generation) for generation in get_generations(sources))
+            uri = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+            key = 'response:%s:%s:%s' % (view_name, generations, uri)
+
+            cache = get_cache()
+            data = cache.get(key)
+            if data is not None:
+                _record(view_name, 'hits')
+                return Response(data)
+
+            _record(view_name, 'misses')
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data)
+            return response
+        return wrapped
+    return decorator
@@ -0,0 +1,53 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def conditional_response(version_func):
+    """
+    Answer conditional GETs of a view handler with 304 Not Modified.
+
+    `version_func(view, request, *args, **kwargs)` returns a cheap
+    `(version, last_modified)` pair describing the current state of the
+    resource, or `None` when there is nothing to compare against.
+    `last_modified` may be `None`, and must be for collections: their newest
+    update doesn't move when a row is deleted. The strong ETag covers the
+    version, the full path and the negotiated media type, so every
+    representation gets its own tag.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapped(view, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return handler(view, request, *args, **kwargs)
+            state = version_func(view, request, *args, **kwargs)
+            if state is None:
+                return handler(view, request, *args, **kwargs)
+
+            version, last_modified = state
+            etag = quote_etag(hashlib.sha1('|'.join((
+                str(version),
+                request.get_full_path(),
+                request.accepted_media_type or '',
+            )).encode()).hexdigest())
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            if timestamp is not None and timestamp >= int(time.time()):
+                # HTTP dates are whole seconds, so another change this second
+                # would still look unmodified; rely on the ETag until it passes
+                timestamp = None
+
+            response = get_conditional_response(
+                request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = handler(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response.headers.setdefault('ETag', etag)
+            if timestamp is not None:
+                response.headers.setdefault('Last-Modified', http_date(timestamp))
+            return response
+        return wrapped
+    return decorator
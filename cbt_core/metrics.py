@@ -0,0 +1,85 @@
+"""
+Prometheus metrics.
+
+Set PROMETHEUS_MULTIPROC_DIR in the environment of every worker process
+(before it starts) to a directory they share: each then writes its samples
+there and /metrics/ adds them up across workers. Empty the directory
+whenever the service restarts. Without it /metrics/ reports this process.
+"""
+import contextvars
+import os
+import time
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+
+REQUESTS = Counter(
+    'http_requests_total', 'Requests by URL name, method and status', ['view', 'method', 'status'])
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time to build the response, by URL name', ['view', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Response body size by URL name, streamed responses excluded', ['view'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304))
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per request by URL name', ['view'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250))
+REQUEST_DB_DURATION = Histogram(
+    'http_request_db_duration_seconds', 'Database time per request by URL name', ['view'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+PASSWORD_HASHING = Histogram(
+    'password_hashing_duration_seconds', 'Time to hash or check one password, by function', ['function'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+RESPONSE_CACHE = Counter(
+    'response_cache_requests_total', 'Response cache lookups by view and outcome', ['view', 'outcome'])
+
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+_request_queries = contextvars.ContextVar('request_queries', default=None)
+
+
+class QueryStats:
+    """ Queries run on behalf of one request, from any thread """
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+def start_request():
+    """ Count the queries of the current context (and the sync_to_async calls it makes) """
+    stats = QueryStats()
+    return stats, _request_queries.set(stats)
+
+
+def end_request(token):
+    _request_queries.reset(token)
+
+
+def track_queries(execute, sql, params, many, context):
+    """ Execute wrapper that adds every query to the current request's stats """
+    stats = _request_queries.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.count += 1
+        stats.duration += time.perf_counter() - started
+
+
+def install_query_tracking(sender, connection, **kwargs):
+    """ connection_created receiver """
+    if track_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_queries)
+
+
+def render():
+    """ Current metrics in the Prometheus text format """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
@@ -0,0 +1,138 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from .metrics import (
+    METHODS,
+    REQUEST_DB_DURATION,
+    REQUEST_DURATION,
+    REQUEST_QUERIES,
+    REQUESTS,
+    RESPONSE_SIZE,
+    end_request,
+    start_request,
+)
+from .profiling import Profile, is_sampled, is_staff
+
+
+class MetricsMiddleware:
+    """
+    Record the latency, response size, and database queries and time of
+    every request, labelled with its resolved URL name.
+
+    Works in both sync and async mode, so async views aren't pushed into a
+    thread. Place it first to time the rest of the middleware too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        stats, token = start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        self.record(request, response, started, stats)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        stats, token = start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        self.record(request, response, started, stats)
+        return response
+
+    def record(self, request, response, started, stats):
+        match = request.resolver_match
+        view = (match.view_name or match._func_path) if match else 'unresolved'
+        method = request.method if request.method in METHODS else 'other'
+        REQUEST_DURATION.labels(view, method).observe(time.perf_counter() - started)
+        REQUESTS.labels(view, method, response.status_code).inc()
+        if not response.streaming:
+            RESPONSE_SIZE.labels(view).observe(len(response.content))
+        REQUEST_QUERIES.labels(view).observe(stats.count)
+        REQUEST_DB_DURATION.labels(view).observe(stats.duration)
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests asked for by staff with an `X-Profile` header, and a
+    PROFILING_SAMPLE_RATE share of all requests; see cbt_core.profiling.
+
+    Only sync views are profiled, from process_view, in the thread that runs
+    them: cProfile sees one thread, and on an event loop it would time every
+    request interleaved with this one. A request that asked to be profiled
+    but wasn't, because its view is async or another request is being
+    profiled, says why in `X-Profile-Skipped`.
+
+    Place it last: process_view calls the view itself, so the process_view
+    of middleware after it would be skipped.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django would run a sync process_view in a thread for every request
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if is_sampled() or ('HTTP_X_PROFILE' in request.META and is_staff(request)):
+            request.profiling = None
+        return self.finish(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        if is_sampled() or ('HTTP_X_PROFILE' in request.META and await sync_to_async(is_staff)(request)):
+            request.profiling = None
+        return self.finish(request, await self.get_response(request))
+
+    def profile_view(self, request, view_func, view_args, view_kwargs):
+        if not hasattr(request, 'profiling'):
+            return None
+        if iscoroutinefunction(view_func):
+            request.profiling = 'async view; cProfile cannot follow a request across awaits'
+            return None
+        profile = Profile.start()
+        if profile is None:
+            request.profiling = 'another request is being profiled'
+            return None
+        request.profiling = profile
+        with profile:
+            response = view_func(request, *view_args, **view_kwargs)
+            # Rendering is part of the view's cost
+            if hasattr(response, 'render') and callable(response.render):
+                response = response.render()
+        profile.save(request, response)
+        return response
+
+    process_view = profile_view
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        if not hasattr(request, 'profiling') or iscoroutinefunction(view_func):
+            return self.profile_view(request, view_func, view_args, view_kwargs)
+        return await sync_to_async(self.profile_view)(request, view_func, view_args, view_kwargs)
+
+    def finish(self, request, response):
+        profiling = getattr(request, 'profiling', None)
+        if isinstance(profiling, Profile):
+            response['X-Profile-Id'] = profiling.id
+        elif profiling is not None:
+            response['X-Profile-Skipped'] = profiling
+        return response
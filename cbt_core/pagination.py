@@ -0,0 +1,136 @@
+import base64
+import binascii
+import datetime
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on a unique tuple of ordering fields.
+
+    The cursor is an opaque token holding the ordering values of the last row
+    of the current page, so every page is a single indexed range scan no
+    matter how deep the client pages.
+    """
+
+    # Must be unique and backed by a matching composite index
+    ordering = ('id',)
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """ Same as `paginate_queryset`, using the async ORM """
+        return self.set_page([row async for row in self.get_page_queryset(queryset, request)])
+
+    def get_page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.get_seek_filter(position))
+            except (DjangoValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # Fetch one extra row to find out whether there is a next page
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        position = [getattr(last, field.lstrip('-')) for field in self.ordering]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position))
+
+    def get_seek_filter(self, position):
+        """
+        Build `(a, b, ...) > (x, y, ...)` for the ordering fields.
+
+        The leading `a >= x` bound lets the database use the composite index
+        as a range scan instead of evaluating the OR for every row.
+        """
+        fields = [(field.lstrip('-'), field.startswith('-')) for field in self.ordering]
+        first, first_desc = fields[0]
+        seek = Q()
+        for index, (field, desc) in enumerate(fields):
+            condition = Q(**{'%s__%s' % (field, 'lt' if desc else 'gt'): position[index]})
+            for (previous, _), value in zip(fields[:index], position):
+                condition &= Q(**{previous: value})
+            seek |= condition
+        bound = Q(**{'%s__%s' % (first, 'lte' if first_desc else 'gte'): position[0]})
+        return bound & seek
+
+    def encode_cursor(self, position):
+        values = [
+            value.isoformat() if isinstance(value, (datetime.date, datetime.time)) else value
+            for value in position
+        ]
+        encoded = base64.urlsafe_b64encode(json.dumps(values).encode('ascii'))
+        return encoded.decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
@@ -0,0 +1,41 @@
+import codecs
+import csv
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """ Parse newline delimited JSON into a list of objects """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        rows = []
+        reader = codecs.getreader(encoding)(stream)
+        for number, line in enumerate(reader, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as exc:
+                raise ParseError('NDJSON parse error on line %d - %s' % (number, exc))
+        return rows
+
+
+class CSVParser(BaseParser):
+    """ Parse CSV with a header row into a list of dicts """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        reader = codecs.getreader(encoding)(stream)
+        try:
+            return list(csv.DictReader(reader))
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError('CSV parse error - %s' % exc)
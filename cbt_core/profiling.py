@@ -0,0 +1,157 @@
+"""
+On-demand request profiling.
+
+A request is profiled when a staff user sends an `X-Profile` header, or at
+random for PROFILING_SAMPLE_RATE of all requests. Its cProfile stats and
+every SQL query with its duration are saved to PROFILING_DIR, and the
+response carries the profile id in `X-Profile-Id`.
+
+Requests that aren't profiled pay for a header lookup and, per query, a
+context variable read. cProfile only sees the thread it is enabled in, so
+only sync views are profiled, around the view alone, in the thread that
+runs them; async views, whose work is spread over the event loop and
+sync_to_async threads, are answered with `X-Profile-Skipped` instead. Only
+one request per process is profiled at a time.
+"""
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+
+PROFILE_ID = re.compile(r'^[0-9]{8}T[0-9]{12}-[0-9a-f]{8}$')
+
+_request_sql = contextvars.ContextVar('request_sql', default=None)
+_lock = threading.Lock()
+
+
+def capture_sql(execute, sql, params, many, context):
+    """ Execute wrapper that records queries while a request is profiled """
+    queries = _request_sql.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries.append({'sql': sql, 'duration': time.perf_counter() - started})
+
+
+def install_sql_capture(sender, connection, **kwargs):
+    """ connection_created receiver """
+    if capture_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(capture_sql)
+
+
+def is_sampled():
+    return settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+def is_staff(request):
+    """ Authenticate the request the way the API does and check for staff """
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication_class().authenticate(request)
+        except APIException:
+            return False
+        if result is not None:
+            return result[0].is_staff
+    return False
+
+
+class Profile:
+    """ Profile of one request; use as a context manager around the view """
+
+    def __init__(self):
+        self.id = '%s-%s' % (timezone.now().strftime('%Y%m%dT%H%M%S%f'), uuid.uuid4().hex[:8])
+        self.profiler = cProfile.Profile()
+        self.queries = []
+
+    @classmethod
+    def start(cls):
+        """ A new profile, or None if this process is already profiling a request """
+        if not _lock.acquire(blocking=False):
+            return None
+        return cls()
+
+    def __enter__(self):
+        self.started_at = timezone.now()
+        self.token = _request_sql.set(self.queries)
+        self.started = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.disable()
+        self.duration = time.perf_counter() - self.started
+        _request_sql.reset(self.token)
+        _lock.release()
+
+    def save(self, request, response):
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        path = os.path.join(settings.PROFILING_DIR, self.id)
+        self.profiler.dump_stats(path + '.prof')
+
+        report = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=report)
+        stats.sort_stats('cumulative').print_stats(settings.PROFILING_TOP_FUNCTIONS)
+        match = request.resolver_match
+        user = getattr(request, 'user', None)
+        with open(path + '.json', 'w') as file:
+            json.dump({
+                'id': self.id,
+                'method': request.method,
+                'path': request.get_full_path(),
+                'view': match.view_name if match else None,
+                'user': user.pk if user is not None and user.is_authenticated else None,
+                'status': response.status_code,
+                'started_at': self.started_at.isoformat(),
+                'duration': self.duration,
+                'query_count': len(self.queries),
+                'query_duration': sum(query['duration'] for query in self.queries),
+                'queries': self.queries,
+                'functions': report.getvalue(),
+            }, file)
+        prune()
+
+
+def prune():
+    """ Keep the newest PROFILING_KEEP profiles """
+    ids = list_profiles()
+    for profile_id in ids[settings.PROFILING_KEEP:]:
+        for extension in ('.json', '.prof'):
+            try:
+                os.unlink(os.path.join(settings.PROFILING_DIR, profile_id + extension))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles():
+    """ Ids of the stored profiles, newest first """
+    try:
+        names = os.listdir(settings.PROFILING_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        (name[:-5] for name in names if name.endswith('.json') and PROFILE_ID.match(name[:-5])),
+        reverse=True,
+    )
+
+
+def profile_path(profile_id, extension):
+    """ Path of a stored profile's file, or None """
+    if not PROFILE_ID.match(profile_id):
+        return None
+    path = os.path.join(settings.PROFILING_DIR, profile_id + extension)
+    return path if os.path.exists(path) else None
@@ -0,0 +1,108 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+class SparseFieldsetSerializer(serializers.ModelSerializer):
+    """
+    Model serializer that renders only the fields asked for with `?fields=`.
+
+    `?fields=id,email` picks fields out of Meta.fields, which must be a
+    tuple; without the parameter every field is rendered. The request comes
+    from the serializer context. Views pass their queryset through `only()`
+    so the columns nobody reads aren't fetched either.
+
+    `?expand=` names relations from `expandable` to side-load: the field
+    keeps its id and the related objects are serialized once each into an
+    `included` map the view adds to the response, see `included()`.
+    """
+
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+    # {field: (included key, serializer class)} for ?expand=
+    expandable = {}
+
+    @classmethod
+    def requested_fields(cls, request):
+        """ Names picked by the request in Meta.fields order, all of them by default """
+        allowed = cls.Meta.fields
+        value = request.query_params.get(cls.fields_query_param) if request is not None else None
+        if value is None:
+            return allowed
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = sorted(names.difference(allowed))
+        if not names or unknown:
+            raise serializers.ValidationError({cls.fields_query_param: [
+                'Unknown fields: %s. Choose from: %s.' % (', '.join(unknown) or '(none)', ', '.join(allowed))
+            ]})
+        return tuple(name for name in allowed if name in names)
+
+    @classmethod
+    def requested_expansions(cls, request):
+        """ Relations the request asks to side-load, in `expandable` order """
+        value = request.query_params.get(cls.expand_query_param) if request is not None else None
+        if not value:
+            return ()
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = sorted(names.difference(cls.expandable))
+        if unknown:
+            raise serializers.ValidationError({cls.expand_query_param: [
+                'Cannot expand: %s. Choose from: %s.' % (
+                    ', '.join(unknown), ', '.join(cls.expandable) or '(none)')
+            ]})
+        return tuple(name for name in cls.expandable if name in names)
+
+    @classmethod
+    def only(cls, queryset, request, *extra):
+        """
+        Restrict `queryset` to the columns the requested fields read.
+
+        `extra` names columns needed besides, e.g. the pagination ordering.
+        Expanded relations are joined in with just the columns their
+        serializer renders. Many-to-many and computed fields are left to the
+        caller, see `selects`.
+        """
+        opts = queryset.model._meta
+        columns = {opts.pk.name, *extra}
+        for name in cls.requested_expansions(request):
+            serializer_class = cls.expandable[name][1]
+            columns.add(name)
+            columns.update('%s__%s' % (name, field) for field in serializer_class.Meta.fields)
+            queryset = queryset.select_related(name)
+        for name in cls.requested_fields(request):
+            declared = cls._declared_fields.get(name)
+            source = getattr(declared, 'source', None) or name
+            try:
+                field = opts.get_field(source)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.many_to_many:
+                columns.add(field.name)
+        return queryset.only(*columns)
+
+    @classmethod
+    def selects(cls, request, name):
+        """ Whether the request renders field `name` """
+        return name in cls.requested_fields(request)
+
+    @classmethod
+    def included(cls, instances, request):
+        """
+        `{key: {id: data}}` of the expanded related objects of `instances`,
+        each serialized once however many instances point at it; empty
+        without ?expand=.
+        """
+        included = {}
+        for name in cls.requested_expansions(request):
+            key, serializer_class = cls.expandable[name]
+            related = {}
+            for instance in instances:
+                value = getattr(instance, name)
+                if value is not None and value.pk not in related:
+                    related[value.pk] = value
+            included[key] = {str(pk): serializer_class(value).data for pk, value in related.items()}
+        return included
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = self.requested_fields(self.context.get('request'))
+        return {name: field for name, field in fields.items() if name in selected}
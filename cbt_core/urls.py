@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import ProfileDetailView, ProfileListView, ProfileStatsView
+
+
+urlpatterns = [
+    path('profiles/', ProfileListView.as_view(), name='profile_list'),
+    path('profiles/<str:profile_id>/', ProfileDetailView.as_view(), name='profile_detail'),
+    path('profiles/<str:profile_id>/pstats/', ProfileStatsView.as_view(), name='profile_stats'),
+]
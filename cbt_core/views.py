@@ -1,3 +1,175 @@
-from django.shortcuts import render
+import inspect
+import json
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views import View
+from prometheus_client import CONTENT_TYPE_LATEST
+from rest_framework import exceptions, status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from .metrics import render
+from .profiling import list_profiles, profile_path
+
+
+class DataJsonResponse(JsonResponse):
+    """ JsonResponse that keeps its data around, like DRF's Response """
+
+    def __init__(self, data, **kwargs):
+        super().__init__(data, safe=False, **kwargs)
+        self.data = data
+
+
+class AsyncAPIView(View):
+    """
+    Small async counterpart of DRF's APIView.
+
+    Handlers are coroutines that return a `DataJsonResponse`; DRF exceptions
+    raised from them are rendered the way DRF's exception handler would.
+    Authenticators may provide an `aauthenticate` coroutine and permissions
+    may return an awaitable from `has_permission`; anything else is run as
+    is, so sync permission checks must not do I/O.
+    """
+
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = ()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Token authenticated API, like every DRF view
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Lets DRF paginators and serializers read the plain HttpRequest
+        request.query_params = request.GET
+        try:
+            await self.perform_authentication(request)
+            await self.check_permissions(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    async def http_method_not_allowed(self, request, *args, **kwargs):
+        raise exceptions.MethodNotAllowed(request.method)
+
+    def get_authenticators(self):
+        return [auth() for auth in self.authentication_classes]
+
+    async def perform_authentication(self, request):
+        request.user = AnonymousUser()
+        request.auth = None
+        self.authenticator = None
+        for authenticator in self.get_authenticators():
+            if hasattr(authenticator, 'aauthenticate'):
+                result = await authenticator.aauthenticate(request)
+            else:
+                result = await sync_to_async(authenticator.authenticate)(request)
+            if result is not None:
+                request.user, request.auth = result
+                self.authenticator = authenticator
+                return
+
+    async def check_permissions(self, request):
+        for permission in [permission() for permission in self.permission_classes]:
+            allowed = permission.has_permission(request, self)
+            if inspect.isawaitable(allowed):
+                allowed = await allowed
+            if not allowed:
+                if request.auth is None and self.authentication_classes:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    def get_authenticate_header(self, request):
+        authenticators = self.get_authenticators()
+        if authenticators:
+            return authenticators[0].authenticate_header(request)
+
+    def handle_exception(self, exc):
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {'detail': exc.detail}
+        response = DataJsonResponse(data, status=exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            header = self.get_authenticate_header(self.request)
+            if header:
+                response['WWW-Authenticate'] = header
+            else:
+                response.status_code = status.HTTP_403_FORBIDDEN
+        if getattr(exc, 'wait', None):
+            response['Retry-After'] = '%d' % exc.wait
+        return response
+
+    def parse_data(self, request):
+        """ Request body as a dict, from JSON or form data """
+        if request.content_type in ('multipart/form-data', 'application/x-www-form-urlencoded'):
+            return request.POST.dict()
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError as exc:
+            raise exceptions.ParseError('JSON parse error - %s' % exc)
+        if not isinstance(data, dict):
+            raise exceptions.ParseError('Expected a JSON object.')
+        return data
+
+    def respond(self, data, status=status.HTTP_200_OK):
+        return DataJsonResponse(data, status=status)
+
+
+def metrics(request):
+    """ Prometheus scrape endpoint, guarded by METRICS_BEARER_TOKEN when it is set """
+    token = settings.METRICS_BEARER_TOKEN
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), 'Bearer ' + token):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED, headers={'WWW-Authenticate': 'Bearer'})
+    return HttpResponse(render(), content_type=CONTENT_TYPE_LATEST)
+
+
+class ProfileListView(APIView):
+    """ Stored request profiles, newest first """
+
+    permission_classes = (IsAdminUser,)
+    summary_fields = ('id', 'method', 'path', 'view', 'status', 'started_at', 'duration', 'query_count')
+
+    def get(self, request):
+        profiles = []
+        for profile_id in list_profiles():
+            path = profile_path(profile_id, '.json')
+            if path is None:
+                continue
+            with open(path) as file:
+                profile = json.load(file)
+            profiles.append({field: profile.get(field) for field in self.summary_fields})
+        return Response({'results': profiles})
+
+
+class ProfileDetailView(APIView):
+    """ A stored profile with its SQL and function summary """
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, profile_id):
+        path = profile_path(profile_id, '.json')
+        if path is None:
+            raise exceptions.NotFound()
+        with open(path) as file:
+            return Response(json.load(file))
+
+
+class ProfileStatsView(APIView):
+    """ The raw cProfile stats of a profile, for pstats or snakeviz """
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, profile_id):
+        path = profile_path(profile_id, '.prof')
+        if path is None:
+            raise exceptions.NotFound()
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=profile_id + '.prof')
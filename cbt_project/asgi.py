@@ -14,9 +14,17 @@ from channels.routing import ProtocolTypeRouter, URLRouter
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cbt_project.settings')
 
+# Set up Django before importing anything that touches models
+django_asgi_app = get_asgi_application()
+
+from accounts.middleware import TokenAuthMiddleware  # noqa: E402
+from cbtforms.routing import websocket_urlpatterns  # noqa: E402
+from cbtforms.submissions import answer_queue  # noqa: E402
+
+# Write the answers a crashed predecessor left in the spool
+answer_queue.resume()
+
 application = ProtocolTypeRouter({
-    'http': get_asgi_application(),
-    'websocket': URLRouter([]),  # We'll add WebSocket routing later
+    'http': django_asgi_app,
+    'websocket': TokenAuthMiddleware(URLRouter(websocket_urlpatterns)),
 })
-
-# 
@@ -27,7 +27,8 @@ SECRET_KEY = 'django-insecure-8y-%ehx9lhahs2@slim3(@%7c!glq_5)8o1u=1zzpa!xp=t5*l
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.environ.get('DEBUG', False)
 
-ALLOWED_HOSTS = []
+# Comma separated, e.g. "api.example.com,localhost"
+ALLOWED_HOSTS = [host for host in os.environ.get('ALLOWED_HOSTS', '').split(',') if host]
 
 # Custom user
 AUTH_USER_MODEL = 'accounts.User'
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
@@ -52,6 +54,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'cbt_core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,6 +62,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Last, see its docstring
+    'cbt_core.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'cbt_project.urls'
@@ -94,18 +99,89 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Cached API responses. Local memory is per worker process and evicts the
+    # least recently used entries past MAX_ENTRIES; with several workers use
+    # a shared backend (e.g. django.core.cache.backends.redis.RedisCache) so
+    # invalidation reaches every worker; question lists only answer
+    # conditional GETs with a shared backend.
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+    # Per-process access flags of authenticated users. The timeout bounds how
+    # long a deactivated user keeps access on other workers.
+    'token_users': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'token_users',
+        'TIMEOUT': 30,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+RESPONSE_CACHE_ALIAS = 'responses'
+TOKEN_USER_CACHE_ALIAS = 'token_users'
+
 # Config for restframework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.StatelessJWTAuthentication',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'cbt_core.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
+# Rows fetched per round trip by the streaming question export
+QUESTION_EXPORT_CHUNK_SIZE = 2000
+
+# Question search queries up to this many characters also match fuzzily
+# against question_text by trigram word similarity
+QUESTION_SEARCH_FUZZY_MAX_LENGTH = 32
+
+# Rows per INSERT statement for the bulk question import
+QUESTION_IMPORT_BATCH_SIZE = 1000
+
+# Roster import: users per INSERT, hashing processes of the import_roster
+# command (None means one per core; the API uses the password hashing
+# executor) and the roster size below which passwords are hashed inline
+ROSTER_IMPORT_BATCH_SIZE = 1000
+ROSTER_IMPORT_WORKERS = None
+ROSTER_IMPORT_POOL_THRESHOLD = 64
+
 
 SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.serializers.TokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.TokenRefreshSerializer',
 }
 
+# In-process Bloom filter of blacklisted refresh tokens: sized for CAPACITY
+# live entries at ERROR_RATE false positives, and synced with the blacklist
+# table every SYNC_INTERVAL seconds (the longest a token revoked by another
+# worker is still accepted by this one). Each sync re-reads the last
+# SYNC_OVERLAP seconds for rows that committed late, and the filter is
+# rebuilt every REBUILD_INTERVAL seconds for anything slower still.
+TOKEN_BLACKLIST_FILTER_CAPACITY = 100000
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = 0.001
+TOKEN_BLACKLIST_SYNC_INTERVAL = 5
+TOKEN_BLACKLIST_SYNC_OVERLAP = 60
+TOKEN_BLACKLIST_REBUILD_INTERVAL = 600
+
+# Users per INSERT ... SELECT when revoking every session of a cohort
+TOKEN_REVOKE_BATCH_SIZE = 1000
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -125,6 +201,83 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+PASSWORD_HASHERS = [
+    'accounts.hashers.TunedArgon2PasswordHasher',
+    # Still verifies hashes made before the switch to Argon2
+    'accounts.hashers.TimedPBKDF2PasswordHasher',
+]
+
+# Argon2id costs (OWASP minimum: 19 MiB, 2 passes, 1 lane)
+ARGON2_TIME_COST = 2
+ARGON2_MEMORY_COST = 19456
+ARGON2_PARALLELISM = 1
+
+# Login and registration hash passwords on a 'thread' or 'process' pool of
+# PASSWORD_HASHING_WORKERS (None means one per core). Past MAX_QUEUE waiting
+# hashes, further requests get 503 instead of queueing.
+PASSWORD_HASHING_EXECUTOR = 'thread'
+PASSWORD_HASHING_WORKERS = None
+PASSWORD_HASHING_MAX_QUEUE = 64
+
+# Answers sent over exam session websockets are written in one INSERT every
+# ANSWER_FLUSH_INTERVAL seconds, or as soon as ANSWER_FLUSH_SIZE are waiting
+ANSWER_FLUSH_INTERVAL = 0.5
+ANSWER_FLUSH_SIZE = 500
+
+# Answers submitted over HTTP are queued in memory and appended to a spool
+# file in ANSWER_SPOOL_DIR, then written every ANSWER_QUEUE_FLUSH_INTERVAL
+# seconds in INSERTs of ANSWER_QUEUE_BATCH_SIZE. Past ANSWER_QUEUE_SIZE
+# waiting answers submissions get 503. The spool survives a crashed process;
+# set ANSWER_SPOOL_FSYNC to also survive a crashed machine, at the cost of
+# an fsync per submission.
+ANSWER_QUEUE_SIZE = 100000
+ANSWER_QUEUE_BATCH_SIZE = 1000
+ANSWER_QUEUE_FLUSH_INTERVAL = 1
+ANSWER_SPOOL_DIR = os.environ.get('ANSWER_SPOOL_DIR', str(BASE_DIR / 'var' / 'answer-spool'))
+ANSWER_SPOOL_FSYNC = False
+
+# Grading reads a sitting's answers FETCH_SIZE rows at a time and upserts
+# results WRITE_BATCH_SIZE per INSERT
+GRADING_FETCH_SIZE = 50000
+GRADING_WRITE_BATCH_SIZE = 5000
+
+# Rows per COPY when seeding synthetic data (manage.py seed_data)
+SEED_COPY_BATCH_SIZE = 50000
+
+# Keep item statistics current as answers are written. The update locks the
+# sitting's statistics, so concurrent answer flushes for one exam take turns.
+ITEM_STATISTICS_INCREMENTAL = True
+
+# Keys the seeds candidates' exam forms are derived from. Changing it
+# reshuffles every form, including those of exams in progress.
+FORM_ASSEMBLY_SECRET = os.environ.get('FORM_ASSEMBLY_SECRET', SECRET_KEY)
+
+# Adaptive testing: ability grid (start, stop, points), 'eap' or 'mle'
+# estimation, stopping rules, and how many of the most informative items
+# the next one is drawn from at random, to limit their exposure. Each
+# process checks the bank for changes at most every CAT_BANK_CHECK_INTERVAL
+# seconds, so a recalibrated item is picked up within about that long.
+CAT_THETA_GRID = (-4, 4, 81)
+CAT_ESTIMATOR = 'eap'
+CAT_MIN_ITEMS = 5
+CAT_MAX_ITEMS = 30
+CAT_TARGET_SE = 0.3
+CAT_RANDOMESQUE = 5
+CAT_BANK_CHECK_INTERVAL = 30
+
+# Bearer token Prometheus must send to scrape /metrics/; unset leaves it open
+# (restrict it at the proxy then). See cbt_core.metrics for multi-process
+# workers.
+METRICS_BEARER_TOKEN = os.environ.get('METRICS_BEARER_TOKEN')
+
+# Request profiling (see cbt_core.profiling): share of requests profiled at
+# random on top of those staff ask for, where profiles are kept, how many,
+# and how many functions their summaries list
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_DIR = os.environ.get('PROFILING_DIR', str(BASE_DIR / 'var' / 'profiles'))
+PROFILING_KEEP = 200
+PROFILING_TOP_FUNCTIONS = 40
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
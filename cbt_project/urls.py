@@ -1,10 +1,16 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from cbt_core.views import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     # Include the 'accounts' app URLs under the /api/accounts/ path
     path('api/accounts/', include('accounts.urls')),
     # include the form questions here
     path('api/forms/', include('cbtforms.urls')),
+    # Request profiles, for staff
+    path('api/core/', include('cbt_core.urls')),
+    # Prometheus scrape endpoint
+    path('metrics/', metrics, name='metrics'),
 ]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cbt_project.settings')
 
 application = get_wsgi_application()
+
+from cbtforms.submissions import answer_queue  # noqa: E402
+
+# Write the answers a crashed predecessor left in the spool
+answer_queue.resume()
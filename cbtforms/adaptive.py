@@ -0,0 +1,200 @@
+"""
+Computerized adaptive testing under the 3PL (or 2PL) IRT model.
+
+The calibrated bank is loaded by each process into tables over a grid of
+ability values: log probabilities of a correct and an incorrect response
+and Fisher information, one row per grid point. Estimating ability is then
+a couple of small matrix products, and choosing the next item a scan of one
+contiguous row, however large the bank.
+
+Each process checks the bank's version in the database at most every
+CAT_BANK_CHECK_INTERVAL seconds and rebuilds the tables on a background
+thread when it changed, serving the previous bank meanwhile.
+"""
+import logging
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max
+
+from .assembly import form_seed
+from .models import Question
+
+logger = logging.getLogger(__name__)
+
+
+def calibrated_questions():
+    return Question.objects.filter(answer_key__isnull=False, irt_a__isnull=False)
+
+
+def bank_version():
+    """
+    How many calibrated questions there are and when the newest of them
+    changed: saving, calibrating, uncalibrating or deleting one changes it,
+    in whichever process it happens
+    """
+    version = calibrated_questions().aggregate(count=Count('pk'), updated_at=Max('updated_at'))
+    return version['count'], version['updated_at']
+
+
+class ItemBank:
+
+    def __init__(self, ids, keys, a, b, c):
+        self.ids = ids
+        self.index = {pk: column for column, pk in enumerate(ids.tolist())}
+        self.keys = keys
+        start, stop, points = settings.CAT_THETA_GRID
+        self.theta = np.linspace(start, stop, points)
+        # Standard normal prior, unnormalized
+        self.log_prior = -self.theta ** 2 / 2
+
+        # Tables are grid points × items, so each grid point is one row.
+        # Logs are taken of the logistic, not of p: for a steep item p
+        # rounds to 0 or 1 and log(p) to -inf, which times a zero credit
+        # makes the likelihood NaN
+        z = a * (self.theta[:, None] - b)
+        log_logistic = -np.logaddexp(0, -z)
+        log_complement = -np.logaddexp(0, z)
+        with np.errstate(divide='ignore'):
+            # log(c + (1 - c) σ), c = 0 included
+            self.log_p = np.logaddexp(np.log(c), np.log1p(-c) + log_logistic)
+        self.log_q = np.log1p(-c) + log_complement
+        logistic = np.exp(log_logistic)
+        p = np.exp(self.log_p)
+        # a² (1 - p) / p ((p - c) / (1 - c))², with σ / p = 1 where both are 0
+        ratio = np.divide(logistic, p, out=np.ones_like(p), where=p > 0)
+        self.information = (a ** 2 * (1 - c) * np.exp(log_complement) * logistic * ratio).astype(np.float32)
+
+    @classmethod
+    def load(cls):
+        rows = list(
+            calibrated_questions().order_by('pk').values_list('pk', 'answer_key', 'irt_a', 'irt_b', 'irt_c'))
+        return cls(
+            np.array([row[0] for row in rows], dtype=np.int64),
+            [row[1] for row in rows],
+            np.array([row[2] for row in rows]),
+            np.array([row[3] or 0 for row in rows]),
+            np.array([row[4] or 0 for row in rows]),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def estimate(self, columns, credits):
+        """
+        Ability and its standard error after the given responses, with credit
+        from 0 to 1 treated as the proportion correct. Expected a posteriori
+        by default; CAT_ESTIMATOR = 'mle' uses the maximum likelihood on the
+        grid instead, falling back to EAP while it is unbounded (all right or
+        all wrong so far).
+        """
+        credits = np.asarray(credits, dtype=float)
+        log_likelihood = self.log_p[:, columns] @ credits + self.log_q[:, columns] @ (1 - credits)
+
+        if settings.CAT_ESTIMATOR == 'mle' and 0 < credits.sum() < len(credits):
+            point = int(np.argmax(log_likelihood))
+            information = float(self.information[point, columns].sum())
+            return float(self.theta[point]), (1 / np.sqrt(information) if information > 0 else None)
+
+        log_posterior = log_likelihood + self.log_prior
+        weights = np.exp(log_posterior - log_posterior.max())
+        weights /= weights.sum()
+        theta = float(weights @ self.theta)
+        return theta, float(np.sqrt(weights @ (self.theta - theta) ** 2))
+
+    def select(self, theta, exclude, generator):
+        """
+        Column of the next item: one of the CAT_RANDOMESQUE most informative
+        at `theta`, at random, so the very best items aren't given to every
+        candidate of similar ability.
+        """
+        point = int(np.abs(self.theta - theta).argmin())
+        information = self.information[point].copy()
+        information[exclude] = -np.inf
+        available = len(information) - len(set(exclude))
+        if available <= 0:
+            return None
+        top = min(settings.CAT_RANDOMESQUE, available)
+        best = np.argpartition(information, -top)[-top:]
+        return int(generator.choice(best[np.isfinite(information[best])]))
+
+    def credit(self, column, response):
+        return self.keys[column].get(response, 0)
+
+
+_lock = threading.Lock()
+# (version, bank), when it was last checked, and whether a thread is at it
+_bank = (None, None)
+_checked = None
+_refreshing = False
+
+
+def refresh_bank():
+    """ Check the bank's version now and reload it if it changed; returns the bank """
+    global _bank, _checked
+    version = bank_version()
+    if version != _bank[0]:
+        _bank = (version, ItemBank.load())
+    _checked = time.monotonic()
+    return _bank[1]
+
+
+def _refresh_in_background():
+    global _checked, _refreshing
+    try:
+        refresh_bank()
+    except Exception:
+        logger.exception('Failed to refresh the item bank, will retry')
+        _checked = time.monotonic()
+    finally:
+        connection.close()
+        with _lock:
+            _refreshing = False
+
+
+def get_bank():
+    """
+    The calibrated item bank. Only the first call in a process loads it on
+    the request path; later ones start a background refresh when the last
+    check is more than CAT_BANK_CHECK_INTERVAL seconds old and return the
+    bank they have.
+    """
+    global _refreshing
+    bank = _bank[1]
+    if bank is None:
+        with _lock:
+            if _bank[1] is None:
+                refresh_bank()
+            return _bank[1]
+    if time.monotonic() - _checked >= settings.CAT_BANK_CHECK_INTERVAL:
+        with _lock:
+            if not _refreshing and time.monotonic() - _checked >= settings.CAT_BANK_CHECK_INTERVAL:
+                _refreshing = True
+                threading.Thread(target=_refresh_in_background, name='item-bank-refresh', daemon=True).start()
+    return bank
+
+
+def next_item(bank, exam, user_id, answers):
+    """
+    Where a candidate stands after `answers`, a list of (question_id, response).
+
+    Returns (question_id or None once the test is over, theta, standard
+    error). The test ends after CAT_MAX_ITEMS answers, or once at least
+    CAT_MIN_ITEMS are answered and the standard error is CAT_TARGET_SE or
+    less. The choice is seeded from the candidate and the number answered,
+    so asking again without answering returns the same item.
+    """
+    columns = [bank.index[pk] for pk, _ in answers if pk in bank.index]
+    credits = [bank.credit(bank.index[pk], response) for pk, response in answers if pk in bank.index]
+    theta, error = bank.estimate(columns, credits)
+
+    finished = len(answers) >= settings.CAT_MAX_ITEMS or (
+        len(columns) >= settings.CAT_MIN_ITEMS and error is not None and error <= settings.CAT_TARGET_SE)
+    if finished:
+        return None, theta, error
+    generator = np.random.default_rng([form_seed(exam, user_id), len(answers)])
+    column = bank.select(theta, columns, generator)
+    return (None if column is None else int(bank.ids[column])), theta, error
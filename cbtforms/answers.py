@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import weakref
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+
+from accounts.models import User
+from .models import Answer, Question
+from .statistics import apply_answers, lock_form
+
+logger = logging.getLogger(__name__)
+
+# A row is only replaced by an answer given at the same time or later, so a
+# batch replayed from the spool or a slow flush can't undo a newer answer
+UPSERT_SQL = '''
+    INSERT INTO {answer} ({exam}, {question}, {user}, {response}, {answered_at})
+    SELECT * FROM UNNEST(%s::varchar[], %s::bigint[], %s::bigint[], %s::varchar[], %s::timestamptz[])
+    ON CONFLICT ({exam}, {user}, {question}) DO UPDATE
+    SET {response} = EXCLUDED.{response}, {answered_at} = EXCLUDED.{answered_at}
+    WHERE {answer}.{answered_at} <= EXCLUDED.{answered_at}
+'''
+
+
+def _upsert_sql():
+    quote = connection.ops.quote_name
+    fields = ('exam', 'question', 'user', 'response', 'answered_at')
+    return UPSERT_SQL.format(
+        answer=quote(Answer._meta.db_table),
+        **{name: quote(Answer._meta.get_field(name).column) for name in fields},
+    )
+
+
+def _newer(answers):
+    """ The answers that are at least as new as the stored ones they replace """
+    stored = {}
+    for exam in {answer.exam for answer in answers}:
+        rows = Answer.objects.filter(
+            exam=exam, user_id__in={answer.user_id for answer in answers if answer.exam == exam},
+        ).values_list('user_id', 'question_id', 'answered_at')
+        stored.update(((exam, user_id, question_id), answered_at) for user_id, question_id, answered_at in rows)
+    return [
+        answer for answer in answers
+        if stored.get((answer.exam, answer.user_id, answer.question_id), answer.answered_at) <= answer.answered_at
+    ]
+
+
+def write_answers(answers, batch_size=None):
+    """
+    Upsert answers and return the ones accepted.
+
+    Of several answers to the same question by the same candidate the one
+    given last wins, whichever order they arrive in: an answer older than
+    the stored one is accepted but changes nothing. Answers whose question
+    or user no longer exists are dropped instead of failing the whole INSERT
+    on the foreign key. The item statistics of their sittings are updated
+    in the same transaction.
+    """
+    latest = {}
+    for answer in answers:
+        key = (answer.exam, answer.user_id, answer.question_id)
+        if key not in latest or latest[key].answered_at <= answer.answered_at:
+            latest[key] = answer
+    questions = set(Question.objects.filter(
+        pk__in={answer.question_id for answer in latest.values()}).values_list('pk', flat=True))
+    users = set(User.objects.filter(
+        pk__in={answer.user_id for answer in latest.values()}).values_list('pk', flat=True))
+    valid = [
+        answer for answer in latest.values()
+        if answer.question_id in questions and answer.user_id in users
+    ]
+    batch_size = batch_size or max(len(valid), 1)
+    sql = _upsert_sql()
+    with transaction.atomic():
+        if settings.ITEM_STATISTICS_INCREMENTAL:
+            # The sittings' locks keep the stored answers from changing
+            # between reading them here and writing over them
+            for exam in sorted({answer.exam for answer in valid}):
+                lock_form(exam)
+            apply_answers(_newer(valid))
+        with connection.cursor() as cursor:
+            for start in range(0, len(valid), batch_size):
+                batch = valid[start:start + batch_size]
+                cursor.execute(sql, [
+                    [answer.exam for answer in batch],
+                    [answer.question_id for answer in batch],
+                    [answer.user_id for answer in batch],
+                    [answer.response for answer in batch],
+                    [answer.answered_at for answer in batch],
+                ])
+    return valid
+
+
+class AnswerBuffer:
+    """
+    Collect answers from every exam session on this event loop and write them
+    in batches.
+
+    Answers are keyed by (exam, user, question), so a candidate changing their
+    mind before a flush costs no extra row. A flush runs every
+    ANSWER_FLUSH_INTERVAL seconds, or straight away once ANSWER_FLUSH_SIZE
+    answers are waiting, and upserts the whole batch with one INSERT.
+
+    `add` returns a future that resolves once the answer is written: to None,
+    or to a dict of errors if it was rejected. Writes go through
+    database_sync_to_async, which closes stale connections around them like
+    a request would, since a long-lived loop never gets request_finished.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.lock = asyncio.Lock()
+        self.flusher = None
+
+    def add(self, answer):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (answer.exam, answer.user_id, answer.question_id)
+        futures = self.pending.pop(key, (None, []))[1]
+        futures.append(future)
+        self.pending[key] = (answer, futures)
+
+        if self.flusher is None or self.flusher.done():
+            self.flusher = loop.create_task(self.run())
+        if len(self.pending) >= settings.ANSWER_FLUSH_SIZE:
+            loop.create_task(self.flush())
+        return future
+
+    async def run(self):
+        # Stops once nothing is waiting; the next `add` starts it again
+        while self.pending:
+            await asyncio.sleep(settings.ANSWER_FLUSH_INTERVAL)
+            await self.flush()
+
+    async def flush(self):
+        async with self.lock:
+            batch, self.pending = self.pending, {}
+            if not batch:
+                return
+            entries = list(batch.values())
+            try:
+                written = {id(answer) for answer in await database_sync_to_async(write_answers)(
+                    [answer for answer, _ in entries])}
+            except Exception:
+                logger.exception('Failed to write %d answers', len(entries))
+                results = [{'non_field_errors': ['Answer could not be saved, send it again.']}] * len(entries)
+            else:
+                results = [
+                    None if id(answer) in written else {'question': ['Question does not exist.']}
+                    for answer, _ in entries
+                ]
+
+        for (_, futures), result in zip(entries, results):
+            for future in futures:
+                if not future.done():
+                    future.set_result(result)
+
+
+# One buffer per event loop: its lock, futures and flush task belong to it
+_buffers = weakref.WeakKeyDictionary()
+
+
+def get_answer_buffer():
+    loop = asyncio.get_running_loop()
+    if loop not in _buffers:
+        _buffers[loop] = AnswerBuffer()
+    return _buffers[loop]
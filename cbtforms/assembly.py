@@ -0,0 +1,172 @@
+"""
+Per-candidate exam forms that are derived, never stored.
+
+A blueprint is solved once into a fixed pool of questions per section. A
+candidate's form is then a pure function of the pools and a seed derived
+from (exam, candidate): a sample of each section's pool, shuffled, with
+each question's options shuffled too. Any server can rebuild a form on
+demand and will get the same one.
+"""
+import collections
+import hashlib
+import hmac
+import random
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework import serializers
+
+from .models import Blueprint, Question
+
+
+def _matches(section, topic, difficulty):
+    return (
+        section.get('topic') in (None, topic)
+        and section.get('difficulty') in (None, difficulty)
+    )
+
+
+def _allocate(counts, sizes):
+    """
+    How many questions each group gives each section: `sizes` maps a group,
+    the tuple of sections its questions match, to its number of questions.
+
+    A maximum flow from the groups through the sections to their counts,
+    found by augmenting paths, so a section is only short if no way of
+    sharing the questions out fills it. There are only as many groups as
+    topic and difficulty combinations, however many questions.
+    """
+    flow = {(group, index): 0 for group in sizes for index in group}
+    given = dict.fromkeys(sizes, 0)
+    taken = [0] * len(counts)
+    while True:
+        # Breadth first from groups with questions to spare to a short
+        # section, stepping back from a section to a group it already takes
+        # questions from
+        parent = {('group', group): None for group in sizes if given[group] < sizes[group]}
+        queue = collections.deque(parent)
+        end = None
+        while queue:
+            node = queue.popleft()
+            kind, key = node
+            if kind == 'group':
+                steps = [('section', index) for index in key]
+            elif taken[key] < counts[key]:
+                end = node
+                break
+            else:
+                steps = [('group', group) for group in sizes if key in group and flow[group, key]]
+            for step in steps:
+                if step not in parent:
+                    parent[step] = node
+                    queue.append(step)
+        if end is None:
+            return flow
+
+        path = [end]
+        while parent[path[-1]] is not None:
+            path.append(parent[path[-1]])
+        path.reverse()
+        start = path[0][1]
+        amount = min(sizes[start] - given[start], counts[end[1]] - taken[end[1]])
+        for source, target in zip(path, path[1:]):
+            if source[0] == 'section':
+                amount = min(amount, flow[target[1], source[1]])
+        for source, target in zip(path, path[1:]):
+            if source[0] == 'group':
+                flow[source[1], target[1]] += amount
+            else:
+                flow[target[1], source[1]] -= amount
+        given[start] += amount
+        taken[end[1]] += amount
+
+
+def solve_blueprint(sections):
+    """
+    Split the questions matching the sections into one pool per section.
+
+    Overlapping sections never draw the same question. Questions are first
+    shared out so that every section gets its count where at all possible
+    (see `_allocate`); the rest go to the section with the fewest for the
+    number it needs. Raises ValidationError if a pool is still smaller than
+    its section's count.
+    """
+    match = Q(pk__in=[])
+    for section in sections:
+        condition = Q()
+        if section.get('topic') is not None:
+            condition &= Q(topic=section['topic'])
+        if section.get('difficulty') is not None:
+            condition &= Q(difficulty=section['difficulty'])
+        if not condition:
+            # Matches every question; OR-ing an empty Q would add nothing
+            match = Q()
+            break
+        match |= condition
+
+    groups = {}
+    questions = Question.objects.filter(match).order_by('pk').values_list('pk', 'topic', 'difficulty', 'options')
+    for pk, topic, difficulty, options in questions.iterator():
+        group = tuple(index for index, section in enumerate(sections) if _matches(section, topic, difficulty))
+        groups.setdefault(group, []).append([pk, len(options or ())])
+
+    counts = [section['count'] for section in sections]
+    shares = _allocate(counts, {group: len(items) for group, items in groups.items()})
+    sizes = [0] * len(sections)
+    for (_, index), share in shares.items():
+        sizes[index] += share
+    for group, items in groups.items():
+        for _ in range(len(items) - sum(shares[group, index] for index in group)):
+            index = min(group, key=lambda index: (sizes[index] / counts[index], index))
+            shares[group, index] += 1
+            sizes[index] += 1
+
+    pools = [[] for _ in sections]
+    for group, items in groups.items():
+        start = 0
+        for index in group:
+            pools[index].extend(items[start:start + shares[group, index]])
+            start += shares[group, index]
+    for pool in pools:
+        pool.sort()
+
+    short = [
+        'Section %d needs %d questions but only %d are available.' % (index, section['count'], len(pool))
+        for index, (section, pool) in enumerate(zip(sections, pools))
+        if len(pool) < section['count']
+    ]
+    if short:
+        raise serializers.ValidationError({'sections': short})
+    return [{'count': section['count'], 'pool': pool} for section, pool in zip(sections, pools)]
+
+
+def get_pools(exam):
+    """ Solved pools of an exam's blueprint, or None; one lookup on the unique exam index """
+    return Blueprint.objects.filter(exam=exam).values_list('pools', flat=True).first()
+
+
+def form_seed(exam, user_id):
+    """ Seed of a candidate's form; unguessable without FORM_ASSEMBLY_SECRET """
+    message = ('%s:%s' % (exam, user_id)).encode()
+    digest = hmac.new(settings.FORM_ASSEMBLY_SECRET.encode(), message, hashlib.sha256).digest()
+    return int.from_bytes(digest[:16], 'big')
+
+
+def assemble_form(pools, seed):
+    """ [(question_id, option order), ...] for a seed, in the order to ask them """
+    generator = random.Random(seed)
+    items = []
+    for section in pools:
+        items.extend(generator.sample(section['pool'], section['count']))
+    generator.shuffle(items)
+    return [(question_id, generator.sample(range(options), options)) for question_id, options in items]
+
+
+def apply_order(options, order):
+    """
+    Options in a form's order. Options added or removed since the blueprint
+    was solved are appended or skipped rather than breaking the form.
+    """
+    if not options:
+        return options
+    return [options[index] for index in order if index < len(options)] + options[len(order):]
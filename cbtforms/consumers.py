@@ -0,0 +1,65 @@
+import asyncio
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.utils import timezone
+
+from .answers import get_answer_buffer
+from .models import Answer
+from .serializers import AnswerEventSerializer
+
+
+class ExamSessionConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Live exam session: the candidate sends
+
+        {"type": "answer", "id": "<client id>", "question": 12, "response": "B"}
+
+    and gets {"type": "ack", "id": ...} once the answer is saved, or
+    {"type": "error", "id": ..., "errors": {...}}. Answers are buffered and
+    written in batches, so acks arrive up to ANSWER_FLUSH_INTERVAL later.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.user_id = user.id
+        self.exam = self.scope['url_route']['kwargs']['exam']
+        self.buffer = get_answer_buffer()
+        self.acks = set()
+        await self.accept()
+
+    async def disconnect(self, code):
+        # Buffered answers are still written, there is just nobody to tell
+        for task in getattr(self, 'acks', ()):
+            task.cancel()
+
+    async def receive_json(self, content, **kwargs):
+        if not isinstance(content, dict) or content.get('type') != 'answer':
+            await self.send_json({'type': 'error', 'errors': {'type': ['Unknown event type.']}})
+            return
+        serializer = AnswerEventSerializer(data=content)
+        if not serializer.is_valid():
+            await self.send_json({'type': 'error', 'id': content.get('id'), 'errors': serializer.errors})
+            return
+
+        data = serializer.validated_data
+        future = self.buffer.add(Answer(
+            exam=self.exam,
+            user_id=self.user_id,
+            question_id=data['question'],
+            response=data['response'],
+            answered_at=timezone.now(),
+        ))
+        task = asyncio.ensure_future(self.acknowledge(data.get('id'), future))
+        self.acks.add(task)
+        task.add_done_callback(self.acks.discard)
+
+    async def acknowledge(self, event_id, future):
+        # Shielded so a disconnect doesn't cancel the write for other sessions
+        errors = await asyncio.shield(future)
+        if errors is None:
+            await self.send_json({'type': 'ack', 'id': event_id})
+        else:
+            await self.send_json({'type': 'error', 'id': event_id, 'errors': errors})
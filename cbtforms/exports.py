@@ -0,0 +1,85 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from rest_framework.fields import DateTimeField
+
+# Columns written for every exported question, in order
+EXPORT_FIELDS = ('id', 'question_text', 'user', 'created_at', 'updated_at')
+
+_datetime_field = DateTimeField()
+
+
+class Echo:
+    """ File-like object that hands back whatever is written to it """
+
+    def write(self, value):
+        return value
+
+
+def _format_row(row):
+    """ Format a `values_list` row the same way QuestionSerializer does """
+    return [
+        _datetime_field.to_representation(value) if field in ('created_at', 'updated_at') else value
+        for field, value in zip(EXPORT_FIELDS, row)
+    ]
+
+
+class NDJSONRenderer:
+    """ One JSON object per line """
+    content_type = 'application/x-ndjson'
+    extension = 'ndjson'
+
+    def header(self):
+        return None
+
+    def render(self, row):
+        return json.dumps(dict(zip(EXPORT_FIELDS, _format_row(row)))) + '\n'
+
+
+class CSVRenderer:
+    """ Comma separated values with a header row """
+    content_type = 'text/csv'
+    extension = 'csv'
+
+    def __init__(self):
+        self.writer = csv.writer(Echo())
+
+    def header(self):
+        return self.writer.writerow(EXPORT_FIELDS)
+
+    def render(self, row):
+        return self.writer.writerow(_format_row(row))
+
+
+RENDERERS = {
+    'ndjson': NDJSONRenderer,
+    'csv': CSVRenderer,
+}
+
+
+def stream_rows(queryset, renderer, chunk_size):
+    """ Render rows from a server-side cursor one chunk at a time """
+    header = renderer.header()
+    if header is not None:
+        yield header
+    for row in queryset.iterator(chunk_size=chunk_size):
+        yield renderer.render(row)
+
+
+async def astream_rows(queryset, renderer, chunk_size):
+    """ Async variant of `stream_rows` so ASGI servers never buffer the body """
+    header = renderer.header()
+    if header is not None:
+        yield header
+    # QuerySet.aiterator() runs values_list() queries on the event loop in
+    # Django 4.2, so step the server-side cursor from the sync thread instead
+    rows = queryset.iterator(chunk_size=chunk_size)
+    fetch = sync_to_async(lambda: list(islice(rows, chunk_size)))
+    while True:
+        chunk = await fetch()
+        if not chunk:
+            break
+        for row in chunk:
+            yield renderer.render(row)
@@ -0,0 +1,117 @@
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import Answer, Question, Result
+
+
+class ResponseMatrix:
+    """
+    Responses of one exam sitting as arrays, one row per candidate and one
+    column per question.
+
+    `choices[i, j]` indexes `options[j]`, the distinct responses given to
+    question j, or is -1 where candidate i didn't answer it.
+    """
+
+    def __init__(self, exam, users, questions, choices, options):
+        self.exam = exam
+        self.users = users
+        self.questions = questions
+        self.choices = choices
+        self.options = options
+
+    @classmethod
+    def load(cls, exam):
+        users, questions, options = {}, {}, []
+        rows, columns, codes = [], [], []
+        # Server-side cursor: a sitting can be millions of answers
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(
+                'SELECT user_id, question_id, response FROM %s WHERE exam = %%s' % Answer._meta.db_table,
+                [exam])
+            while True:
+                chunk = cursor.fetchmany(settings.GRADING_FETCH_SIZE)
+                if not chunk:
+                    break
+                for user_id, question_id, response in chunk:
+                    rows.append(users.setdefault(user_id, len(users)))
+                    column = questions.get(question_id)
+                    if column is None:
+                        column = questions[question_id] = len(options)
+                        options.append({})
+                    columns.append(column)
+                    seen = options[column]
+                    code = seen.get(response)
+                    if code is None:
+                        code = seen[response] = len(seen)
+                    codes.append(code)
+
+        choices = np.full((len(users), len(questions)), -1, dtype=np.int32)
+        choices[np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)] = codes
+        return cls(
+            exam,
+            np.fromiter(users, dtype=np.int64, count=len(users)),
+            np.fromiter(questions, dtype=np.int64, count=len(questions)),
+            choices,
+            [list(seen) for seen in options],
+        )
+
+    def credit(self, keys):
+        """
+        Credit from 0 to 1 for every candidate and question, given
+        `{question_id: answer_key}`. Questions without a key earn nothing.
+        """
+        # One row of option credits per question, plus a last column of 0
+        # that the -1 of unanswered questions picks out
+        width = max((len(options) for options in self.options), default=0) + 1
+        table = np.zeros((len(self.questions), width))
+        for column, (question_id, options) in enumerate(zip(self.questions.tolist(), self.options)):
+            key = keys.get(question_id) or {}
+            table[column, :len(options)] = [key.get(option, 0) for option in options]
+        return table[np.arange(len(self.questions)), self.choices]
+
+
+def load_keys(question_ids):
+    """ Answer keys and points of the keyed questions among `question_ids` """
+    questions = Question.objects.filter(pk__in=list(question_ids), answer_key__isnull=False)
+    return {
+        pk: (answer_key, points)
+        for pk, answer_key, points in questions.values_list('pk', 'answer_key', 'points')
+    }
+
+
+def grade_exam(exam):
+    """
+    Score every candidate of a sitting and upsert their results.
+
+    A candidate's score is the sum over keyed questions of the credit for
+    their response times the question's points.
+    """
+    matrix = ResponseMatrix.load(exam)
+    keys = load_keys(matrix.questions.tolist())
+    points = np.array([keys[pk][1] if pk in keys else 0 for pk in matrix.questions.tolist()])
+    credit = matrix.credit({pk: key for pk, (key, _) in keys.items()})
+    scores = credit @ points
+    max_score = float(points.sum())
+
+    graded_at = timezone.now()
+    Result.objects.bulk_create(
+        [
+            Result(exam=exam, user_id=user_id, score=score, max_score=max_score, graded_at=graded_at)
+            for user_id, score in zip(matrix.users.tolist(), scores.tolist())
+        ],
+        batch_size=settings.GRADING_WRITE_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=('exam', 'user'),
+        update_fields=('score', 'max_score', 'graded_at'),
+    )
+    return {
+        'exam': exam,
+        'candidates': len(matrix.users),
+        'questions': len(keys),
+        'ungraded_questions': len(matrix.questions) - len(keys),
+        'max_score': max_score,
+        'mean_score': float(scores.mean()) if len(scores) else None,
+    }
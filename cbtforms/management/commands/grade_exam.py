@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cbtforms.grading import grade_exam
+
+
+class Command(BaseCommand):
+    help = 'Score every candidate of an exam sitting and save their results.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam', help='Exam sitting identifier, as used when answering')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        summary = grade_exam(options['exam'])
+        self.stdout.write(self.style.SUCCESS(
+            'Graded %d candidates on %d questions in %.1fs (%d questions without a key)' % (
+                summary['candidates'],
+                summary['questions'],
+                time.monotonic() - started,
+                summary['ungraded_questions'],
+            )))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from cbtforms.submissions import answer_queue
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the answers in spool files left behind by dead processes. '
+        'Servers do this themselves when they start; run it after a crash if '
+        'no server is coming back.'
+    )
+
+    def handle(self, *args, **options):
+        replayed = answer_queue.replay()
+        self.stdout.write(self.style.SUCCESS('Replayed %d answers' % replayed))
@@ -0,0 +1,59 @@
+import argparse
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from cbtforms.seeding import SyntheticData, seed_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Load synthetic users and questions with realistic distributions through COPY. '
+        'The same seed and counts give the same data; seed an existing database again with another seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000, help='Users to create (default: 100000)')
+        parser.add_argument(
+            '--questions', type=int, default=1000000, help='Questions to create (default: 1000000)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+        parser.add_argument(
+            '--days', type=int, default=730, help='Days of history to spread the data over (default: 730)')
+        parser.add_argument(
+            '--until', type=datetime.date.fromisoformat,
+            help='Last day of the history, YYYY-MM-DD (default: today)')
+        parser.add_argument(
+            '--skew', type=float, default=1.0,
+            help='Zipf exponent of questions per user; 0 spreads them evenly (default: 1.0)')
+        parser.add_argument(
+            '--password', default='password', help='Password of every seeded user (default: password)')
+        parser.add_argument(
+            '--batch-size', type=int, help='Rows per COPY (default: SEED_COPY_BATCH_SIZE)')
+        parser.add_argument(
+            '--rebuild-indexes', action=argparse.BooleanOptionalAction,
+            help='Drop the question indexes for the load and build them again after it '
+                 '(default: when the load at least doubles the table)')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['questions'] < 0:
+            raise CommandError('Need at least one user and no negative counts.')
+        started = time.monotonic()
+        data = SyntheticData(
+            options['users'], options['questions'], seed=options['seed'], days=options['days'],
+            skew=options['skew'], until=options['until'])
+        if User.objects.filter(email=data.email(0)).exists():
+            raise CommandError('Seed %d is already loaded, pick another --seed.' % options['seed'])
+
+        def progress(table, done, total):
+            self.stdout.write('%s: %d/%d (%.0fs)' % (table, done, total, time.monotonic() - started))
+
+        first_id = seed_data(
+            data, options['password'], batch_size=options['batch_size'], progress=progress,
+            rebuild_indexes=options['rebuild_indexes'])
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded %d users (ids %d-%d) and %d questions in %.1fs' % (
+                data.users, first_id, first_id + data.users - 1, data.questions,
+                time.monotonic() - started,
+            )))
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:39
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cbtforms', '0002_question_question_created_at_id_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='question',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            sql=[
+                """
+                CREATE TRIGGER cbtforms_question_search_vector_update
+                BEFORE INSERT OR UPDATE OF question_text ON cbtforms_question
+                FOR EACH ROW EXECUTE FUNCTION
+                tsvector_update_trigger(search_vector, 'pg_catalog.english', question_text)
+                """,
+                """
+                UPDATE cbtforms_question
+                SET search_vector = to_tsvector('pg_catalog.english', question_text)
+                """,
+            ],
+            reverse_sql="""
+                DROP TRIGGER IF EXISTS cbtforms_question_search_vector_update
+                ON cbtforms_question
+            """,
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='question_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['question_text'], name='question_text_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cbtforms', '0003_question_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['updated_at'], name='question_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cbtforms', '0005_answer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='answer_key',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='points',
+            field=models.FloatField(default=1),
+        ),
+        migrations.CreateModel(
+            name='Result',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exam', models.CharField(max_length=64)),
+                ('score', models.FloatField()),
+                ('max_score', models.FloatField()),
+                ('graded_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='result',
+            constraint=models.UniqueConstraint(fields=('exam', 'user'), name='result_exam_user_uniq'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cbtforms', '0006_grading'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FormStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exam', models.CharField(max_length=64, unique=True)),
+                ('candidates', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ItemStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exam', models.CharField(max_length=64)),
+                ('responses', models.IntegerField(default=0)),
+                ('credit_sum', models.FloatField(default=0)),
+                ('cross_products', models.JSONField(default=dict)),
+                ('options', models.JSONField(default=dict)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='cbtforms.question')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='itemstatistics',
+            constraint=models.UniqueConstraint(fields=('exam', 'question'), name='itemstatistics_exam_question_uniq'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cbtforms', '0007_item_statistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blueprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exam', models.CharField(max_length=64, unique=True)),
+                ('sections', models.JSONField()),
+                ('pools', models.JSONField()),
+                ('solved_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='difficulty',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='options',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='topic',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cbtforms', '0008_blueprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='irt_a',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='irt_b',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='irt_c',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cbtforms', '0009_question_irt'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='question_user_created_at_idx'),
+        ),
+        # The new index leads with user_id, so the foreign key's own is redundant
+        migrations.AlterField(
+            model_name='question',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
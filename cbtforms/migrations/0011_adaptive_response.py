@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cbtforms', '0010_question_user_created_at_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdaptiveResponse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exam', models.CharField(max_length=64)),
+                ('response', models.CharField(max_length=1000)),
+                ('answered_at', models.DateTimeField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='cbtforms.question')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='adaptiveresponse',
+            constraint=models.UniqueConstraint(fields=('exam', 'user', 'question'), name='adaptiveresponse_exam_user_question_uniq'),
+        ),
+    ]
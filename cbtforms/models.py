@@ -1,11 +1,140 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
+
+class QuestionManager(models.Manager):
+    # The search vector is only read by search queries, don't ship it otherwise
+    def get_queryset(self):
+        return super().get_queryset().defer('search_vector')
+
+
 # Model for question form
 class Question(models.Model):
     question_text = models.CharField(max_length=10000)
-    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE)
+    # Indexed by question_user_created_at_idx, which leads with the user
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Kept in sync with question_text by a database trigger, so bulk
+    # inserts and raw updates are indexed too
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Credit for each accepted response, from 0 to 1, e.g. {"B": 1, "C": 0.5}.
+    # Questions without a key are left out of grading.
+    answer_key = models.JSONField(null=True, blank=True)
+    # What a fully correct response is worth
+    points = models.FloatField(default=1)
+    # Item response theory parameters: discrimination, difficulty and
+    # guessing (left empty for the 2PL model). Questions with an answer key
+    # and discrimination make up the adaptive testing bank.
+    irt_a = models.FloatField(null=True, blank=True)
+    irt_b = models.FloatField(null=True, blank=True)
+    irt_c = models.FloatField(null=True, blank=True)
+    # Blueprint classification, see Blueprint
+    topic = models.CharField(max_length=100, blank=True, default='')
+    difficulty = models.PositiveSmallIntegerField(null=True, blank=True)
+    # Response options of a multiple choice question, shown in a different
+    # order to every candidate; responses and answer keys use the text
+    options = models.JSONField(null=True, blank=True)
+
+    objects = QuestionManager()
 
     class Meta:
         ordering = ('created_at',)
+        indexes = [
+            # Backs keyset pagination of the question list
+            models.Index(fields=['created_at', 'id'], name='question_created_at_id_idx'),
+            # Backs keyset pagination of each author's own questions
+            models.Index(fields=['user', 'created_at', 'id'], name='question_user_created_at_idx'),
+            # Lets conditional GETs find the newest change without a scan
+            models.Index(fields=['updated_at'], name='question_updated_at_idx'),
+            GinIndex(fields=['search_vector'], name='question_search_vector_idx'),
+            # Fuzzy matching of short queries
+            GinIndex(fields=['question_text'], name='question_text_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
+
+
+# A candidate's answer to one question of an exam sitting
+class Answer(models.Model):
+    # Identifier of the exam sitting, e.g. "biology-2024-06"
+    exam = models.CharField(max_length=64)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE)
+    response = models.CharField(max_length=1000)
+    answered_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            # A later answer to the same question replaces the earlier one
+            models.UniqueConstraint(
+                fields=['exam', 'user', 'question'], name='answer_exam_user_question_uniq'),
+        ]
+
+
+# A candidate's graded score for an exam sitting
+class Result(models.Model):
+    exam = models.CharField(max_length=64)
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE)
+    score = models.FloatField()
+    max_score = models.FloatField()
+    graded_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['exam', 'user'], name='result_exam_user_uniq'),
+        ]
+
+
+# Running sums over the candidates of an exam sitting, see cbtforms.statistics
+class FormStatistics(models.Model):
+    exam = models.CharField(max_length=64, unique=True)
+    # Candidates with at least one answer
+    candidates = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+# Running sums over the answers to one question of an exam sitting
+class ItemStatistics(models.Model):
+    exam = models.CharField(max_length=64)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    # Candidates who answered
+    responses = models.IntegerField(default=0)
+    credit_sum = models.FloatField(default=0)
+    # Sum over candidates of this question's credit times each question's
+    # credit (this one included), by question id
+    cross_products = models.JSONField(default=dict)
+    # {response: [candidates who gave it, sum of their scores]}
+    options = models.JSONField(default=dict)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['exam', 'question'], name='itemstatistics_exam_question_uniq'),
+        ]
+
+
+# How many questions of each kind an exam's forms are drawn from
+class Blueprint(models.Model):
+    exam = models.CharField(max_length=64, unique=True)
+    # [{"topic": "algebra", "difficulty": 2, "count": 10}, ...]; a missing
+    # or null topic or difficulty matches any
+    sections = models.JSONField()
+    # The questions each section draws from, see cbtforms.assembly
+    pools = models.JSONField()
+    solved_at = models.DateTimeField(auto_now=True)
+
+
+# A candidate's answer in an adaptive test, kept apart from Answer so that
+# only the adaptive test view, which decides what is asked, writes them
+class AdaptiveResponse(models.Model):
+    exam = models.CharField(max_length=64)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE)
+    response = models.CharField(max_length=1000)
+    answered_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            # Each question is asked once and its response never changes
+            models.UniqueConstraint(
+                fields=['exam', 'user', 'question'], name='adaptiveresponse_exam_user_question_uniq'),
+        ]
@@ -0,0 +1,16 @@
+from cbt_core.pagination import KeysetPagination
+
+
+class QuestionPagination(KeysetPagination):
+    """ Seek through questions in creation order """
+    ordering = ('created_at', 'id')
+
+
+class QuestionFeedPagination(KeysetPagination):
+    """ Seek through one author's questions, newest first """
+    ordering = ('-created_at', '-id')
+
+
+class ResultPagination(KeysetPagination):
+    """ Seek through the results of one exam by candidate """
+    ordering = ('user_id',)
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .consumers import ExamSessionConsumer
+
+websocket_urlpatterns = [
+    path('ws/exams/<slug:exam>/', ExamSessionConsumer.as_asgi(), name='exam_session'),
+]
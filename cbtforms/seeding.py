@@ -0,0 +1,195 @@
+import datetime
+import io
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from accounts.models import User
+from cbt_core.cache import invalidate
+from .models import Question
+
+FIRST_NAMES = (
+    'Ada', 'Amara', 'Ben', 'Chen', 'Chidi', 'Diego', 'Elif', 'Emma', 'Fatima', 'Hana', 'Ibrahim', 'Ivan',
+    'Jonas', 'Kofi', 'Leila', 'Lucas', 'Maria', 'Mei', 'Noah', 'Olga', 'Priya', 'Rahul', 'Sara', 'Tariq',
+    'Uche', 'Yusuf', 'Zara', 'Zoe',
+)
+LAST_NAMES = (
+    'Adeyemi', 'Ahmed', 'Silva', 'Garcia', 'Ivanova', 'Kim', 'Kowalski', 'Mensah', 'Muller', 'Nguyen',
+    'Novak', 'Okafor', 'Patel', 'Rossi', 'Sato', 'Schmidt', 'Smith', 'Tanaka', 'Wang', 'Yilmaz',
+)
+TOPICS = ('algebra', 'biology', 'chemistry', 'geography', 'history', 'literature', 'physics', 'statistics')
+WORDS = (
+    'which', 'of', 'the', 'following', 'best', 'describes', 'a', 'an', 'process', 'where', 'cell', 'energy',
+    'reaction', 'force', 'equation', 'value', 'given', 'that', 'is', 'are', 'not', 'most', 'likely', 'when',
+    'temperature', 'pressure', 'volume', 'rate', 'change', 'function', 'graph', 'shown', 'above', 'below',
+    'author', 'passage', 'argument', 'evidence', 'claim', 'period', 'empire', 'treaty', 'river', 'climate',
+    'population', 'sample', 'mean', 'median', 'probability', 'random', 'variable', 'distribution', 'triangle',
+    'angle', 'area', 'solution', 'acid', 'base', 'molecule', 'atom', 'electron', 'organism', 'species',
+    'gene', 'protein', 'in', 'on', 'with', 'from', 'for', 'by', 'between', 'during', 'after', 'before',
+    'and', 'or', 'if', 'then', 'therefore', 'because', 'explain', 'calculate', 'identify', 'compare',
+)
+# Characters of generated text that question texts are cut from
+CORPUS_SIZE = 4 * 1024 * 1024
+MAX_TEXT_LENGTH = Question._meta.get_field('question_text').max_length
+
+
+class SyntheticData:
+    """
+    Reproducible users and questions with production-like shapes.
+
+    Users join over `days` days, more of them recently, and their ids follow
+    join order. Authorship is Zipf distributed with exponent `skew`, so a
+    few users own most questions and most own one or none. Text lengths are
+    log-normal (median around 300 characters) up to the column limit, and a
+    question is posted some time after its author joined.
+
+    Everything is drawn from `seed`: the same arguments give the same rows.
+    """
+
+    def __init__(self, users, questions, seed=0, days=730, skew=1.0, until=None):
+        self.users = users
+        self.questions = questions
+        self.seed = seed
+        until = until or datetime.datetime.now(datetime.timezone.utc).date()
+        self.end = datetime.datetime.combine(until, datetime.time(), datetime.timezone.utc).timestamp()
+        self.start = self.end - days * 86400
+
+        rng = np.random.default_rng([seed, 0])
+        # power(2) leans towards 1, i.e. towards the end of the window
+        self.joined = np.sort(self.start + rng.power(2, users) * (self.end - self.start))
+        self.first_names = rng.integers(len(FIRST_NAMES), size=users)
+        self.last_names = rng.integers(len(LAST_NAMES), size=users)
+
+        rng = np.random.default_rng([seed, 1])
+        weights = 1 / np.arange(1, users + 1) ** skew
+        # Shuffle ranks so prolific authors aren't simply the first users
+        ranked = rng.permutation(users)
+        cumulative = np.cumsum(weights / weights.sum())
+        authors = ranked[np.minimum(np.searchsorted(cumulative, rng.random(questions)), users - 1)]
+        joined = self.joined[authors]
+        created = joined + rng.random(questions) * (self.end - joined)
+        order = np.argsort(created, kind='stable')
+        self.authors = authors[order]
+        self.created = created[order]
+        lengths = rng.lognormal(np.log(300), 1.0, questions)
+        self.lengths = np.clip(lengths, 20, MAX_TEXT_LENGTH).astype(np.int64)
+        self.offsets = (rng.random(questions) * (CORPUS_SIZE - MAX_TEXT_LENGTH)).astype(np.int64)
+        self.topics = rng.integers(len(TOPICS), size=questions)
+        self.difficulties = rng.integers(1, 6, size=questions)
+
+        rng = np.random.default_rng([seed, 2])
+        words = np.array(WORDS)[rng.integers(len(WORDS), size=CORPUS_SIZE // 5)]
+        self.corpus = ' '.join(words)[:CORPUS_SIZE]
+
+    def email(self, index):
+        return 'seed%d-user%d@example.com' % (self.seed, index)
+
+    def user_rows(self, first_id, start, stop, password):
+        """ COPY text lines for users `start` to `stop`, numbered from `first_id` """
+        joined = _timestamps(self.joined[start:stop])
+        return ''.join(
+            '%d\t%s\tf\t%s\t%s\t%s\tt\tf\t%s\n' % (
+                first_id + index, password, self.email(index),
+                FIRST_NAMES[self.first_names[index]], LAST_NAMES[self.last_names[index]],
+                joined[index - start],
+            )
+            for index in range(start, stop)
+        )
+
+    def question_rows(self, first_user_id, start, stop):
+        """ COPY text lines for questions `start` to `stop` """
+        created = _timestamps(self.created[start:stop])
+        corpus = self.corpus
+        lines = []
+        for index in range(start, stop):
+            offset = self.offsets[index]
+            text = corpus[offset:offset + self.lengths[index] - 1].strip()
+            lines.append('%s?\t%d\t%s\t%s\t1\t%s\t%d\n' % (
+                text.capitalize(), first_user_id + self.authors[index],
+                created[index - start], created[index - start],
+                TOPICS[self.topics[index]], self.difficulties[index],
+            ))
+        return ''.join(lines)
+
+
+def _timestamps(seconds):
+    """ Postgres timestamptz literals for epoch seconds """
+    microseconds = (seconds * 1e6).astype('datetime64[us]')
+    return [value + '+00' for value in np.datetime_as_string(microseconds, unit='us')]
+
+
+def _copy(cursor, table, columns, rows):
+    cursor.copy_expert(
+        'COPY %s (%s) FROM STDIN' % (table, ', '.join(columns)), io.StringIO(rows))
+
+
+def seed_data(data, password, batch_size=None, progress=None, rebuild_indexes=None):
+    """
+    Load `data` (a SyntheticData) with COPY in one transaction.
+
+    Every user gets the same password, hashed once. Users are numbered after
+    the current highest id; questions take ids from their sequence in
+    creation order. `progress(table, done, total)` is called after each
+    batch. Returns the id of the first user.
+
+    With `rebuild_indexes` the question indexes from Question.Meta are
+    dropped for the load and built again at the end, which beats updating
+    the text search indexes row by row when the table is small to begin
+    with, but locks it until the transaction commits. By default that is
+    done when the load at least doubles the table.
+    """
+    batch_size = batch_size or settings.SEED_COPY_BATCH_SIZE
+    hashed = make_password(password)
+    user_table = User._meta.db_table
+    question_table = Question._meta.db_table
+    if rebuild_indexes is None:
+        rebuild_indexes = Question.objects.count() <= data.questions
+    indexes = Question._meta.indexes if rebuild_indexes else []
+    with transaction.atomic(), connection.cursor() as cursor, connection.schema_editor() as editor:
+        # Nobody else may take ids in the range being filled
+        cursor.execute('LOCK TABLE %s IN SHARE ROW EXCLUSIVE MODE' % user_table)
+        cursor.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM %s' % user_table)
+        first_id = cursor.fetchone()[0]
+
+        for start in range(0, data.users, batch_size):
+            stop = min(start + batch_size, data.users)
+            _copy(cursor, user_table, (
+                'id', 'password', 'is_superuser', 'email', 'first_name', 'last_name', 'is_active',
+                'is_staff', 'updated_at',
+            ), data.user_rows(first_id, start, stop, hashed))
+            if progress:
+                progress('users', stop, data.users)
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence('%s', 'id'), (SELECT MAX(id) FROM %s))"
+            % (user_table, user_table))
+
+        for index in indexes:
+            editor.remove_index(Question, index)
+        for start in range(0, data.questions, batch_size):
+            stop = min(start + batch_size, data.questions)
+            _copy(cursor, question_table, (
+                'question_text', 'user_id', 'created_at', 'updated_at', 'points', 'topic', 'difficulty',
+            ), data.question_rows(first_id, start, stop))
+            if progress:
+                progress('questions', stop, data.questions)
+        if indexes:
+            # Run the deferred foreign key checks now, CREATE INDEX refuses
+            # to while they are pending
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute("SET LOCAL maintenance_work_mem = '512MB'")
+        for index in indexes:
+            editor.add_index(Question, index)
+            if progress:
+                progress('index %s' % index.name, data.questions, data.questions)
+
+        # COPY skips the save signals
+        invalidate(User)
+        invalidate(Question)
+
+    # Fresh statistics so the planner sees the new size right away
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE %s' % user_table)
+        cursor.execute('ANALYZE %s' % question_table)
+    return first_id
@@ -1,9 +1,179 @@
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
 
-from .models import Question
+from accounts.models import User
+from accounts.serializers import UserSummarySerializer
+from cbt_core.cache import invalidate
+from cbt_core.serializers import SparseFieldsetSerializer
+from .models import Blueprint, Question, Result
 
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(SparseFieldsetSerializer):
+    options = serializers.ListField(
+        child=serializers.CharField(max_length=1000), min_length=2, allow_null=True, required=False)
+
+    expandable = {'user': ('users', UserSummarySerializer)}
+
+    class Meta:
+        model = Question
+        fields = ('id', 'question_text', 'user', 'topic', 'difficulty', 'options', 'created_at', 'updated_at')
+
+
+class QuestionSearchSerializer(QuestionSerializer):
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(QuestionSerializer.Meta):
+        fields = QuestionSerializer.Meta.fields + ('rank',)
+
+
+class QuestionSearchQuerySerializer(serializers.Serializer):
+    """ Validate the query parameters of a question search """
+    q = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class QuestionBulkListSerializer(serializers.ListSerializer):
+    """
+    Validate every row of a bulk import and keep the valid ones.
+
+    Errors are collected per row in `row_errors` instead of failing the
+    whole payload, and authors are checked with a single query.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            message = self.error_messages['not_a_list'].format(
+                input_type=type(data).__name__
+            )
+            raise serializers.ValidationError({
+                'non_field_errors': [message]
+            }, code='not_a_list')
+
+        self.row_errors = {}
+        rows = {}
+        for index, item in enumerate(data):
+            try:
+                rows[index] = self.child.run_validation(item)
+            except serializers.ValidationError as exc:
+                self.row_errors[index] = exc.detail
+
+        user_ids = {row['user_id'] for row in rows.values()}
+        existing = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+        for index, row in list(rows.items()):
+            if row['user_id'] not in existing:
+                self.row_errors[index] = {
+                    'user': ['Invalid pk "%s" - object does not exist.' % row['user_id']]
+                }
+                del rows[index]
+        return list(rows.values())
+
+    def create(self, validated_data):
+        questions = [Question(**row) for row in validated_data]
+        with transaction.atomic():
+            questions = Question.objects.bulk_create(
+                questions, batch_size=settings.QUESTION_IMPORT_BATCH_SIZE)
+            # bulk_create doesn't send post_save
+            invalidate(Question)
+        return questions
+
+
+class QuestionBulkSerializer(serializers.ModelSerializer):
+    """ Question with its author as a plain id the caller checks in bulk """
+    user = serializers.IntegerField(source='user_id', min_value=1)
+    options = serializers.ListField(
+        child=serializers.CharField(max_length=1000), min_length=2, allow_null=True, required=False)
+
+    class Meta:
+        model = Question
+        fields = ('question_text', 'user', 'topic', 'difficulty', 'options')
+        list_serializer_class = QuestionBulkListSerializer
+
+
+class QuestionExportSerializer(serializers.Serializer):
+    """ Validate the query parameters of a question export """
+    output = serializers.ChoiceField(choices=('ndjson', 'csv'), default='ndjson')
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    user = serializers.IntegerField(required=False)
+
+
+class AnswerEventSerializer(serializers.Serializer):
+    """ Validate an answer sent over an exam session websocket """
+    id = serializers.CharField(max_length=64, required=False)
+    question = serializers.IntegerField(min_value=1)
+    response = serializers.CharField(max_length=1000, allow_blank=True)
+
+
+class AnswerSubmissionItemSerializer(serializers.Serializer):
+    question = serializers.IntegerField(min_value=1)
+    response = serializers.CharField(max_length=1000, allow_blank=True)
+
+
+class AnswerSubmissionSerializer(serializers.Serializer):
+    """ Validate answers submitted over HTTP, without touching the database """
+    exam = serializers.SlugField(max_length=64)
+    answers = AnswerSubmissionItemSerializer(many=True, allow_empty=False)
+
+
+class AnswerKeyField(serializers.Field):
+    """
+    Accept a single correct response, a list of them, or a mapping of
+    responses to partial credit between 0 and 1; always stored as a mapping.
+    """
+    default_error_messages = {
+        'invalid': 'Expected a response, a list of responses or a mapping of responses to credit.',
+        'credit': 'Credit must be a number between 0 and 1.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = {data: 1}
+        elif isinstance(data, list) and all(isinstance(item, str) for item in data):
+            data = dict.fromkeys(data, 1)
+        if not isinstance(data, dict) or not data:
+            self.fail('invalid')
+        for credit in data.values():
+            if isinstance(credit, bool) or not isinstance(credit, (int, float)) or not 0 <= credit <= 1:
+                self.fail('credit')
+        return data
+
+    def to_representation(self, value):
+        return value
+
+
+class QuestionKeySerializer(serializers.ModelSerializer):
+    answer_key = AnswerKeyField(allow_null=True)
+    points = serializers.FloatField(min_value=0)
+    irt_a = serializers.FloatField(min_value=0, allow_null=True, required=False)
+    irt_b = serializers.FloatField(allow_null=True, required=False)
+    irt_c = serializers.FloatField(min_value=0, max_value=0.99, allow_null=True, required=False)
+
     class Meta:
         model = Question
-        fields = ('id', 'question_text', 'user', 'created_at', 'updated_at')
+        fields = ('id', 'answer_key', 'points', 'irt_a', 'irt_b', 'irt_c')
+
+
+class ResultSerializer(SparseFieldsetSerializer):
+    class Meta:
+        model = Result
+        fields = ('exam', 'user', 'score', 'max_score', 'graded_at')
+
+
+class BlueprintSectionSerializer(serializers.Serializer):
+    topic = serializers.CharField(max_length=100, allow_null=True, default=None)
+    difficulty = serializers.IntegerField(min_value=0, allow_null=True, default=None)
+    count = serializers.IntegerField(min_value=1)
+
+
+class BlueprintSerializer(serializers.ModelSerializer):
+    sections = BlueprintSectionSerializer(many=True, allow_empty=False)
+    pool_sizes = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Blueprint
+        fields = ('exam', 'sections', 'pool_sizes', 'solved_at')
+        read_only_fields = ('exam', 'solved_at')
+
+    def get_pool_sizes(self, blueprint):
+        return [len(section['pool']) for section in blueprint.pools]
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from cbt_core.cache import invalidate
+from .models import Question
+
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_questions(sender, **kwargs):
+    invalidate(Question)
+
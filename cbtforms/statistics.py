@@ -0,0 +1,233 @@
+"""
+Classical item analysis of exam sittings.
+
+Each sitting keeps running sums from which every statistic follows: the
+number of candidates, and for each keyed question the number of responses,
+the sum of credit, the cross-products of its credit with every other
+question's (a row of XᵀX for the candidates × questions credit matrix X),
+and per response the number of candidates who gave it and the sum of their
+scores. Answer writes fold their change into these sums, so reading the
+statistics never touches the answers table.
+
+Scores are the sum of credit times points over keyed questions, with
+omitted questions earning nothing, as in grading.
+"""
+import math
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+
+from .grading import ResponseMatrix, load_keys
+from .models import Answer, FormStatistics, ItemStatistics, Question
+
+
+def lock_form(exam):
+    """ Lock a sitting's statistics; every update of them takes this lock first """
+    FormStatistics.objects.bulk_create([FormStatistics(exam=exam)], ignore_conflicts=True)
+    return FormStatistics.objects.select_for_update().get(exam=exam)
+
+
+def _credit_matrix(responses, users, columns, keys):
+    credit = np.zeros((len(users), len(columns)))
+    answered = np.zeros((len(users), len(columns)), dtype=bool)
+    for row, user_id in enumerate(users):
+        for question_id, response in responses.get(user_id, {}).items():
+            column = columns.get(question_id)
+            if column is not None:
+                credit[row, column] = keys[question_id][0].get(response, 0)
+                answered[row, column] = True
+    return credit, answered
+
+
+def apply_answers(answers):
+    """
+    Fold answers about to be written into the statistics of their sittings.
+
+    Call inside the transaction that writes them, before writing: the change
+    is the difference between each candidate's answers before and after.
+    """
+    by_exam = defaultdict(list)
+    for answer in answers:
+        by_exam[answer.exam].append(answer)
+    # Always lock sittings in the same order
+    for exam in sorted(by_exam):
+        _apply_exam_answers(exam, by_exam[exam])
+
+
+def _apply_exam_answers(exam, answers):
+    form = lock_form(exam)
+    users = sorted({answer.user_id for answer in answers})
+    before = defaultdict(dict)
+    rows = Answer.objects.filter(exam=exam, user_id__in=users).values_list('user_id', 'question_id', 'response')
+    for user_id, question_id, response in rows:
+        before[user_id][question_id] = response
+    after = {user_id: dict(before.get(user_id, {})) for user_id in users}
+    for answer in answers:
+        after[answer.user_id][answer.question_id] = answer.response
+
+    form.candidates += sum(1 for user_id in users if user_id not in before)
+    form.save(update_fields=('candidates', 'updated_at'))
+
+    keys = load_keys({question_id for responses in after.values() for question_id in responses})
+    items = sorted(keys)
+    if not items:
+        return
+    columns = {question_id: column for column, question_id in enumerate(items)}
+    points = np.array([keys[question_id][1] for question_id in items])
+    credit_before, answered_before = _credit_matrix(before, users, columns, keys)
+    credit_after, answered_after = _credit_matrix(after, users, columns, keys)
+    scores_before, scores_after = credit_before @ points, credit_after @ points
+
+    responses = answered_after.sum(axis=0) - answered_before.sum(axis=0)
+    credit_sums = credit_after.sum(axis=0) - credit_before.sum(axis=0)
+    cross_products = credit_after.T @ credit_after - credit_before.T @ credit_before
+    options = [defaultdict(lambda: [0, 0.0]) for _ in items]
+    for row, user_id in enumerate(users):
+        for given, sign, scores in ((before, -1, scores_before), (after, 1, scores_after)):
+            for question_id, response in given.get(user_id, {}).items():
+                if question_id in columns:
+                    option = options[columns[question_id]][response]
+                    option[0] += sign
+                    option[1] += sign * scores[row]
+
+    ItemStatistics.objects.bulk_create(
+        [ItemStatistics(exam=exam, question_id=question_id) for question_id in items],
+        ignore_conflicts=True,
+    )
+    statistics = list(ItemStatistics.objects.filter(exam=exam, question_id__in=items))
+    for item in statistics:
+        column = columns[item.question_id]
+        item.responses += int(responses[column])
+        item.credit_sum += float(credit_sums[column])
+        for question_id, change in zip(items, cross_products[column].tolist()):
+            if change:
+                key = str(question_id)
+                item.cross_products[key] = item.cross_products.get(key, 0) + change
+        for response, (count, score_sum) in options[column].items():
+            total = item.options.get(response, [0, 0.0])
+            total = [total[0] + count, total[1] + float(score_sum)]
+            if total[0]:
+                item.options[response] = total
+            else:
+                item.options.pop(response, None)
+    ItemStatistics.objects.bulk_update(statistics, ('responses', 'credit_sum', 'cross_products', 'options'))
+
+
+def recompute_statistics(exam):
+    """ Rebuild a sitting's running sums from its answers, e.g. after an answer key changed """
+    with transaction.atomic():
+        form = lock_form(exam)
+        matrix = ResponseMatrix.load(exam)
+        keys = load_keys(matrix.questions.tolist())
+        keyed = [column for column, question_id in enumerate(matrix.questions.tolist()) if question_id in keys]
+        items = matrix.questions[keyed].tolist()
+        credit = matrix.credit({question_id: key for question_id, (key, _) in keys.items()})[:, keyed]
+        choices = matrix.choices[:, keyed]
+        scores = credit @ np.array([keys[question_id][1] for question_id in items])
+        cross_products = credit.T @ credit
+
+        statistics = []
+        for column, question_id in enumerate(items):
+            options = matrix.options[keyed[column]]
+            answered = choices[:, column] >= 0
+            codes = choices[answered, column]
+            counts = np.bincount(codes, minlength=len(options))
+            score_sums = np.bincount(codes, weights=scores[answered], minlength=len(options))
+            statistics.append(ItemStatistics(
+                exam=exam,
+                question_id=question_id,
+                responses=int(answered.sum()),
+                credit_sum=float(credit[:, column].sum()),
+                cross_products={
+                    str(other): value
+                    for other, value in zip(items, cross_products[column].tolist()) if value
+                },
+                options={
+                    option: [count, score_sum]
+                    for option, count, score_sum in zip(options, counts.tolist(), score_sums.tolist())
+                },
+            ))
+        ItemStatistics.objects.filter(exam=exam).delete()
+        ItemStatistics.objects.bulk_create(statistics)
+        form.candidates = len(matrix.users)
+        form.save()
+    return summarize(exam)
+
+
+def _number(value):
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def summarize(exam):
+    """
+    Item and form statistics of a sitting from its running sums, or None if
+    it has none. Costs O(questions²) arithmetic and two queries.
+
+    `point_biserial` is the corrected item-rest correlation: of a question's
+    credit with the score on the other questions.
+    """
+    form = FormStatistics.objects.filter(exam=exam).first()
+    if form is None:
+        return None
+    statistics = list(ItemStatistics.objects.filter(exam=exam).order_by('question_id'))
+    items = [item.question_id for item in statistics]
+    questions = {
+        pk: (answer_key or {}, points)
+        for pk, answer_key, points in Question.objects.filter(pk__in=items).values_list('pk', 'answer_key', 'points')
+    }
+    candidates = form.candidates
+    points = np.array([questions[question_id][1] for question_id in items])
+    credit_sums = np.array([item.credit_sum for item in statistics])
+    cross_products = np.array([
+        [item.cross_products.get(str(question_id), 0) for question_id in items]
+        for item in statistics
+    ]).reshape(len(items), len(items))
+
+    correlations = [None] * len(items)
+    alpha = mean_score = None
+    if candidates:
+        means = credit_sums / candidates
+        covariance = cross_products / candidates - np.outer(means, means)
+        item_variance = np.diag(covariance)
+        item_total = covariance @ points
+        total_variance = points @ covariance @ points
+        rest_covariance = item_total - points * item_variance
+        rest_variance = total_variance - 2 * points * item_total + points ** 2 * item_variance
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlations = [_number(value) for value in rest_covariance / np.sqrt(item_variance * rest_variance)]
+        mean_score = _number(means @ points)
+        if len(items) > 1 and total_variance > 0:
+            alpha = _number(
+                len(items) / (len(items) - 1) * (1 - (points ** 2 * item_variance).sum() / total_variance))
+
+    return {
+        'exam': exam,
+        'candidates': candidates,
+        'questions': len(items),
+        'mean_score': mean_score,
+        'alpha': alpha,
+        'updated_at': form.updated_at,
+        'items': [
+            {
+                'question': item.question_id,
+                'responses': item.responses,
+                'omitted': candidates - item.responses,
+                'p_value': item.credit_sum / item.responses if item.responses else None,
+                'point_biserial': correlation,
+                'options': [
+                    {
+                        'response': response,
+                        'count': count,
+                        'proportion': count / item.responses,
+                        'mean_score': score_sum / count,
+                        'credit': questions[item.question_id][0].get(response, 0),
+                    }
+                    for response, (count, score_sum) in sorted(
+                        item.options.items(), key=lambda option: (-option[1][0], option[0]))
+                ],
+            }
+            for item, correlation in zip(statistics, correlations)
+        ],
+    }
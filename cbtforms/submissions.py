@@ -0,0 +1,206 @@
+import fcntl
+import glob
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.dateparse import parse_datetime
+from rest_framework import exceptions
+
+from .answers import write_answers
+from .models import Answer
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerQueueFull(exceptions.APIException):
+    status_code = 503
+    default_detail = 'Too many answers waiting to be saved, try again shortly.'
+    default_code = 'answer_queue_full'
+    wait = 1
+
+
+def encode_answer(answer):
+    return json.dumps({
+        'exam': answer.exam,
+        'user': answer.user_id,
+        'question': answer.question_id,
+        'response': answer.response,
+        'answered_at': answer.answered_at.isoformat(),
+    }) + '\n'
+
+
+def decode_answer(line):
+    data = json.loads(line)
+    return Answer(
+        exam=data['exam'],
+        user_id=data['user'],
+        question_id=data['question'],
+        response=data['response'],
+        answered_at=parse_datetime(data['answered_at']),
+    )
+
+
+def spool_segments():
+    """ Paths of the segments in the spool, oldest first """
+    return sorted(glob.glob(os.path.join(settings.ANSWER_SPOOL_DIR, 'answers-*.ndjson')))
+
+
+class SpoolSegment:
+    """
+    Append-only file of accepted answers that may not be in the database yet.
+
+    The owning process holds an exclusive lock on it until the answers are
+    written and the file deleted, so a segment anyone else can lock was left
+    behind by a process that died.
+    """
+
+    _counter = itertools.count()
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        # Names sort in the order the segments were opened
+        name = 'answers-%d-%d-%d.ndjson' % (time.time_ns(), os.getpid(), next(self._counter))
+        self.path = os.path.join(directory, name)
+        self.file = open(self.path, 'a', encoding='utf-8')
+        fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def append(self, lines):
+        self.file.write(''.join(lines))
+        self.file.flush()
+        if settings.ANSWER_SPOOL_FSYNC:
+            os.fsync(self.file.fileno())
+
+    def remove(self):
+        os.unlink(self.path)
+        self.file.close()
+
+
+class AnswerQueue:
+    """
+    Write-behind queue for submitted answers.
+
+    `submit` appends the answers to the current spool segment and to memory,
+    and returns; a background thread upserts them every
+    ANSWER_QUEUE_FLUSH_INTERVAL seconds, or sooner once
+    ANSWER_QUEUE_BATCH_SIZE are waiting. Once ANSWER_QUEUE_SIZE answers are
+    waiting (e.g. while the database is down) `submit` raises
+    `AnswerQueueFull` (503) instead of growing without bound.
+
+    Segments are only deleted after their answers are written, and segments
+    left by a dead process are replayed when the flusher starts (which
+    `resume` does at server start if there are any), so every accepted
+    answer is written at least once. Writes are upserts, so replaying a
+    segment twice is harmless.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.entries = []
+        # The segment new answers go to, and older ones whose answers are
+        # back in `entries` after a failed write
+        self.segment = None
+        self.retained = []
+        self.thread = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def submit(self, answers):
+        lines = [encode_answer(answer) for answer in answers]
+        with self.lock:
+            if len(self.entries) + len(answers) > settings.ANSWER_QUEUE_SIZE:
+                raise AnswerQueueFull()
+            if self.segment is None:
+                self.segment = SpoolSegment(settings.ANSWER_SPOOL_DIR)
+            self.segment.append(lines)
+            self.entries.extend(answers)
+            waiting = len(self.entries)
+        self.start()
+        if waiting >= settings.ANSWER_QUEUE_BATCH_SIZE:
+            self.wakeup.set()
+
+    def start(self):
+        """ Start the flusher thread unless it is running """
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='answer-flusher', daemon=True)
+                self.thread.start()
+
+    def resume(self):
+        """
+        Start the flusher if the spool holds segments, so those left by a dead
+        process are written when the server comes back rather than on its
+        first submission. Returns whether it did.
+        """
+        if not spool_segments():
+            return False
+        self.start()
+        return True
+
+    def run(self):
+        replayed = False
+        while True:
+            if not replayed:
+                try:
+                    self.replay()
+                    replayed = True
+                except Exception:
+                    logger.exception('Failed to replay the answer spool, will retry')
+                close_old_connections()
+            self.wakeup.wait(settings.ANSWER_QUEUE_FLUSH_INTERVAL)
+            self.wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+    def flush(self):
+        """ Write every waiting answer; returns how many were taken """
+        with self.flush_lock:
+            with self.lock:
+                if not self.entries:
+                    return 0
+                entries, self.entries = self.entries, []
+                segments = self.retained + [self.segment]
+                self.retained, self.segment = [], None
+            try:
+                write_answers(entries, batch_size=settings.ANSWER_QUEUE_BATCH_SIZE)
+            except Exception:
+                logger.exception('Failed to write %d answers, will retry', len(entries))
+                with self.lock:
+                    self.entries[:0] = entries
+                    self.retained[:0] = segments
+                return 0
+            for segment in segments:
+                segment.remove()
+            return len(entries)
+
+    def replay(self):
+        """ Write the answers in spool segments left behind by dead processes """
+        replayed = 0
+        for path in spool_segments():
+            try:
+                file = open(path, encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            with file:
+                try:
+                    fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Still owned by a live process
+                    continue
+                # A crash mid-append can leave a partial last line
+                answers = [decode_answer(line) for line in file if line.endswith('\n')]
+                write_answers(answers, batch_size=settings.ANSWER_QUEUE_BATCH_SIZE)
+                os.unlink(path)
+            replayed += len(answers)
+        return replayed
+
+
+answer_queue = AnswerQueue()
@@ -1,11 +1,40 @@
 from django.urls import path
 from .views import (
+    AdaptiveTestView,
+    AnswerSubmitView,
+    AsyncQuestionCreateView,
+    AsyncQuestionListView,
+    BlueprintView,
+    ExamFormView,
+    ExamResultView,
+    ExamStatisticsView,
+    QuestionBulkCreateView,
     QuestionCreateView,
+    QuestionDetailView,
+    QuestionExportView,
+    QuestionFeedView,
+    QuestionKeyView,
     QuestionListView,
+    QuestionSearchView,
 )
 
 
 urlpatterns = [
     path('question/create/', QuestionCreateView.as_view(), name='question_create'),
+    path('question/bulk/', QuestionBulkCreateView.as_view(), name='question_bulk_create'),
     path('question/list/', QuestionListView.as_view(), name='question_list'),
+    path('question/mine/', QuestionFeedView.as_view(), name='question_mine'),
+    path('question/search/', QuestionSearchView.as_view(), name='question_search'),
+    path('question/export/', QuestionExportView.as_view(), name='question_export'),
+    path('question/<int:pk>/', QuestionDetailView.as_view(), name='question_detail'),
+    path('question/<int:pk>/key/', QuestionKeyView.as_view(), name='question_key'),
+    path('answer/submit/', AnswerSubmitView.as_view(), name='answer_submit'),
+    path('exam/<slug:exam>/results/', ExamResultView.as_view(), name='exam_results'),
+    path('exam/<slug:exam>/statistics/', ExamStatisticsView.as_view(), name='exam_statistics'),
+    path('exam/<slug:exam>/blueprint/', BlueprintView.as_view(), name='exam_blueprint'),
+    path('exam/<slug:exam>/form/', ExamFormView.as_view(), name='exam_form'),
+    path('exam/<slug:exam>/adaptive/', AdaptiveTestView.as_view(), name='exam_adaptive'),
+    # Async ORM versions for the ASGI deployment
+    path('async/question/create/', AsyncQuestionCreateView.as_view(), name='question_create_async'),
+    path('async/question/list/', AsyncQuestionListView.as_view(), name='question_list_async'),
 ]
@@ -1,11 +1,74 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.shortcuts import get_object_or_404
+from django.db.models.functions import Greatest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.serializers import ModelSerializer
 
-from .models import Question
-from .serializers import QuestionSerializer
+from accounts.models import User
+from cbt_core.cache import cache_response, generations_shared, get_generations
+from cbt_core.conditional import conditional_response
+from cbt_core.parsers import NDJSONParser
+from cbt_core.views import AsyncAPIView
+from .exports import EXPORT_FIELDS, RENDERERS, astream_rows, stream_rows
+from .adaptive import get_bank, next_item
+from .answers import write_answers
+from .assembly import apply_order, assemble_form, form_seed, get_pools, solve_blueprint
+from .grading import grade_exam
+from .models import AdaptiveResponse, Answer, Blueprint, Question, Result
+from .pagination import QuestionFeedPagination, QuestionPagination, ResultPagination
+from .serializers import (
+    AnswerSubmissionItemSerializer,
+    AnswerSubmissionSerializer,
+    BlueprintSerializer,
+    QuestionBulkSerializer,
+    QuestionExportSerializer,
+    QuestionKeySerializer,
+    QuestionSearchQuerySerializer,
+    QuestionSearchSerializer,
+    QuestionSerializer,
+    ResultSerializer,
+)
+from .statistics import recompute_statistics, summarize
+from .submissions import answer_queue
+
+
+def expanded_models(request):
+    """ Models other than Question that a question response shows """
+    return [User] if 'user' in QuestionSerializer.requested_expansions(request) else []
+
+
+def question_list_version(view, request):
+    """
+    The response cache generations, which every insert, update or delete
+    bumps (deletes included, unlike the newest updated_at). Lists carry no
+    Last-Modified for the same reason. Without a shared response cache each
+    worker has its own counters, which writes on other workers never move,
+    so lists get no validator at all.
+    """
+    if not generations_shared():
+        return None
+    generations = get_generations([Question] + expanded_models(request))
+    return '.'.join(str(generation) for generation in generations), None
+
+
+def question_detail_version(view, request, pk):
+    fields = ['updated_at'] + (['user__updated_at'] if expanded_models(request) else [])
+    row = Question.objects.filter(pk=pk).values_list(*fields).first()
+    if row is None:
+        return None
+    last_modified = max(row)
+    return ':'.join(value.isoformat() for value in row), last_modified
 
 
 class QuestionCreateView(APIView):
@@ -26,13 +89,398 @@ class QuestionCreateView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class QuestionBulkCreateView(APIView):
+    """ Create many questions from a JSON array or NDJSON body """
+
+    permission_classes = (IsAuthenticated,)
+    parser_classes = (JSONParser, NDJSONParser)
+    serializer_class = QuestionBulkSerializer
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        questions = serializer.save()
+        errors = [
+            {'row': index, 'errors': detail}
+            for index, detail in sorted(serializer.row_errors.items())
+        ]
+        return Response(
+            {'created': len(questions), 'errors': errors},
+            status=status.HTTP_201_CREATED if questions else status.HTTP_400_BAD_REQUEST
+        )
+
+
 class QuestionListView(APIView):
     """ List all questions """
 
+    permission_classes = (IsAdminUser,)
+    serializer_class = QuestionSerializer
+    pagination_class = QuestionPagination
+
+    @conditional_response(question_list_version)
+    @cache_response(Question, depends_on=expanded_models)
+    def get(self, request):
+        paginator = self.pagination_class()
+        queryset = self.serializer_class.only(
+            Question.objects.all(), request, *paginator.ordering)
+        questions = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.serializer_class(questions, many=True, context={'request': request})
+        data = paginator.get_paginated_data(serializer.data)
+        included = self.serializer_class.included(questions, request)
+        if included:
+            data['included'] = included
+        return Response(data)
+
+
+class QuestionFeedView(APIView):
+    """ The current user's questions, newest first """
+
+    permission_classes = (IsAuthenticated,)
+    serializer_class = QuestionSerializer
+    pagination_class = QuestionFeedPagination
+
+    # Not cached: the response cache keys on the URI, which is the same for
+    # every user
+    def get(self, request):
+        paginator = self.pagination_class()
+        queryset = self.serializer_class.only(
+            Question.objects.filter(user_id=request.user.id), request, 'created_at')
+        questions = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.serializer_class(questions, many=True, context={'request': request})
+        data = paginator.get_paginated_data(serializer.data)
+        included = self.serializer_class.included(questions, request)
+        if included:
+            data['included'] = included
+        return Response(data)
+
+
+class QuestionDetailView(APIView):
+    """ Retrieve a question, with its author side-loaded on ?expand=user """
+
     permission_classes = (IsAdminUser,)
     serializer_class = QuestionSerializer
 
+    @conditional_response(question_detail_version)
+    @cache_response(Question, depends_on=expanded_models)
+    def get(self, request, pk):
+        question = get_object_or_404(
+            self.serializer_class.only(Question.objects.all(), request), pk=pk)
+        data = self.serializer_class(question, context={'request': request}).data
+        included = self.serializer_class.included([question], request)
+        if included:
+            data['included'] = included
+        return Response(data)
+
+
+class QuestionSearchView(APIView):
+    """ Full text search over questions, best matches first """
+
+    permission_classes = (IsAdminUser,)
+    serializer_class = QuestionSearchSerializer
+
+    def get(self, request):
+        params = QuestionSearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        text = params.validated_data['q']
+
+        query = SearchQuery(text, config='english', search_type='websearch')
+        match = Q(search_vector=query)
+        rank = SearchRank(F('search_vector'), query)
+        # Short queries are often partial or misspelt words, so let the
+        # trigram index find near misses as well
+        if len(text) <= settings.QUESTION_SEARCH_FUZZY_MAX_LENGTH:
+            match |= Q(question_text__trigram_word_similar=text)
+            rank = Greatest(rank, TrigramWordSimilarity(text, 'question_text'))
+
+        questions = (
+            self.serializer_class.only(Question.objects.filter(match), request)
+            .annotate(rank=rank)
+            .order_by('-rank', 'id')[:params.validated_data['limit']]
+        )
+        serializer = self.serializer_class(questions, many=True, context={'request': request})
+        return Response({'results': serializer.data})
+
+
+class QuestionExportView(APIView):
+    """ Stream every question as NDJSON or CSV """
+
+    permission_classes = (IsAdminUser,)
+
     def get(self, request):
-        questions = Question.objects.all()
-        serializer = self.serializer_class(questions, many=True)
+        params = QuestionExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = params.validated_data
+
+        questions = Question.objects.order_by('created_at', 'id')
+        if 'created_after' in filters:
+            questions = questions.filter(created_at__gte=filters['created_after'])
+        if 'created_before' in filters:
+            questions = questions.filter(created_at__lt=filters['created_before'])
+        if 'user' in filters:
+            questions = questions.filter(user_id=filters['user'])
+        rows = questions.values_list(*EXPORT_FIELDS)
+
+        renderer = RENDERERS[filters['output']]()
+        chunk_size = settings.QUESTION_EXPORT_CHUNK_SIZE
+        # Daphne buffers sync iterators in full, so feed it an async one
+        if isinstance(request._request, ASGIRequest):
+            content = astream_rows(rows, renderer, chunk_size)
+        else:
+            content = stream_rows(rows, renderer, chunk_size)
+
+        response = StreamingHttpResponse(content, content_type=renderer.content_type)
+        response['Content-Disposition'] = 'attachment; filename="questions.%s"' % renderer.extension
+        return response
+
+
+class AnswerSubmitView(APIView):
+    """
+    Accept a candidate's answers. They are queued and written in batches, so
+    the response only means they won't be lost.
+    """
+
+    permission_classes = (IsAuthenticated,)
+    serializer_class = AnswerSubmissionSerializer
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        exam = serializer.validated_data['exam']
+        now = timezone.now()
+        answer_queue.submit([
+            Answer(
+                exam=exam,
+                user_id=request.user.id,
+                question_id=item['question'],
+                response=item['response'],
+                answered_at=now,
+            )
+            for item in serializer.validated_data['answers']
+        ])
+        return Response(
+            {'accepted': len(serializer.validated_data['answers'])},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class QuestionKeyView(APIView):
+    """ Read or set how a question is scored: answer key, points and IRT parameters """
+
+    permission_classes = (IsAdminUser,)
+    serializer_class = QuestionKeySerializer
+
+    def get(self, request, pk):
+        question = get_object_or_404(Question, pk=pk)
+        return Response(self.serializer_class(question).data)
+
+    def put(self, request, pk):
+        question = get_object_or_404(Question, pk=pk)
+        scoring = (question.answer_key, question.points)
+        serializer = self.serializer_class(question, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save()
+            # The running sums of sittings with answers to it were built
+            # with the old scoring; nobody sees the new one before they're rebuilt
+            if settings.ITEM_STATISTICS_INCREMENTAL and scoring != (question.answer_key, question.points):
+                exams = Answer.objects.filter(question=question).values_list('exam', flat=True).distinct()
+                for exam in sorted(exams):
+                    recompute_statistics(exam)
         return Response(serializer.data)
+
+
+class ExamResultView(APIView):
+    """ List the results of an exam sitting, or grade it (again) """
+
+    permission_classes = (IsAdminUser,)
+    serializer_class = ResultSerializer
+    pagination_class = ResultPagination
+
+    def get(self, request, exam):
+        paginator = self.pagination_class()
+        queryset = self.serializer_class.only(
+            Result.objects.filter(exam=exam), request, *paginator.ordering)
+        results = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.serializer_class(results, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+    def post(self, request, exam):
+        return Response(grade_exam(exam))
+
+
+class ExamStatisticsView(APIView):
+    """
+    Item analysis of an exam sitting, read from running sums kept current as
+    answers arrive. POST rebuilds them from the answers, which is needed
+    after changing an answer key or points.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, exam):
+        statistics = summarize(exam)
+        if statistics is None:
+            raise NotFound('No statistics for this exam.')
+        return Response(statistics)
+
+    def post(self, request, exam):
+        return Response(recompute_statistics(exam))
+
+
+class BlueprintView(APIView):
+    """ Read or set the blueprint an exam's forms are drawn from """
+
+    permission_classes = (IsAdminUser,)
+    serializer_class = BlueprintSerializer
+
+    def get(self, request, exam):
+        blueprint = get_object_or_404(Blueprint, exam=exam)
+        return Response(self.serializer_class(blueprint).data)
+
+    def put(self, request, exam):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        sections = serializer.validated_data['sections']
+        blueprint, _ = Blueprint.objects.update_or_create(
+            exam=exam, defaults={'sections': sections, 'pools': solve_blueprint(sections)})
+        return Response(self.serializer_class(blueprint).data)
+
+
+class ExamFormView(APIView):
+    """
+    The questions of an exam in the order the candidate gets them, with
+    shuffled options. Staff can see a candidate's form with ?user=<id>.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, exam):
+        user_id = request.user.id
+        if request.user.is_staff and 'user' in request.query_params:
+            user_id = request.query_params['user']
+            if not user_id.isdigit():
+                raise NotFound('No such candidate.')
+            user_id = int(user_id)
+
+        pools = get_pools(exam)
+        if pools is None:
+            raise NotFound('No blueprint for this exam.')
+        form = assemble_form(pools, form_seed(exam, user_id))
+        questions = Question.objects.only('question_text', 'options').in_bulk([pk for pk, _ in form])
+        return Response({
+            'exam': exam,
+            'user': user_id,
+            'questions': [
+                {
+                    'id': pk,
+                    'question_text': questions[pk].question_text,
+                    'options': apply_order(questions[pk].options, order),
+                }
+                for pk, order in form
+                if pk in questions
+            ],
+        })
+
+
+class AdaptiveTestView(APIView):
+    """
+    Adaptive test: GET returns the candidate's next question, or their final
+    ability estimate once the test is over; POST answers that question and
+    returns the next one.
+
+    Responses are kept as AdaptiveResponse rows that only this view writes,
+    one per question and never changed, and the ability estimate is only
+    shown once the test is over, so a candidate can't steer it.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get_answers(self, exam, user_id):
+        return list(
+            AdaptiveResponse.objects.filter(exam=exam, user_id=user_id)
+            .order_by('pk').values_list('question_id', 'response'))
+
+    def get(self, request, exam):
+        answers = self.get_answers(exam, request.user.id)
+        return self.respond(exam, answers, next_item(get_bank(), exam, request.user.id, answers))
+
+    def post(self, request, exam):
+        serializer = AnswerSubmissionItemSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        bank = get_bank()
+        answers = self.get_answers(exam, request.user.id)
+        expected, _, _ = next_item(bank, exam, request.user.id, answers)
+        if expected is None:
+            raise ValidationError({'question': ['The test is over.']})
+        if serializer.validated_data['question'] != expected:
+            raise ValidationError({'question': ['Expected an answer to question %d.' % expected]})
+
+        response = serializer.validated_data['response']
+        try:
+            with transaction.atomic():
+                AdaptiveResponse.objects.create(
+                    exam=exam,
+                    user_id=request.user.id,
+                    question_id=expected,
+                    response=response,
+                    answered_at=timezone.now(),
+                )
+        except IntegrityError:
+            # Another request answered it first
+            raise ValidationError({'question': ['Question %d is already answered.' % expected]})
+        answers.append((expected, response))
+        return self.respond(exam, answers, next_item(bank, exam, request.user.id, answers))
+
+    def respond(self, exam, answers, state):
+        question_id, theta, error = state
+        question = None
+        if question_id is not None:
+            question = Question.objects.only('question_text', 'options').get(pk=question_id)
+            question = {'id': question.id, 'question_text': question.question_text, 'options': question.options}
+        done = question is None
+        return Response({
+            'exam': exam,
+            'answered': len(answers),
+            'theta': theta if done else None,
+            'standard_error': error if done else None,
+            'done': done,
+            'question': question,
+        })
+
+
+class AsyncQuestionCreateView(AsyncAPIView):
+    """ Create a question with the async ORM """
+
+    permission_classes = (IsAuthenticated,)
+
+    async def post(self, request):
+        # Plain id for the author, checked below without a thread hop
+        serializer = QuestionBulkSerializer(data=self.parse_data(request))
+        if not serializer.is_valid():
+            return self.respond(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        if not await User.objects.filter(pk=data['user_id']).aexists():
+            return self.respond(
+                {'user': ['Invalid pk "%s" - object does not exist.' % data['user_id']]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        question = await Question.objects.acreate(**data)
+        return self.respond(QuestionSerializer(question).data, status=status.HTTP_201_CREATED)
+
+
+class AsyncQuestionListView(AsyncAPIView):
+    """ List questions with the async ORM """
+
+    permission_classes = (IsAdminUser,)
+    pagination_class = QuestionPagination
+
+    async def get(self, request):
+        paginator = self.pagination_class()
+        queryset = QuestionSerializer.only(Question.objects.all(), request, *paginator.ordering)
+        questions = await paginator.apaginate_queryset(queryset, request, view=self)
+        serializer = QuestionSerializer(questions, many=True, context={'request': request})
+        data = paginator.get_paginated_data(serializer.data)
+        included = QuestionSerializer.included(questions, request)
+        if included:
+            data['included'] = included
+        return self.respond(data)
@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework.test import APITestCase
@@ -258,6 +260,70 @@ class TestUsersCRUD(APITestCase):
         # print the response
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_get_users_pages(self):
+        """ Test to page through users by email """
+        for number in range(3):
+            User.objects.create_user(
+                email='user%d@gmail.com' % number,
+                password='testpassword',
+                first_name='User',
+                last_name=str(number),
+            )
+        # Add the token to the header
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token)
+        response = self.client.get(
+            reverse('user-list') + '?page_size=2',
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        # Follow the cursor to the last page
+        response = self.client.get(response.data['next'], format='json')
+        emails = [user['email'] for user in response.data['results']]
+        self.assertEqual(emails, ['user1@gmail.com', 'user2@gmail.com'])
+        self.assertIsNone(response.data['next'])
+
+    def test_get_users_fields(self):
+        """ Test to pick user fields with ?fields= """
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token)
+        response = self.client.get(reverse('user-list'), format='json')
+        self.assertNotIn('password', response.data['results'][0])
+
+        response = self.client.get(reverse('user-list') + '?fields=email,id', format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': self.user.id, 'email': self.user.email}])
+
+        response = self.client.get(
+            reverse('user-detail', kwargs={'pk': self.user.pk}) + '?fields=first_name', format='json')
+        self.assertEqual(response.data, {'first_name': self.user.first_name})
+
+        response = self.client.get(reverse('user-list') + '?fields=email,password', format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+
+    def test_get_users_query_count(self):
+        """ Test the user list doesn't query per user """
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token)
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('user-list'), format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(response.data['results']), len(queries)
+
+        # Warm the token user's status cache
+        count_queries()
+        for number in range(2):
+            User.objects.create_user(
+                email='user%d@gmail.com' % number, password='testpassword', first_name='User', last_name='X')
+        few, few_queries = count_queries()
+        for number in range(2, 10):
+            User.objects.create_user(
+                email='user%d@gmail.com' % number, password='testpassword', first_name='User', last_name='X')
+        many, many_queries = count_queries()
+        self.assertEqual(many - few, 8)
+        self.assertEqual(many_queries, few_queries)
+
     def test_get_single_user(self):
         """ Test to get single user """
         # Add the token to the header
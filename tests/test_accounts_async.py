@@ -0,0 +1,113 @@
+from django.contrib.auth.hashers import make_password
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.hashing import hashing_executor
+from accounts.models import User
+
+test_email = 'student@school.com'
+password = 'testpassword'
+
+
+class TestAsyncTokenObtainPairView(TestCase):
+    """ Test module for AsyncTokenObtainPairView """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email=test_email,
+            password=password,
+            first_name='Student',
+            last_name='User',
+        )
+
+    def login(self, email=test_email, password=password):
+        return self.client.post(
+            reverse('token_obtain_pair_async'),
+            data={'email': email, 'password': password},
+            content_type='application/json',
+        )
+
+    def test_login_valid_payload(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+        self.assertIn('refresh', response.json())
+
+    def test_login_unknown_email(self):
+        response = self.login(email='nobody@school.com')
+        self.assertEqual(response.status_code, 401)
+
+    def test_login_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.login().status_code, 401)
+
+    def test_login_missing_field(self):
+        response = self.client.post(
+            reverse('token_obtain_pair_async'),
+            data={'email': test_email},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json())
+
+    def test_login_non_string_fields(self):
+        cases = [('email', {'email': 123, 'password': password}),
+                 ('password', {'email': test_email, 'password': ['a']})]
+        for field, data in cases:
+            response = self.client.post(
+                reverse('token_obtain_pair_async'), data=data, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(list(response.json()), [field])
+
+    def test_login_rehashes_old_password(self):
+        self.user.password = make_password(password, hasher='pbkdf2_sha256')
+        self.user.save()
+        self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('argon2'))
+        self.assertTrue(self.user.check_password(password))
+
+    def test_login_overloaded(self):
+        # Every worker busy and no room left in the queue
+        with self.settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_MAX_QUEUE=0):
+            hashing_executor.in_flight += 1
+            try:
+                response = self.login()
+            finally:
+                hashing_executor.in_flight -= 1
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+class TestAsyncRegisterView(TestCase):
+    """ Test module for AsyncRegisterView """
+
+    payload = {
+        'email': test_email,
+        'password': password,
+        'first_name': 'Student',
+        'last_name': 'User',
+    }
+
+    def register(self):
+        return self.client.post(
+            reverse('register_async'), data=self.payload, content_type='application/json')
+
+    def test_register(self):
+        response = self.register()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {
+            'email': test_email, 'first_name': 'Student', 'last_name': 'User'})
+        self.assertTrue(User.objects.get(email=test_email).check_password(password))
+
+    def test_register_duplicate(self):
+        self.register()
+        response = self.register()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json())
+
+    def test_register_invalid_json(self):
+        response = self.client.post(
+            reverse('register_async'), data='{', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
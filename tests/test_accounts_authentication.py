@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import ClaimsUser, StatelessJWTAuthentication
+from accounts.models import User
+
+admin_email = 'admin@gmail.com'
+admin_password = 'adminpassword'
+
+
+class TestStatelessJWTAuthentication(TestCase):
+    """ Test module for StatelessJWTAuthentication """
+
+    def setUp(self):
+        caches[settings.TOKEN_USER_CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.super_user = User.objects.create_superuser(
+            email=admin_email,
+            password=admin_password,
+            first_name='Admin',
+            last_name='User',
+        )
+        response = self.client.post(
+            reverse('token_obtain_pair'),
+            data={'email': admin_email, 'password': admin_password},
+            format='json'
+        )
+        self.token = response.data['access']
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token)
+
+    def test_token_claims(self):
+        token = AccessToken(self.token)
+        self.assertEqual(token['email'], admin_email)
+        # Flags come from the status cache, never the token
+        self.assertNotIn('is_staff', token)
+        self.assertNotIn('is_active', token)
+
+    def test_cached_status_skips_user_query(self):
+        url = reverse('user-list')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        lookups = [
+            query['sql'] for query in queries
+            if 'WHERE "accounts_user"."id" =' in query['sql']
+        ]
+        self.assertEqual(lookups, [])
+
+    def test_deactivated_user_rejected(self):
+        self.client.get(reverse('user-list'))
+        self.super_user.is_active = False
+        self.super_user.save()
+        response = self.client.get(reverse('user-list'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_demoted_user_forbidden(self):
+        self.client.get(reverse('user-list'))
+        self.super_user.is_staff = False
+        self.super_user.save()
+        response = self.client.get(reverse('user-list'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_full_user_loaded_on_demand(self):
+        authentication = StatelessJWTAuthentication()
+        user = authentication.get_user(authentication.get_validated_token(self.token.encode()))
+        self.assertIsInstance(user, ClaimsUser)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.email, admin_email)
+            self.assertTrue(user.is_staff)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.first_name, 'Admin')
+            self.assertEqual(user.last_name, 'User')
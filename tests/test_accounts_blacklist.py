@@ -0,0 +1,197 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from accounts.blacklist import blacklist_filter
+from accounts.models import User
+from accounts.tokens import RefreshToken
+from cbt_core.bloom import BloomFilter
+
+
+class TestBloomFilter(TestCase):
+    """ Test module for BloomFilter """
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        for number in range(1000):
+            bloom.add('jti-%d' % number)
+        self.assertTrue(all('jti-%d' % number in bloom for number in range(1000)))
+        false_positives = sum('other-%d' % number in bloom for number in range(10000))
+        self.assertLess(false_positives, 300)
+        self.assertFalse(bloom.is_full)
+
+
+class TestTokenBlacklist(TestCase):
+    """ Test module for blacklist checks on token refresh """
+
+    def setUp(self):
+        blacklist_filter.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='student@school.com',
+            password='testpassword',
+            first_name='Student',
+            last_name='User',
+        )
+
+    def refresh(self, token):
+        return self.client.post(
+            reverse('token_refresh'), data={'refresh': str(token)}, format='json')
+
+    def blacklist_queries(self, queries):
+        return [
+            query['sql'] for query in queries
+            if 'token_blacklist_blacklistedtoken' in query['sql']
+        ]
+
+    def test_refresh_skips_blacklist_table(self):
+        token = RefreshToken.for_user(self.user)
+        self.refresh(token)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.blacklist_queries(queries), [])
+
+    def test_blacklisted_token_rejected(self):
+        token = RefreshToken.for_user(self.user)
+        self.refresh(token)
+        token.blacklist()
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_blacklisted_elsewhere_rejected_after_sync(self):
+        token = RefreshToken.for_user(self.user)
+        self.refresh(token)
+        # Another worker blacklists the token
+        outstanding = OutstandingToken.objects.get(jti=token['jti'])
+        BlacklistedToken.objects.create(token=outstanding)
+        with self.settings(TOKEN_BLACKLIST_SYNC_INTERVAL=0):
+            self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_late_commit_with_lower_id_synced(self):
+        early, late = RefreshToken.for_user(self.user), RefreshToken.for_user(self.user)
+        self.refresh(late)
+        # Two workers blacklist a token each; the one given the lower id
+        # commits after the filter has already seen the higher one
+        first_id = (BlacklistedToken.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        BlacklistedToken.objects.create(
+            id=first_id + 1, token=OutstandingToken.objects.get(jti=late['jti']))
+        with self.settings(TOKEN_BLACKLIST_SYNC_INTERVAL=0):
+            self.assertEqual(self.refresh(late).status_code, 401)
+            entry = BlacklistedToken.objects.create(
+                id=first_id, token=OutstandingToken.objects.get(jti=early['jti']))
+            BlacklistedToken.objects.filter(pk=entry.pk).update(
+                blacklisted_at=timezone.now() - timedelta(seconds=10))
+            self.assertTrue(blacklist_filter.might_contain(early['jti']))
+            self.assertEqual(self.refresh(early).status_code, 401)
+
+    def test_sync_counts_each_entry_once(self):
+        token = RefreshToken.for_user(self.user)
+        self.refresh(token)
+        token.blacklist()
+        with self.settings(TOKEN_BLACKLIST_SYNC_INTERVAL=0):
+            for _ in range(3):
+                blacklist_filter.might_contain(token['jti'])
+        # Once from blacklist() and once from the first sync, not per sync
+        self.assertEqual(blacklist_filter.filter.count, 2)
+
+
+class TestCompactTokenBlacklist(TestCase):
+    """ Test module for the compact_token_blacklist command """
+
+    def test_deletes_expired_tokens_only(self):
+        user = User.objects.create_user(
+            email='student@school.com',
+            password='testpassword',
+            first_name='Student',
+            last_name='User',
+        )
+        now = timezone.now()
+        for number in range(7):
+            expires_at = now - timedelta(days=1) if number % 2 else now + timedelta(days=1)
+            token = OutstandingToken.objects.create(
+                user=user, jti='jti-%d' % number, token='token', expires_at=expires_at)
+            BlacklistedToken.objects.create(token=token)
+
+        stdout = StringIO()
+        call_command('compact_token_blacklist', batch_size=2, stdout=stdout)
+        self.assertIn('Deleted 3 expired tokens', stdout.getvalue())
+        self.assertEqual(OutstandingToken.objects.count(), 4)
+        self.assertEqual(BlacklistedToken.objects.count(), 4)
+        self.assertFalse(OutstandingToken.objects.filter(expires_at__lte=now).exists())
+
+
+class TestLogoutEverywhere(TestCase):
+    """ Test module for LogoutAllView and UserLogoutView """
+
+    def setUp(self):
+        blacklist_filter.reset()
+        self.client = APIClient()
+        self.super_user = User.objects.create_superuser(
+            email='admin@gmail.com',
+            password='adminpassword',
+            first_name='Admin',
+            last_name='User',
+        )
+        self.users = [
+            User.objects.create_user(
+                email='student%d@school.com' % number,
+                password='testpassword',
+                first_name='Student',
+                last_name=str(number),
+            )
+            for number in range(3)
+        ]
+        # Several sessions per user
+        self.tokens = {
+            user.id: [RefreshToken.for_user(user) for _ in range(3)]
+            for user in self.users
+        }
+
+    def refresh(self, token):
+        return self.client.post(
+            reverse('token_refresh'), data={'refresh': str(token)}, format='json')
+
+    def test_logout_all(self):
+        user = self.users[0]
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(user)))
+        response = self.client.post(reverse('logout-all'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['revoked'], 3)
+        for token in self.tokens[user.id]:
+            self.assertEqual(self.refresh(token).status_code, 401)
+        # Other users keep their sessions
+        self.assertEqual(self.refresh(self.tokens[self.users[1].id][0]).status_code, 200)
+
+    def test_logout_cohort(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(self.super_user)))
+        cohort = [self.users[0].id, self.users[1].id]
+        with self.settings(TOKEN_REVOKE_BATCH_SIZE=1):
+            response = self.client.post(
+                reverse('user-logout'), data={'users': cohort}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['revoked'], 6)
+        self.assertEqual(BlacklistedToken.objects.count(), 6)
+        # Revoking again finds nothing left to do
+        response = self.client.post(
+            reverse('user-logout'), data={'users': cohort}, format='json')
+        self.assertEqual(response.data['revoked'], 0)
+
+    def test_logout_cohort_not_admin(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(self.users[0])))
+        response = self.client.post(
+            reverse('user-logout'), data={'users': [self.users[1].id]}, format='json')
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,124 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.hashing import hashing_executor
+from accounts.models import User
+from accounts import roster as roster_module
+from accounts.roster import import_roster
+
+roster_csv = (
+    'email,password,first_name,last_name\n'
+    'student1@school.com,testpassword,Student,One\n'
+    'student2@school.com,testpassword,Student,Two\n'
+    'not-an-email,testpassword,Student,Three\n'
+    'student1@school.com,testpassword,Student,Again\n'
+    'admin@gmail.com,testpassword,Admin,Again\n'
+)
+
+
+class TestUserImport(TestCase):
+    """ Test module for UserImportView """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.super_user = User.objects.create_superuser(
+            email='admin@gmail.com',
+            password='adminpassword',
+            first_name='Admin',
+            last_name='User',
+        )
+        token = str(AccessToken.for_user(self.super_user))
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+
+    def test_import_csv(self):
+        response = self.client.generic(
+            'POST', reverse('user-import'), roster_csv, content_type='text/csv')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        # Invalid email, duplicate in the roster and existing user
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3, 4])
+        user = User.objects.get(email='student2@school.com')
+        self.assertTrue(user.check_password('testpassword'))
+
+    def test_import_uses_hashing_executor(self):
+        # No process pool per request, whatever the roster size
+        with self.settings(ROSTER_IMPORT_POOL_THRESHOLD=1), \
+                mock.patch.object(roster_module, 'ProcessPoolExecutor', side_effect=AssertionError), \
+                mock.patch.object(hashing_executor, 'map', wraps=hashing_executor.map) as hashing:
+            response = self.client.generic(
+                'POST', reverse('user-import'), roster_csv, content_type='text/csv')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(hashing.call_count, 1)
+        self.assertTrue(User.objects.get(email='student1@school.com').check_password('testpassword'))
+
+    def test_import_json(self):
+        roster = [
+            {'email': 'student%d@school.com' % number, 'first_name': 'Student', 'last_name': str(number)}
+            for number in range(5)
+        ]
+        with self.settings(ROSTER_IMPORT_BATCH_SIZE=2):
+            response = self.client.post(reverse('user-import'), data=roster, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 5)
+        # No password in the roster means the user cannot log in yet
+        self.assertFalse(User.objects.get(email='student0@school.com').has_usable_password())
+
+    def test_import_concurrent_registrations(self):
+        roster = [
+            {'email': 'student%d@school.com' % number, 'first_name': 'Student', 'last_name': str(number)}
+            for number in range(3)
+        ]
+        hash_passwords = roster_module.hash_passwords
+
+        def register_then_hash(*args, **kwargs):
+            # Another import takes two of the emails after they were checked
+            for email in ('student0@school.com', 'student2@school.com'):
+                User.objects.create_user(email=email, first_name='Other', last_name='Import')
+            return hash_passwords(*args, **kwargs)
+
+        with mock.patch.object(roster_module, 'hash_passwords', side_effect=register_then_hash):
+            result = import_roster(roster)
+        self.assertEqual(result['created'], 1)
+        self.assertEqual([error['row'] for error in result['errors']], [0, 2])
+        self.assertEqual(User.objects.get(email='student1@school.com').last_name, '1')
+
+    def test_import_unexplained_conflict(self):
+        roster = [{'email': 'student@school.com', 'first_name': 'Student', 'last_name': 'One'}]
+        with mock.patch.object(User.objects, 'bulk_create', side_effect=IntegrityError):
+            result = import_roster(roster)
+        self.assertEqual(result['created'], 0)
+        self.assertEqual(result['errors'][0]['errors'], {'non_field_errors': ['User could not be created.']})
+
+    def test_import_not_admin(self):
+        user = User.objects.create_user(
+            email='student@school.com', password='testpassword',
+            first_name='Student', last_name='User')
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(user)))
+        response = self.client.post(reverse('user-import'), data=[], format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class TestImportRosterCommand(TestCase):
+    """ Test module for the import_roster management command """
+
+    def test_import_roster_process_pool(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as roster:
+            roster.write(roster_csv)
+        self.addCleanup(os.remove, roster.name)
+
+        stdout, stderr = StringIO(), StringIO()
+        with self.settings(ROSTER_IMPORT_POOL_THRESHOLD=1):
+            call_command('import_roster', roster.name, workers=2, stdout=stdout, stderr=stderr)
+        self.assertIn('Created 3 users, skipped 2 rows', stdout.getvalue())
+        self.assertIn('Row 2: email:', stderr.getvalue())
+        user = User.objects.get(email='admin@gmail.com')
+        self.assertTrue(user.check_password('testpassword'))
@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from cbtforms.models import Question
+
+
+class TestAsyncViews(TestCase):
+    """ Test module for the async ORM question and user views """
+
+    def setUp(self):
+        caches[settings.TOKEN_USER_CACHE_ALIAS].clear()
+        self.super_user = User.objects.create_superuser(
+            email='admin@gmail.com',
+            password='adminpassword',
+            first_name='Admin',
+            last_name='User',
+        )
+        self.user = User.objects.create_user(
+            email='author@gmail.com',
+            password='testpassword',
+            first_name='Author',
+            last_name='User',
+        )
+        self.admin_headers = {'Authorization': 'Bearer ' + str(AccessToken.for_user(self.super_user))}
+        self.user_headers = {'Authorization': 'Bearer ' + str(AccessToken.for_user(self.user))}
+
+    async def test_create_question(self):
+        response = await self.async_client.post(
+            reverse('question_create_async'),
+            data={'question_text': 'What is the capital of Texas?', 'user': self.user.id},
+            content_type='application/json',
+            headers=self.user_headers,
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['user'], self.user.id)
+        self.assertTrue(await Question.objects.filter(user=self.user).aexists())
+
+    async def test_create_question_unknown_user(self):
+        response = await self.async_client.post(
+            reverse('question_create_async'),
+            data={'question_text': 'What is the capital of Texas?', 'user': self.user.id + 100},
+            content_type='application/json',
+            headers=self.user_headers,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('user', response.json())
+
+    async def test_create_question_unauthorized(self):
+        response = await self.async_client.post(
+            reverse('question_create_async'),
+            data={'question_text': 'What is the capital of Texas?', 'user': self.user.id},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+
+    async def test_list_questions(self):
+        for number in range(3):
+            await Question.objects.acreate(question_text='Question %d' % number, user=self.user)
+        response = await self.async_client.get(
+            reverse('question_list_async'), {'page_size': 2}, headers=self.admin_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+        response = await self.async_client.get(response.json()['next'], headers=self.admin_headers)
+        self.assertEqual([question['question_text'] for question in response.json()['results']], ['Question 2'])
+
+    async def test_list_questions_not_admin(self):
+        response = await self.async_client.get(
+            reverse('question_list_async'), headers=self.user_headers)
+        self.assertEqual(response.status_code, 403)
+
+    async def test_user_detail(self):
+        response = await self.async_client.get(
+            reverse('user-detail-async', kwargs={'pk': self.user.pk}), headers=self.user_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['email'], 'author@gmail.com')
+        self.assertEqual(response.json()['groups'], [])
+
+    async def test_user_detail_missing(self):
+        response = await self.async_client.get(
+            reverse('user-detail-async', kwargs={'pk': self.user.pk + 100}), headers=self.user_headers)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_user_list(self):
+        response = await self.async_client.get(reverse('user-list-async'), headers=self.admin_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [user['email'] for user in response.json()['results']],
+            ['admin@gmail.com', 'author@gmail.com'])
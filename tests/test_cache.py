@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from cbt_core import cache as response_cache
+from cbtforms.models import Question
+
+
+class TestResponseCache(TestCase):
+    """ Test module for the versioned response cache """
+
+    def setUp(self):
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.super_user = User.objects.create_superuser(
+            email='admin@gmail.com',
+            password='adminpassword',
+            first_name='Admin',
+            last_name='User',
+        )
+        token = str(AccessToken.for_user(self.super_user))
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+        Question.objects.create(question_text='First question', user=self.super_user)
+
+    def test_question_list_hit_skips_queries(self):
+        hits = response_cache.stats['QuestionListView']['hits']
+        self.client.get(reverse('question_list'))
+        # The conditional GET check needs no query either
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('question_list'))
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response_cache.stats['QuestionListView']['hits'], hits + 1)
+
+    def test_question_list_invalidated_on_save(self):
+        self.client.get(reverse('question_list'))
+        Question.objects.create(question_text='Second question', user=self.super_user)
+        response = self.client.get(reverse('question_list'))
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_question_list_invalidated_on_delete(self):
+        self.client.get(reverse('question_list'))
+        Question.objects.all().delete()
+        response = self.client.get(reverse('question_list'))
+        self.assertEqual(response.data['results'], [])
+
+    def test_question_list_invalidated_on_bulk_create(self):
+        self.client.get(reverse('question_list'))
+        self.client.post(
+            reverse('question_bulk_create'),
+            data=[{'question_text': 'Bulk question', 'user': self.super_user.id}],
+            format='json')
+        response = self.client.get(reverse('question_list'))
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_user_detail_invalidated_on_update(self):
+        url = reverse('user-detail', kwargs={'pk': self.super_user.pk})
+        self.client.get(url)
+        self.super_user.first_name = 'Renamed'
+        self.super_user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.data['first_name'], 'Renamed')
@@ -0,0 +1,128 @@
+import datetime
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from cbtforms.models import Question
+
+
+class TestConditionalGet(TestCase):
+    """ Test module for ETag and Last-Modified support """
+
+    def setUp(self):
+        # Generation counters are only trusted in a cache every worker shares
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        shared = override_settings(CACHES={
+            **settings.CACHES,
+            settings.RESPONSE_CACHE_ALIAS: {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': cache_dir,
+            },
+        })
+        shared.enable()
+        self.addCleanup(shared.disable)
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.super_user = User.objects.create_superuser(
+            email='admin@gmail.com',
+            password='adminpassword',
+            first_name='Admin',
+            last_name='User',
+        )
+        token = str(AccessToken.for_user(self.super_user))
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+        self.question = Question.objects.create(
+            question_text='First question', user=self.super_user)
+
+    def test_question_list_not_modified(self):
+        response = self.client.get(reverse('question_list'))
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        # Deletes don't move a collection's newest update
+        self.assertNotIn('Last-Modified', response)
+
+        response = self.client.get(reverse('question_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_question_list_modified(self):
+        etag = self.client.get(reverse('question_list'))['ETag']
+        self.question.question_text = 'Edited question'
+        self.question.save()
+        response = self.client.get(reverse('question_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_question_list_etag_per_page(self):
+        first = self.client.get(reverse('question_list'))['ETag']
+        second = self.client.get(reverse('question_list') + '?page_size=1')['ETag']
+        self.assertNotEqual(first, second)
+
+    def test_question_list_deleted(self):
+        etag = self.client.get(reverse('question_list'))['ETag']
+        Question.objects.create(question_text='Second question', user=self.super_user)
+        etag = self.client.get(reverse('question_list'))['ETag']
+        self.question.delete()
+        response = self.client.get(
+            reverse('question_list'),
+            HTTP_IF_NONE_MATCH=etag,
+            HTTP_IF_MODIFIED_SINCE=http_date(self.question.updated_at.timestamp() + 60))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_question_list_per_process_cache(self):
+        with override_settings(CACHES={**settings.CACHES, settings.RESPONSE_CACHE_ALIAS: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}):
+            response = self.client.get(reverse('question_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+    def test_question_list_no_queries(self):
+        etag = self.client.get(reverse('question_list'))['ETag']
+        # The token user's status is cached by now
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('question_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_user_detail_not_modified(self):
+        url = reverse('user-detail', kwargs={'pk': self.super_user.pk})
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.super_user.first_name = 'Renamed'
+        self.super_user.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_user_detail_if_modified_since(self):
+        url = reverse('user-detail', kwargs={'pk': self.super_user.pk})
+        User.objects.filter(pk=self.super_user.pk).update(
+            updated_at=self.super_user.updated_at - datetime.timedelta(minutes=5))
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        self.super_user.first_name = 'Renamed'
+        self.super_user.save()
+        # Still the second of the save, however long the test takes
+        with mock.patch('cbt_core.conditional.time') as clock:
+            clock.time.return_value = self.super_user.updated_at.timestamp()
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        # Changed this very second: another edit could follow within it
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_user_detail_missing(self):
+        url = reverse('user-detail', kwargs={'pk': self.super_user.pk + 100})
+        self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,169 @@
+from unittest import mock
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from cbtforms.adaptive import ItemBank, get_bank, refresh_bank
+from cbtforms.answers import write_answers
+from cbtforms.models import AdaptiveResponse, Answer, Question
+from cbtforms.views import AdaptiveTestView
+
+
+class TestAdaptiveTesting(TestCase):
+    """ Test module for the adaptive testing engine """
+
+    def setUp(self):
+        caches[settings.TOKEN_USER_CACHE_ALIAS].clear()
+        self.super_user = User.objects.create_superuser(
+            email='admin@gmail.com',
+            password='adminpassword',
+            first_name='Admin',
+            last_name='User',
+        )
+        self.candidate = User.objects.create_user(
+            email='candidate@gmail.com',
+            password='testpassword',
+            first_name='Candidate',
+            last_name='User',
+        )
+        self.questions = [
+            Question.objects.create(
+                question_text='Question %d' % index, user=self.super_user, answer_key={'A': 1},
+                options=['A', 'B', 'C', 'D'], irt_a=1.5, irt_b=-3 + index * 0.2, irt_c=0.2)
+            for index in range(31)
+        ]
+        # Uncalibrated questions stay out of the bank
+        Question.objects.create(question_text='Essay', user=self.super_user, answer_key={'A': 1})
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(self.candidate)))
+        self.url = reverse('exam_adaptive', kwargs={'exam': 'placement-2024'})
+        # This test's questions; a background refresh couldn't see them
+        refresh_bank()
+
+    def test_bank(self):
+        bank = get_bank()
+        self.assertEqual(len(bank), 31)
+        theta, error = bank.estimate([], [])
+        self.assertAlmostEqual(theta, 0, places=5)
+        self.assertAlmostEqual(error, 1, places=2)
+        # Right answers to hard items move the estimate up, wrong ones down
+        hard = [bank.index[question.id] for question in self.questions[-5:]]
+        self.assertGreater(bank.estimate(hard, [1] * 5)[0], 1)
+        self.assertLess(bank.estimate(hard, [0] * 5)[0], 0)
+
+    @override_settings(CAT_ESTIMATOR='mle')
+    def test_mle(self):
+        bank = get_bank()
+        columns = [bank.index[question.id] for question in self.questions[10:20]]
+        theta, error = bank.estimate(columns, [1, 0] * 5)
+        self.assertLess(abs(theta), 1)
+        self.assertGreater(error, 0)
+
+    @override_settings(CAT_RANDOMESQUE=1)
+    def test_selects_most_informative_item(self):
+        bank = get_bank()
+        column = bank.select(0, [], np.random.default_rng(0))
+        self.assertEqual(column, int(bank.information[bank.theta.size // 2].argmax()))
+        self.assertNotEqual(bank.select(0, [column], np.random.default_rng(0)), column)
+
+    def test_bank_reloads_on_question_change(self):
+        bank = get_bank()
+        self.assertIs(refresh_bank(), bank)
+        self.questions[0].irt_a = None
+        self.questions[0].save()
+        self.assertEqual(len(refresh_bank()), 30)
+        Question.objects.filter(pk=self.questions[1].pk).delete()
+        self.assertEqual(len(refresh_bank()), 29)
+
+    def test_bank_refreshes_off_the_request_path(self):
+        bank = get_bank()
+        self.questions[0].irt_a = None
+        self.questions[0].save()
+        with mock.patch('cbtforms.adaptive.threading.Thread') as thread:
+            self.assertIs(get_bank(), bank)
+            thread.assert_not_called()
+            with override_settings(CAT_BANK_CHECK_INTERVAL=0):
+                self.assertIs(get_bank(), bank)
+                # One refresh at a time
+                self.assertIs(get_bank(), bank)
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once()
+        # Run here, where this test's questions are visible, and keep the connection
+        with mock.patch('cbtforms.adaptive.connection'):
+            thread.call_args.kwargs['target']()
+        self.assertEqual(len(get_bank()), 30)
+
+    @override_settings(CAT_MIN_ITEMS=3, CAT_MAX_ITEMS=6, CAT_TARGET_SE=0.01)
+    def test_adaptive_session(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['done'])
+        # Asking again without answering gives the same question
+        self.assertEqual(self.client.get(self.url).data['question'], response.data['question'])
+
+        seen = set()
+        while not response.data['done']:
+            question = response.data['question']['id']
+            self.assertNotIn(question, seen)
+            self.assertIsNone(response.data['theta'])
+            seen.add(question)
+            response = self.client.post(self.url, {'question': question, 'response': 'A'}, format='json')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['answered'], 6)
+        self.assertGreater(response.data['theta'], 1)
+        self.assertEqual(AdaptiveResponse.objects.filter(exam='placement-2024', user=self.candidate).count(), 6)
+
+        response = self.client.post(self.url, {'question': self.questions[0].id, 'response': 'A'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_must_answer_current_question(self):
+        current = self.client.get(self.url).data['question']['id']
+        other = next(question.id for question in self.questions if question.id != current)
+        response = self.client.post(self.url, {'question': other, 'response': 'A'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(AdaptiveResponse.objects.exists())
+
+    def test_ignores_answers_written_elsewhere(self):
+        current = self.client.get(self.url).data['question']['id']
+        # As if sent through answer submission or an exam session
+        write_answers([
+            Answer(exam='placement-2024', user=self.candidate, question=question, response='A',
+                   answered_at=timezone.now())
+            for question in self.questions
+        ])
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['answered'], 0)
+        self.assertEqual(response.data['question']['id'], current)
+
+    def test_answers_are_final(self):
+        current = self.client.get(self.url).data['question']['id']
+        self.client.post(self.url, {'question': current, 'response': 'B'}, format='json')
+        # A second request that read the answers before the first wrote
+        with mock.patch.object(AdaptiveTestView, 'get_answers', return_value=[]):
+            response = self.client.post(self.url, {'question': current, 'response': 'A'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(AdaptiveResponse.objects.get().response, 'B')
+
+    def test_item_bank_shapes(self):
+        bank = ItemBank(np.arange(3), [{}] * 3, np.ones(3), np.zeros(3), np.zeros(3))
+        self.assertEqual(bank.information.shape, (settings.CAT_THETA_GRID[2], 3))
+        # 2PL information peaks at a² / 4 where ability equals difficulty
+        self.assertAlmostEqual(float(bank.information[bank.theta.size // 2, 0]), 0.25, places=5)
+
+    def test_steep_items_stay_finite(self):
+        # σ rounds to exactly 0 and 1 across most of the grid
+        bank = ItemBank(np.arange(2), [{}] * 2, np.array([1000.0, 1000.0]), np.zeros(2), np.array([0, 0.2]))
+        self.assertTrue(np.isfinite(bank.log_p).all() and np.isfinite(bank.log_q).all())
+        self.assertTrue(np.isfinite(bank.information).all())
+        for credits in ([0, 0], [1, 0], [1, 1]):
+            theta, error = bank.estimate([0, 1], credits)
+            self.assertTrue(np.isfinite(theta) and np.isfinite(error))
+        with override_settings(CAT_ESTIMATOR='mle'):
+            self.assertTrue(np.isfinite(bank.estimate([0, 1], [1, 0])[0]))
@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from cbtforms.models import Answer, Question
+from cbtforms.submissions import AnswerQueue, answer_queue, encode_answer
+
+
+@override_settings(ANSWER_QUEUE_FLUSH_INTERVAL=60)
+class TestAnswerSubmission(TransactionTestCase):
+    """
+    Test module for write-behind answer submission. The flusher thread has
+    its own database connection, so this can't run in a transaction.
+    """
+
+    def setUp(self):
+        caches[settings.TOKEN_USER_CACHE_ALIAS].clear()
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir)
+        spool = override_settings(ANSWER_SPOOL_DIR=self.spool_dir)
+        spool.enable()
+        self.addCleanup(spool.disable)
+
+        self.user = User.objects.create_user(
+            email='candidate@gmail.com',
+            password='testpassword',
+            first_name='Candidate',
+            last_name='User',
+        )
+        self.question = Question.objects.create(question_text='What is the capital of Texas?', user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(self.user)))
+
+    def tearDown(self):
+        answer_queue.flush()
+
+    def submit(self, answers):
+        return self.client.post(
+            reverse('answer_submit'), {'exam': 'biology-2024', 'answers': answers}, format='json')
+
+    def test_submit_is_written_on_flush(self):
+        response = self.submit([
+            {'question': self.question.id, 'response': 'Dallas'},
+            {'question': self.question.id, 'response': 'Austin'},
+        ])
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data, {'accepted': 2})
+        self.assertFalse(Answer.objects.exists())
+        self.assertEqual(len(os.listdir(self.spool_dir)), 1)
+
+        self.assertEqual(answer_queue.flush(), 2)
+        # Coalesced into the candidate's last answer
+        self.assertEqual(list(Answer.objects.values_list('exam', 'response')), [('biology-2024', 'Austin')])
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_unknown_question_is_dropped(self):
+        self.submit([
+            {'question': self.question.id, 'response': 'Austin'},
+            {'question': self.question.id + 1, 'response': 'B'},
+        ])
+        answer_queue.flush()
+        self.assertEqual(Answer.objects.count(), 1)
+
+    def test_invalid_submission(self):
+        response = self.submit([{'question': 'first', 'response': 'Austin'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(answer_queue), 0)
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        self.assertEqual(self.submit([{'question': self.question.id, 'response': 'Austin'}]).status_code, 401)
+
+    @override_settings(ANSWER_QUEUE_SIZE=1)
+    def test_full_queue(self):
+        response = self.submit([
+            {'question': self.question.id, 'response': 'Austin'},
+            {'question': self.question.id, 'response': 'Dallas'},
+        ])
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_replay_orphaned_segment(self):
+        answer = Answer(
+            exam='biology-2024',
+            user_id=self.user.id,
+            question_id=self.question.id,
+            response='Austin',
+            answered_at=timezone.now(),
+        )
+        path = os.path.join(self.spool_dir, 'answers-1-1-0.ndjson')
+        with open(path, 'w') as file:
+            # The process died halfway through its second append
+            file.write(encode_answer(answer) + encode_answer(answer)[:20])
+
+        self.assertEqual(answer_queue.replay(), 1)
+        self.assertEqual(Answer.objects.get().response, 'Austin')
+        self.assertFalse(os.path.exists(path))
+
+    def test_resume_replays_orphaned_segment(self):
+        queue = AnswerQueue()
+        self.assertFalse(queue.resume())
+        self.assertIsNone(queue.thread)
+
+        path = os.path.join(self.spool_dir, 'answers-1-1-0.ndjson')
+        with open(path, 'w') as file:
+            file.write(encode_answer(Answer(
+                exam='biology-2024',
+                user_id=self.user.id,
+                question_id=self.question.id,
+                response='Austin',
+                answered_at=timezone.now(),
+            )))
+        self.assertTrue(queue.resume())
+        for _ in range(100):
+            if not os.path.exists(path):
+                break
+            time.sleep(0.05)
+        self.assertEqual(Answer.objects.get().response, 'Austin')
+        self.assertFalse(os.path.exists(path))
@@ -0,0 +1,137 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from cbtforms.assembly import assemble_form, form_seed, get_pools, solve_blueprint
+from cbtforms.models import Blueprint, Question
+
+
+class TestFormAssembly(TestCase):
+    """ Test module for blueprints and per-candidate forms """
+
+    def setUp(self):
+        caches[settings.TOKEN_USER_CACHE_ALIAS].clear()
+        self.super_user = User.objects.create_superuser(
+            email='admin@gmail.com',
+            password='adminpassword',
+            first_name='Admin',
+            last_name='User',
+        )
+        self.candidate = User.objects.create_user(
+            email='candidate@gmail.com',
+            password='testpassword',
+            first_name='Candidate',
+            last_name='User',
+        )
+        for index in range(20):
+            Question.objects.create(
+                question_text='Question %d' % index,
+                user=self.super_user,
+                topic='algebra' if index % 2 else 'geometry',
+                difficulty=1 + index % 3,
+                options=['A%d' % index, 'B%d' % index, 'C%d' % index, 'D%d' % index],
+            )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(self.super_user)))
+        self.sections = [
+            {'topic': 'algebra', 'difficulty': None, 'count': 4},
+            {'topic': None, 'difficulty': 1, 'count': 3},
+        ]
+
+    def put_blueprint(self, sections):
+        return self.client.put(
+            reverse('exam_blueprint', kwargs={'exam': 'biology-2024'}), {'sections': sections}, format='json')
+
+    def test_blueprint_pools_are_disjoint(self):
+        response = self.put_blueprint(self.sections)
+        self.assertEqual(response.status_code, 200)
+        pools = get_pools('biology-2024')
+        first, second = ({pk for pk, _ in section['pool']} for section in pools)
+        self.assertFalse(first & second)
+        self.assertTrue(all(question.topic == 'algebra' for question in Question.objects.filter(pk__in=first)))
+        self.assertTrue(all(question.difficulty == 1 for question in Question.objects.filter(pk__in=second)))
+
+    def test_pools_follow_other_processes(self):
+        self.put_blueprint(self.sections)
+        self.assertEqual(len(get_pools('biology-2024')), 2)
+        # A write that sends no signal here, as from another process
+        Blueprint.objects.filter(exam='biology-2024').update(pools=[])
+        self.assertEqual(get_pools('biology-2024'), [])
+        self.assertIsNone(get_pools('chemistry-2024'))
+
+    def test_unsatisfiable_blueprint(self):
+        response = self.put_blueprint([{'topic': 'algebra', 'difficulty': 3, 'count': 5}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('sections', response.data)
+
+    def test_overlapping_sections_are_both_filled(self):
+        # The broad section must leave the only difficulty 1 question to the
+        # narrow one, whichever it sees first
+        Question.objects.all().delete()
+        first = Question.objects.create(question_text='Q1', user=self.super_user, topic='x', difficulty=1)
+        second = Question.objects.create(question_text='Q2', user=self.super_user, topic='x', difficulty=2)
+        sections = [
+            {'topic': 'x', 'difficulty': None, 'count': 1},
+            {'topic': 'x', 'difficulty': 1, 'count': 1},
+        ]
+        self.assertEqual(solve_blueprint(sections), [
+            {'count': 1, 'pool': [[second.pk, 0]]},
+            {'count': 1, 'pool': [[first.pk, 0]]},
+        ])
+
+    def test_every_count_met_when_possible(self):
+        # 20 questions: topics alternate, difficulties cycle 1-3
+        sections = [
+            {'topic': None, 'difficulty': None, 'count': 6},
+            {'topic': 'algebra', 'difficulty': None, 'count': 5},
+            {'topic': None, 'difficulty': 1, 'count': 4},
+            {'topic': 'geometry', 'difficulty': 2, 'count': 3},
+        ]
+        pools = [{pk for pk, _ in section['pool']} for section in solve_blueprint(sections)]
+        self.assertEqual(sum(len(pool) for pool in pools), 20)
+        self.assertEqual(len(set().union(*pools)), 20)
+        self.assertTrue(all(len(pool) >= section['count'] for pool, section in zip(pools, sections)))
+        sections[0]['count'] = 9
+        with self.assertRaises(ValidationError):
+            solve_blueprint(sections)
+
+    def test_forms_are_deterministic_per_candidate(self):
+        self.put_blueprint(self.sections)
+        pools = get_pools('biology-2024')
+        form = assemble_form(pools, form_seed('biology-2024', self.candidate.id))
+        self.assertEqual(form, assemble_form(pools, form_seed('biology-2024', self.candidate.id)))
+        self.assertEqual(len(form), 7)
+        self.assertEqual(len({pk for pk, _ in form}), 7)
+        self.assertTrue(all(sorted(order) == [0, 1, 2, 3] for _, order in form))
+        others = [assemble_form(pools, form_seed('biology-2024', user_id)) for user_id in range(1000, 1010)]
+        self.assertTrue(any(other != form for other in others))
+
+    def test_candidate_form(self):
+        self.put_blueprint(self.sections)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(self.candidate)))
+        url = reverse('exam_form', kwargs={'exam': 'biology-2024'})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['questions']), 7)
+        question = response.data['questions'][0]
+        index = Question.objects.get(pk=question['id']).question_text.split()[-1]
+        self.assertEqual(sorted(question['options']), ['%s%s' % (letter, index) for letter in 'ABCD'])
+        # Candidates can't ask for somebody else's form
+        self.assertEqual(self.client.get(url, {'user': self.super_user.id}).data['user'], self.candidate.id)
+        self.assertEqual(self.client.get(url).data, response.data)
+
+    def test_staff_see_candidate_form(self):
+        self.put_blueprint(self.sections)
+        url = reverse('exam_form', kwargs={'exam': 'biology-2024'})
+        staff_view = self.client.get(url, {'user': self.candidate.id}).data
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(self.candidate)))
+        self.assertEqual(self.client.get(url).data, staff_view)
+
+    def test_no_blueprint(self):
+        response = self.client.get(reverse('exam_form', kwargs={'exam': 'chemistry-2024'}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from cbtforms.models import Question
+
+
+class TestQuestionExport(TestCase):
+    """ Test module for QuestionExportView """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.super_user = User.objects.create_superuser(
+            email='admin@gmail.com',
+            password='adminpassword',
+            first_name='Admin',
+            last_name='User',
+        )
+        self.user = User.objects.create_user(
+            email='author@gmail.com',
+            password='testpassword',
+            first_name='Author',
+            last_name='User',
+        )
+        self.token = str(AccessToken.for_user(self.super_user))
+        for number in range(3):
+            Question.objects.create(question_text='Question %d' % number, user=self.user)
+        Question.objects.create(question_text='Admin question', user=self.super_user)
+
+    def export(self, query=''):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token)
+        response = self.client.get(reverse('question_export') + query)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        rows = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]['question_text'], 'Question 0')
+        self.assertEqual(rows[0]['user'], self.user.id)
+
+    def test_export_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('?output=csv'))))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[-1]['question_text'], 'Admin question')
+
+    def test_export_filter_user(self):
+        lines = self.export('?user=%d' % self.super_user.id).splitlines()
+        self.assertEqual(len(lines), 1)
+
+    def test_export_invalid_filter(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token)
+        response = self.client.get(reverse('question_export') + '?created_after=yesterday')
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_not_admin(self):
+        token = str(AccessToken.for_user(self.user))
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+        response = self.client.get(reverse('question_export'))
+        self.assertEqual(response.status_code, 403)
+
+    async def test_export_asgi(self):
+        response = await self.async_client.get(
+            reverse('question_export'),
+            headers={'Authorization': 'Bearer ' + self.token},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(content.splitlines()), 4)
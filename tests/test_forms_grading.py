@@ -0,0 +1,124 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from cbtforms.grading import ResponseMatrix, grade_exam
+from cbtforms.models import Answer, Question, Result
+
+
+class TestGrading(TestCase):
+    """ Test module for grading exam sittings """
+
+    def setUp(self):
+        caches[settings.TOKEN_USER_CACHE_ALIAS].clear()
+        self.super_user = User.objects.create_superuser(
+            email='admin@gmail.com',
+            password='adminpassword',
+            first_name='Admin',
+            last_name='User',
+        )
+        self.candidates = [
+            User.objects.create_user(
+                email='candidate%d@gmail.com' % index,
+                password='testpassword',
+                first_name='Candidate',
+                last_name='User',
+            )
+            for index in range(3)
+        ]
+        self.capital = Question.objects.create(
+            question_text='What is the capital of Texas?', user=self.super_user,
+            answer_key={'Austin': 1, 'Houston': 0.5}, points=2)
+        self.river = Question.objects.create(
+            question_text='Which river borders Texas?', user=self.super_user,
+            answer_key={'Rio Grande': 1})
+        self.essay = Question.objects.create(
+            question_text='Describe Texas.', user=self.super_user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(self.super_user)))
+
+        responses = [
+            {self.capital: 'Austin', self.river: 'Rio Grande', self.essay: 'Big'},
+            {self.capital: 'Houston', self.river: 'Red River'},
+            {self.river: 'Rio Grande'},
+        ]
+        Answer.objects.bulk_create([
+            Answer(exam='biology-2024', user=candidate, question=question, response=response,
+                   answered_at=timezone.now())
+            for candidate, answers in zip(self.candidates, responses)
+            for question, response in answers.items()
+        ])
+
+    def scores(self):
+        return {
+            result.user_id: (result.score, result.max_score)
+            for result in Result.objects.filter(exam='biology-2024')
+        }
+
+    def test_response_matrix(self):
+        matrix = ResponseMatrix.load('biology-2024')
+        self.assertEqual(matrix.choices.shape, (3, 3))
+        column = matrix.questions.tolist().index(self.river.id)
+        row = matrix.users.tolist().index(self.candidates[1].id)
+        self.assertEqual(matrix.options[column][matrix.choices[row, column]], 'Red River')
+        row = matrix.users.tolist().index(self.candidates[2].id)
+        self.assertEqual(matrix.choices[row, matrix.questions.tolist().index(self.capital.id)], -1)
+
+    def test_grade_exam(self):
+        summary = grade_exam('biology-2024')
+        self.assertEqual(summary['candidates'], 3)
+        self.assertEqual(summary['questions'], 2)
+        self.assertEqual(summary['ungraded_questions'], 1)
+        self.assertEqual(self.scores(), {
+            self.candidates[0].id: (3, 3),
+            self.candidates[1].id: (1, 3),
+            self.candidates[2].id: (1, 3),
+        })
+
+    def test_regrade_updates_results(self):
+        grade_exam('biology-2024')
+        self.capital.answer_key = {'Houston': 1}
+        self.capital.save()
+        grade_exam('biology-2024')
+        self.assertEqual(Result.objects.count(), 3)
+        self.assertEqual(self.scores()[self.candidates[1].id], (2, 3))
+
+    def test_grade_command(self):
+        out = StringIO()
+        call_command('grade_exam', 'biology-2024', stdout=out)
+        self.assertIn('Graded 3 candidates on 2 questions', out.getvalue())
+        self.assertEqual(Result.objects.count(), 3)
+
+    def test_grade_and_list_results(self):
+        url = reverse('exam_results', kwargs={'exam': 'biology-2024'})
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['max_score'], 3)
+
+        response = self.client.get(url, {'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['user'] for row in response.data['results']], [self.candidates[2].id])
+
+    def test_set_answer_key(self):
+        url = reverse('question_key', kwargs={'pk': self.essay.id})
+        response = self.client.put(url, {'answer_key': ['Big', 'Large'], 'points': 3}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.essay.refresh_from_db()
+        self.assertEqual((self.essay.answer_key, self.essay.points), ({'Big': 1, 'Large': 1}, 3))
+
+        response = self.client.put(url, {'answer_key': {'Big': 2}, 'points': 1}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_answer_key_requires_admin(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(self.candidates[0])))
+        response = self.client.get(reverse('question_key', kwargs={'pk': self.capital.id}))
+        self.assertEqual(response.status_code, 403)
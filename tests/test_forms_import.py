@@ -0,0 +1,74 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from cbtforms.models import Question
+
+
+class TestQuestionBulkCreate(TestCase):
+    """ Test module for QuestionBulkCreateView """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='author@gmail.com',
+            password='testpassword',
+            first_name='Author',
+            last_name='User',
+        )
+        token = str(AccessToken.for_user(self.user))
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+
+    def test_bulk_create_json(self):
+        questions = [
+            {'question_text': 'Question %d' % number, 'user': self.user.id}
+            for number in range(25)
+        ]
+        with self.settings(QUESTION_IMPORT_BATCH_SIZE=10):
+            response = self.client.post(
+                reverse('question_bulk_create'), data=questions, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 25)
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(Question.objects.count(), 25)
+
+    def test_bulk_create_ndjson(self):
+        body = '\n'.join(json.dumps({
+            'question_text': 'Question %d' % number, 'user': self.user.id
+        }) for number in range(3))
+        response = self.client.generic(
+            'POST', reverse('question_bulk_create'), body,
+            content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Question.objects.count(), 3)
+
+    def test_bulk_create_row_errors(self):
+        questions = [
+            {'question_text': 'Valid question', 'user': self.user.id},
+            {'question_text': 'No author'},
+            {'question_text': 'Unknown author', 'user': self.user.id + 100},
+        ]
+        response = self.client.post(
+            reverse('question_bulk_create'), data=questions, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual([error['row'] for error in response.data['errors']], [1, 2])
+        self.assertIn('user', response.data['errors'][1]['errors'])
+
+    def test_bulk_create_not_a_list(self):
+        response = self.client.post(
+            reverse('question_bulk_create'),
+            data={'question_text': 'Not a list', 'user': self.user.id},
+            format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Question.objects.count(), 0)
+
+    def test_bulk_create_unauthorized(self):
+        self.client.credentials()
+        response = self.client.post(
+            reverse('question_bulk_create'), data=[], format='json')
+        self.assertEqual(response.status_code, 401)
@@ -1,4 +1,8 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 
@@ -148,4 +152,143 @@ class TestQuestions(TestCase):
         # Assert the status
         self.assertEqual(response.status_code, 200)
         # Assert the length of the response
-        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNone(response.data['next'])
+
+    def test_get_question_pages(self):
+        # Create more questions than fit on one page
+        for number in range(5):
+            Question.objects.create(
+                question_text='Question %d' % number, user=self.user)
+
+        token = self.login(admin_email, admin_password)['access']
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+
+        # Walk the cursor until there is no next page
+        seen = []
+        url = reverse('question_list') + '?page_size=2'
+        while url:
+            response = self.client.get(url, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen += [question['question_text'] for question in response.data['results']]
+            url = response.data['next']
+        # Every question is returned once, in creation order
+        self.assertEqual(seen, ['Question %d' % number for number in range(5)])
+
+    def test_get_question_fields(self):
+        for number in range(3):
+            Question.objects.create(
+                question_text='Question %d' % number, user=self.user)
+
+        token = self.login(admin_email, admin_password)['access']
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+        response = self.client.get(reverse('question_list') + '?fields=question_text&page_size=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [{'question_text': 'Question 0'}, {'question_text': 'Question 1'}])
+        # Paging still works without the ordering fields in the output
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'], [{'question_text': 'Question 2'}])
+
+        response = self.client.get(reverse('question_list') + '?fields=nope')
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_questions_expand_user(self):
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        token = self.login(admin_email, admin_password)['access']
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+
+        def get_list():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('question_list') + '?expand=user&page_size=50')
+            self.assertEqual(response.status_code, 200)
+            return response, len(queries)
+
+        # Warm the token user's status cache
+        get_list()
+        for number in range(2):
+            Question.objects.create(question_text='Question %d' % number, user=self.user)
+        _, few_queries = get_list()
+        for number in range(2, 6):
+            Question.objects.create(question_text='Question %d' % number, user=self.super_user)
+        response, many_queries = get_list()
+        self.assertEqual(many_queries, few_queries)
+
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual(response.data['results'][0]['user'], self.user.id)
+        # Each author once, however many questions they wrote
+        self.assertEqual(response.data['included'], {'users': {
+            str(self.user.id): {
+                'id': self.user.id, 'email': user_email, 'first_name': 'Keith', 'last_name': 'Blackwelder'},
+            str(self.super_user.id): {
+                'id': self.super_user.id, 'email': admin_email, 'first_name': 'Kevin',
+                'last_name': 'Blackwelder'},
+        }})
+        self.assertNotIn('included', self.client.get(reverse('question_list')).data)
+
+        # Renaming the author shows up in the cached, expanded list
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        response, _ = get_list()
+        self.assertEqual(response.data['included']['users'][str(self.user.id)]['first_name'], 'Renamed')
+
+        response = self.client.get(reverse('question_list') + '?expand=answers')
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_my_questions(self):
+        for number in range(5):
+            Question.objects.create(question_text='Mine %d' % number, user=self.user)
+        Question.objects.create(question_text='Not mine', user=self.super_user)
+
+        response = self.client.get(reverse('question_mine'))
+        self.assertEqual(response.status_code, 401)
+
+        # Any signed in user, not only admins
+        token = self.login(user_email, user_password)['access']
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+        seen = []
+        url = reverse('question_mine') + '?page_size=2&fields=question_text'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [question['question_text'] for question in response.data['results']]
+            url = response.data['next']
+        # Newest first
+        self.assertEqual(seen, ['Mine %d' % number for number in reversed(range(5))])
+
+    def test_get_question_detail(self):
+        question = Question.objects.create(question_text='Why?', user=self.user)
+        token = self.login(admin_email, admin_password)['access']
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+
+        url = reverse('question_detail', kwargs={'pk': question.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['question_text'], 'Why?')
+        self.assertNotIn('included', response.data)
+
+        response = self.client.get(url + '?expand=user&fields=id,user')
+        self.assertEqual(response.data, {
+            'id': question.id,
+            'user': self.user.id,
+            'included': {'users': {str(self.user.id): {
+                'id': self.user.id, 'email': user_email, 'first_name': 'Keith', 'last_name': 'Blackwelder'}}},
+        })
+        # Conditional requests see author changes too
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url + '?expand=user&fields=id,user', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.user.last_name = 'Changed'
+        self.user.save()
+        self.assertEqual(self.client.get(url + '?expand=user&fields=id,user', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        response = self.client.get(reverse('question_detail', kwargs={'pk': question.pk + 1000}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_question_invalid_cursor(self):
+        token = self.login(admin_email, admin_password)['access']
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+        response = self.client.get(
+            reverse('question_list') + '?cursor=not-a-cursor',
+            format='json',
+        )
+        self.assertEqual(response.status_code, 404)
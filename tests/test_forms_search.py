@@ -0,0 +1,52 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from cbtforms.models import Question
+
+
+class TestQuestionSearch(TestCase):
+    """ Test module for QuestionSearchView """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.super_user = User.objects.create_superuser(
+            email='admin@gmail.com',
+            password='adminpassword',
+            first_name='Admin',
+            last_name='User',
+        )
+        token = str(AccessToken.for_user(self.super_user))
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+        Question.objects.bulk_create([
+            Question(question_text='What is the capital of California?', user=self.super_user),
+            Question(question_text='Which river flows through the capital of Texas?', user=self.super_user),
+            Question(question_text='How many moons does Jupiter have?', user=self.super_user),
+        ])
+
+    def search(self, text):
+        response = self.client.get(reverse('question_search'), {'q': text})
+        self.assertEqual(response.status_code, 200)
+        return [question['question_text'] for question in response.data['results']]
+
+    def test_search_full_text(self):
+        # Stemming matches "flowing" against "flows"
+        self.assertEqual(
+            self.search('flowing river'),
+            ['Which river flows through the capital of Texas?'])
+
+    def test_search_fuzzy(self):
+        self.assertEqual(self.search('Jupitr'), ['How many moons does Jupiter have?'])
+
+    def test_search_vector_follows_updates(self):
+        question = Question.objects.get(question_text__startswith='How many moons')
+        question.question_text = 'How many rings does Saturn have?'
+        question.save()
+        self.assertEqual(self.search('saturn rings'), ['How many rings does Saturn have?'])
+        self.assertEqual(self.search('jupiter moons'), [])
+
+    def test_search_requires_query(self):
+        response = self.client.get(reverse('question_search'))
+        self.assertEqual(response.status_code, 400)
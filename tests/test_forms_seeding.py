@@ -0,0 +1,67 @@
+import datetime
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from accounts.models import User
+from cbtforms.models import Question
+from cbtforms.seeding import MAX_TEXT_LENGTH, SyntheticData
+
+
+class TestSeeding(TestCase):
+    """ Test module for the synthetic data seeding command """
+
+    def setUp(self):
+        self.existing = User.objects.create_user(
+            email='existing@gmail.com',
+            password='testpassword',
+            first_name='Existing',
+            last_name='User',
+        )
+
+    def test_same_seed_same_rows(self):
+        until = datetime.date(2024, 6, 1)
+        first = SyntheticData(50, 200, seed=3, until=until)
+        second = SyntheticData(50, 200, seed=3, until=until)
+        other = SyntheticData(50, 200, seed=4, until=until)
+        self.assertEqual(first.question_rows(1, 0, 200), second.question_rows(1, 0, 200))
+        self.assertEqual(first.user_rows(1, 0, 50, 'hash'), second.user_rows(1, 0, 50, 'hash'))
+        self.assertNotEqual(first.question_rows(1, 0, 200), other.question_rows(1, 0, 200))
+
+    def test_distributions(self):
+        data = SyntheticData(1000, 20000, seed=1, until=datetime.date(2024, 6, 1))
+        self.assertLessEqual(data.lengths.max(), MAX_TEXT_LENGTH)
+        self.assertGreater(data.lengths.max(), 3000)
+        counts = sorted((data.authors == user).sum() for user in range(1000))
+        # The busiest authors write far more than the typical one
+        self.assertGreater(counts[-1], 20 * counts[500])
+        self.assertTrue((data.created >= data.joined[data.authors]).all())
+        self.assertTrue((data.created[1:] >= data.created[:-1]).all())
+
+    def test_command(self):
+        out = StringIO()
+        call_command(
+            'seed_data', users=30, questions=120, seed=7, password='seedpassword', batch_size=50, stdout=out)
+        self.assertIn('Seeded 30 users', out.getvalue())
+
+        seeded = User.objects.exclude(pk=self.existing.pk)
+        self.assertEqual(seeded.count(), 30)
+        self.assertEqual(min(seeded.values_list('id', flat=True)), self.existing.id + 1)
+        self.assertTrue(seeded.first().check_password('seedpassword'))
+        self.assertEqual(Question.objects.count(), 120)
+        question = Question.objects.order_by('id').first()
+        self.assertTrue(question.question_text.endswith('?'))
+        self.assertTrue(Question.objects.filter(search_vector__isnull=False).exists())
+        ids = list(Question.objects.order_by('created_at', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, sorted(ids))
+
+        # The sequence moved past the seeded ids
+        User.objects.create_user(email='later@gmail.com', password='x', first_name='L', last_name='U')
+
+        with self.assertRaises(CommandError):
+            call_command('seed_data', users=30, questions=0, seed=7, stdout=StringIO())
+
+    def test_command_keeping_indexes(self):
+        call_command('seed_data', users=5, questions=10, seed=8, rebuild_indexes=False, stdout=StringIO())
+        self.assertEqual(Question.objects.count(), 10)
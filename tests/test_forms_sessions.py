@@ -0,0 +1,92 @@
+from unittest import mock
+
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from cbt_project.asgi import application
+from cbtforms.answers import AnswerBuffer
+from cbtforms.models import Answer, Question
+
+
+@override_settings(ANSWER_FLUSH_INTERVAL=0.01, ANSWER_FLUSH_SIZE=500)
+class TestExamSession(TransactionTestCase):
+    """
+    Test module for the live exam session websocket. Channels closes
+    database connections between messages, so this can't run in a transaction.
+    """
+
+    def setUp(self):
+        caches[settings.TOKEN_USER_CACHE_ALIAS].clear()
+        self.user = User.objects.create_user(
+            email='candidate@gmail.com',
+            password='testpassword',
+            first_name='Candidate',
+            last_name='User',
+        )
+        self.question = Question.objects.create(question_text='What is the capital of Texas?', user=self.user)
+        self.token = str(AccessToken.for_user(self.user))
+
+    async def connect(self, token=None):
+        communicator = WebsocketCommunicator(application, '/ws/exams/biology-2024/?token=%s' % (token or self.token))
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def test_answer_is_saved_and_acked(self):
+        communicator = await self.connect()
+        await communicator.send_json_to({'type': 'answer', 'id': 'a1', 'question': self.question.id, 'response': 'Austin'})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'ack', 'id': 'a1'})
+        answer = await Answer.objects.aget()
+        self.assertEqual((answer.exam, answer.user_id, answer.response), ('biology-2024', self.user.id, 'Austin'))
+        await communicator.disconnect()
+
+    async def test_changed_answers_are_coalesced(self):
+        communicator = await self.connect()
+        await communicator.send_json_to({'type': 'answer', 'id': 'a1', 'question': self.question.id, 'response': 'Dallas'})
+        await communicator.send_json_to({'type': 'answer', 'id': 'a2', 'question': self.question.id, 'response': 'Austin'})
+        acks = {(await communicator.receive_json_from())['id'] for _ in range(2)}
+        self.assertEqual(acks, {'a1', 'a2'})
+        await communicator.send_json_to({'type': 'answer', 'id': 'a3', 'question': self.question.id, 'response': 'Houston'})
+        await communicator.receive_json_from()
+        self.assertEqual([a.response async for a in Answer.objects.all()], ['Houston'])
+        await communicator.disconnect()
+
+    async def test_flush_closes_old_connections(self):
+        # Not through the communicator, which stubs close_old_connections out
+        buffer = AnswerBuffer()
+        future = buffer.add(Answer(
+            exam='biology-2024', user_id=self.user.id, question_id=self.question.id, response='Austin',
+            answered_at=timezone.now(),
+        ))
+        with mock.patch('channels.db.close_old_connections') as close_old_connections:
+            await buffer.flush()
+        self.assertIsNone(await future)
+        # Before and after the write
+        self.assertEqual(close_old_connections.call_count, 2)
+
+    async def test_unknown_question_is_rejected(self):
+        communicator = await self.connect()
+        await communicator.send_json_to({'type': 'answer', 'id': 'a1', 'question': self.question.id + 1, 'response': 'B'})
+        message = await communicator.receive_json_from()
+        self.assertEqual(message['type'], 'error')
+        self.assertIn('question', message['errors'])
+        self.assertFalse(await Answer.objects.aexists())
+        await communicator.disconnect()
+
+    async def test_invalid_event(self):
+        communicator = await self.connect()
+        await communicator.send_json_to({'type': 'answer', 'id': 'a1', 'response': 'B'})
+        message = await communicator.receive_json_from()
+        self.assertEqual((message['type'], message['id']), ('error', 'a1'))
+        await communicator.disconnect()
+
+    async def test_requires_token(self):
+        communicator = WebsocketCommunicator(application, '/ws/exams/biology-2024/')
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
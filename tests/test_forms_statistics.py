@@ -0,0 +1,149 @@
+import random
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from cbtforms.answers import write_answers
+from cbtforms.models import Answer, Question
+from cbtforms.statistics import recompute_statistics, summarize
+
+
+class TestItemStatistics(TestCase):
+    """ Test module for incremental item analysis """
+
+    def setUp(self):
+        caches[settings.TOKEN_USER_CACHE_ALIAS].clear()
+        self.super_user = User.objects.create_superuser(
+            email='admin@gmail.com',
+            password='adminpassword',
+            first_name='Admin',
+            last_name='User',
+        )
+        self.candidates = [
+            User.objects.create_user(
+                email='candidate%d@gmail.com' % index,
+                password='testpassword',
+                first_name='Candidate',
+                last_name='User',
+            )
+            for index in range(12)
+        ]
+        self.questions = [
+            Question.objects.create(
+                question_text='Question %d' % index, user=self.super_user,
+                answer_key={'A': 1, 'B': 0.5}, points=index + 1)
+            for index in range(4)
+        ]
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(self.super_user)))
+
+    def answer(self, candidate, question, response):
+        return Answer(exam='biology-2024', user=candidate, question=question, response=response,
+                      answered_at=timezone.now())
+
+    def write_random_answers(self):
+        generator = random.Random(7)
+        answers = [
+            self.answer(candidate, question, generator.choice('ABCD'))
+            for candidate in self.candidates
+            for question in self.questions
+            if generator.random() < 0.9
+        ]
+        # Arrive in several flushes, with some candidates changing their mind
+        for start in range(0, len(answers), 7):
+            write_answers(answers[start:start + 7])
+        write_answers([self.answer(candidate, self.questions[0], 'A') for candidate in self.candidates[:5]])
+
+    def assertSummariesEqual(self, first, second):
+        self.assertEqual(first['candidates'], second['candidates'])
+        self.assertAlmostEqual(first['alpha'], second['alpha'])
+        self.assertAlmostEqual(first['mean_score'], second['mean_score'])
+        for one, other in zip(first['items'], second['items']):
+            self.assertEqual(one['responses'], other['responses'])
+            self.assertAlmostEqual(one['p_value'], other['p_value'])
+            self.assertAlmostEqual(one['point_biserial'], other['point_biserial'])
+            self.assertEqual(
+                [(option['response'], option['count']) for option in one['options']],
+                [(option['response'], option['count']) for option in other['options']])
+            for option, other_option in zip(one['options'], other['options']):
+                self.assertAlmostEqual(option['mean_score'], other_option['mean_score'])
+
+    def test_incremental_matches_recompute(self):
+        self.write_random_answers()
+        incremental = summarize('biology-2024')
+        self.assertSummariesEqual(incremental, recompute_statistics('biology-2024'))
+
+    def test_out_of_order_writes(self):
+        candidate, question = self.candidates[0], self.questions[0]
+        for incremental in (True, False):
+            with self.subTest(incremental=incremental), override_settings(ITEM_STATISTICS_INCREMENTAL=incremental):
+                exam = 'biology-%s' % incremental
+                new = Answer(exam=exam, user=candidate, question=question, response='A', answered_at=timezone.now())
+                old = Answer(exam=exam, user=candidate, question=question, response='B',
+                             answered_at=new.answered_at - timedelta(minutes=5))
+                write_answers([new])
+                self.assertEqual(write_answers([old]), [old])
+                self.assertEqual(Answer.objects.get(exam=exam).response, 'A')
+                # Coalesced by when they were given, not by list order
+                write_answers([new, old])
+                self.assertEqual(Answer.objects.get(exam=exam).response, 'A')
+        self.assertSummariesEqual(summarize('biology-True'), recompute_statistics('biology-True'))
+
+    def test_statistics(self):
+        self.write_random_answers()
+        summary = summarize('biology-2024')
+
+        credit = np.zeros((len(self.candidates), len(self.questions)))
+        keys = {'A': 1, 'B': 0.5}
+        rows = {candidate.id: row for row, candidate in enumerate(self.candidates)}
+        for answer in Answer.objects.all():
+            credit[rows[answer.user_id], answer.question_id - self.questions[0].id] = keys.get(answer.response, 0)
+        points = np.array([question.points for question in self.questions])
+        scores = credit @ points
+        item_variance = (credit * points).var(axis=0)
+        alpha = 4 / 3 * (1 - item_variance.sum() / scores.var())
+
+        self.assertEqual(summary['candidates'], 12)
+        self.assertAlmostEqual(summary['alpha'], alpha)
+        self.assertAlmostEqual(summary['mean_score'], scores.mean())
+        item = summary['items'][1]
+        rest = scores - credit[:, 1] * points[1]
+        self.assertAlmostEqual(item['point_biserial'], np.corrcoef(credit[:, 1], rest)[0, 1])
+        answered = Answer.objects.filter(question=self.questions[1])
+        self.assertEqual(item['responses'], answered.count())
+        self.assertAlmostEqual(item['p_value'], credit[:, 1].sum() / answered.count())
+        self.assertEqual(sum(option['count'] for option in item['options']), item['responses'])
+
+    def test_answer_key_change(self):
+        self.write_random_answers()
+        url = reverse('question_key', kwargs={'pk': self.questions[1].id})
+        response = self.client.put(url, {'answer_key': {'C': 1}, 'points': 5}, format='json')
+        self.assertEqual(response.status_code, 200)
+        summary = summarize('biology-2024')
+        self.assertAlmostEqual(
+            summary['items'][1]['p_value'],
+            Answer.objects.filter(question=self.questions[1], response='C').count()
+            / Answer.objects.filter(question=self.questions[1]).count())
+        # Later answers keep folding into the rebuilt sums
+        write_answers([self.answer(candidate, self.questions[1], 'C') for candidate in self.candidates[:3]])
+        self.assertSummariesEqual(summarize('biology-2024'), recompute_statistics('biology-2024'))
+
+    def test_statistics_endpoint(self):
+        url = reverse('exam_statistics', kwargs={'exam': 'biology-2024'})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.write_random_answers()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['items']), 4)
+
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['candidates'], 12)
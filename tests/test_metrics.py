@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from cbtforms.models import Question
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetrics(TestCase):
+    """ Test module for request metrics and the Prometheus endpoint """
+
+    def setUp(self):
+        caches[settings.TOKEN_USER_CACHE_ALIAS].clear()
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        self.super_user = User.objects.create_superuser(
+            email='admin@gmail.com',
+            password='adminpassword',
+            first_name='Admin',
+            last_name='User',
+        )
+        Question.objects.create(question_text='What is the capital of Texas?', user=self.super_user)
+        self.headers = {'Authorization': 'Bearer ' + str(AccessToken.for_user(self.super_user))}
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=self.headers['Authorization'])
+
+    def test_request_metrics(self):
+        count = sample('http_request_duration_seconds_count', view='question_list', method='GET')
+        queries = sample('http_request_db_queries_sum', view='question_list')
+        ok = sample('http_requests_total', view='question_list', method='GET', status='200')
+
+        response = self.client.get(reverse('question_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sample('http_request_duration_seconds_count', view='question_list', method='GET'), count + 1)
+        self.assertEqual(sample('http_requests_total', view='question_list', method='GET', status='200'), ok + 1)
+        self.assertGreater(sample('http_request_db_queries_sum', view='question_list'), queries)
+        self.assertGreaterEqual(
+            sample('http_response_size_bytes_sum', view='question_list'), len(response.content))
+
+    async def test_async_view_queries_are_counted(self):
+        queries = sample('http_request_db_queries_sum', view='question_list_async')
+        response = await self.async_client.get(reverse('question_list_async'), headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(sample('http_request_db_queries_sum', view='question_list_async'), queries)
+
+    def test_password_hashing_time(self):
+        for name in ('token_obtain_pair', 'token_obtain_pair_async'):
+            count = sample('password_hashing_duration_seconds_count', function='check_password')
+            response = self.client.post(reverse(name), {'email': 'admin@gmail.com', 'password': 'adminpassword'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(sample('password_hashing_duration_seconds_count', function='check_password'), count + 1)
+
+    def test_pbkdf2_check_is_not_counted_as_hash(self):
+        encoded = make_password('adminpassword', hasher='pbkdf2_sha256')
+        made = sample('password_hashing_duration_seconds_count', function='make_password')
+        checked = sample('password_hashing_duration_seconds_count', function='check_password')
+        self.assertTrue(check_password('adminpassword', encoded))
+        self.assertEqual(sample('password_hashing_duration_seconds_count', function='make_password'), made)
+        self.assertEqual(sample('password_hashing_duration_seconds_count', function='check_password'), checked + 1)
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('question_list'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'http_request_duration_seconds_bucket{le="0.005",method="GET",view="question_list"}',
+                      response.content)
+
+    @override_settings(METRICS_BEARER_TOKEN='scrape-secret')
+    def test_metrics_token(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
@@ -0,0 +1,106 @@
+import os
+import pstats
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from cbtforms.models import Question
+
+
+class TestProfiling(TestCase):
+    """ Test module for on-demand request profiling """
+
+    def setUp(self):
+        caches[settings.TOKEN_USER_CACHE_ALIAS].clear()
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+        profiles = override_settings(PROFILING_DIR=self.profile_dir)
+        profiles.enable()
+        self.addCleanup(profiles.disable)
+
+        self.super_user = User.objects.create_superuser(
+            email='admin@gmail.com',
+            password='adminpassword',
+            first_name='Admin',
+            last_name='User',
+        )
+        self.user = User.objects.create_user(
+            email='author@gmail.com',
+            password='testpassword',
+            first_name='Author',
+            last_name='User',
+        )
+        Question.objects.create(question_text='What is the capital of Texas?', user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(self.super_user)))
+
+    def test_staff_profile(self):
+        response = self.client.get(reverse('question_list'), HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        profile_id = response['X-Profile-Id']
+
+        listing = self.client.get(reverse('profile_list'))
+        self.assertEqual([profile['id'] for profile in listing.data['results']], [profile_id])
+        self.assertEqual(listing.data['results'][0]['view'], 'question_list')
+
+        detail = self.client.get(reverse('profile_detail', kwargs={'profile_id': profile_id}))
+        self.assertEqual(detail.data['status'], 200)
+        self.assertEqual(detail.data['user'], self.super_user.id)
+        self.assertGreater(detail.data['query_count'], 0)
+        self.assertTrue(any('cbtforms_question' in query['sql'] for query in detail.data['queries']))
+        self.assertIn('function calls', detail.data['functions'])
+
+        stats = self.client.get(reverse('profile_stats', kwargs={'profile_id': profile_id}))
+        self.assertEqual(stats.status_code, 200)
+        path = '%s/downloaded.prof' % self.profile_dir
+        with open(path, 'wb') as file:
+            file.write(b''.join(stats.streaming_content))
+        self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+    def test_async_view_not_profiled(self):
+        response = self.client.get(reverse('question_list_async'), HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertIn('async view', response['X-Profile-Skipped'])
+        self.assertEqual(self.client.get(reverse('profile_list')).data['results'], [])
+
+    async def test_profile_under_asgi(self):
+        headers = {'Authorization': 'Bearer ' + str(AccessToken.for_user(self.super_user)), 'X-Profile': '1'}
+        response = await self.async_client.get(reverse('question_list'), headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(os.path.exists(os.path.join(self.profile_dir, response['X-Profile-Id'] + '.json')))
+        response = await self.async_client.get(reverse('question_list_async'), headers=headers)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertIn('X-Profile-Skipped', response)
+
+    def test_not_profiled_by_default(self):
+        response = self.client.get(reverse('question_list'))
+        self.assertNotIn('X-Profile-Id', response)
+
+    def test_header_ignored_for_non_staff(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(self.user)))
+        response = self.client.post(
+            reverse('question_create'), {'question_text': 'Why?', 'user': self.user.id}, HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(self.client.get(reverse('profile_list')).status_code, 403)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_KEEP=2)
+    def test_sampling_and_retention(self):
+        ids = [self.client.get(reverse('question_list'))['X-Profile-Id'] for _ in range(3)]
+        listing = self.client.get(reverse('profile_list'))
+        # The listing request itself was sampled too
+        self.assertEqual(len(listing.data['results']), 2)
+        self.assertIn(ids[-1], [profile['id'] for profile in listing.data['results']])
+
+    def test_unknown_profile(self):
+        response = self.client.get(reverse('profile_detail', kwargs={'profile_id': '..passwd'}))
+        self.assertEqual(response.status_code, 404)